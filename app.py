@@ -1,15 +1,14 @@
 # -*- coding: utf-8 -*-
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 import time
 
 
 # --- CUSTOM MODULES ---
-from core.tefas_fetcher import TefasFetcher
-from core.processor import DataProcessor
-from core.inflation_fetcher import InflationFetcher
 from core.ai_forecaster import AIForecaster
+from core.job_executor import JobExecutor
+import core.cached as cached
 
 # --- NEW UI MODULES ---
 from core.style_config import apply_custom_css
@@ -32,8 +31,15 @@ st.title("Kuveyt Türk Portföy Akademisi")
 st.caption("Finansal Analiz | Simülasyon | Yapay Zeka | Risk Yönetimi Terminali (v5.2)")
 
 # --- INITIALIZATION ---
-processor = DataProcessor()
-ai_forecaster = AIForecaster()
+# Ağır nesneler (işlemci, depolar, model kaydı, tarayıcı) süreç genelinde tek örnektir (cache_resource)
+processor = cached.get_processor()
+# Tahminci oturum başına tutulur (son katman / süre bilgisi oturuma özeldir); model kaydı ve depolar paylaşılır
+if 'ai_forecaster' not in st.session_state:
+    st.session_state.ai_forecaster = AIForecaster(registry=cached.get_model_registry(), feature_store=cached.get_feature_store(),
+                                                  macro_store=cached.get_macro_store())
+ai_forecaster = st.session_state.ai_forecaster
+# Uzun eğitimler arka planda; iş kimlikleri oturumda tutulur, sonuçlar sonraki çalıştırmalarda alınır
+if 'job_executor' not in st.session_state: st.session_state.job_executor = JobExecutor()
 
 # --- SIDEBAR: KONTROL MERKEZİ ---
 with st.sidebar:
@@ -77,8 +83,7 @@ with st.sidebar:
             if evds_key_input:
                 st.session_state['evds_key'] = evds_key_input
                 try:
-                    inf_f = InflationFetcher(evds_key_input)
-                    api_data = inf_f.fetch_inflation_data(start_date, end_date)
+                    api_data = cached.fetch_inflation(start_date, end_date, evds_key_input)
                     if not api_data.empty:
                         st.session_state['inf_data'] = api_data
                         st.success(f"{len(api_data)} ay veri alındı!")
@@ -205,66 +210,8 @@ with st.sidebar:
     
     selected_funds = st.multiselect("Fonları Seçin:", final_list, default=["KUT", "KPC", "KCV"])
     
-    # 5. SİMÜLASYON AYARLARI
-    sim_weights = {}
-    budget = 100000
-    
-    with st.expander("💰 Portföy Ayarları", expanded=True):
-        budget = st.number_input("Bütçe (TL)", value=100000, step=1000)
-        
-        st.write("Fon Ağırlıkları (%)")
-        total_w = 0
-        if selected_funds:
-            # Default equal weight if not set
-            eq = 100 // len(selected_funds)
-            
-            # Callback functions
-            def update_slider_cb(s_k, n_k):
-                st.session_state[n_k] = st.session_state[s_k]
-                
-            def update_num_cb(s_k, n_k):
-                st.session_state[s_k] = st.session_state[n_k]
+    # Bütçe ve fon ağırlıkları Portföy Simülasyonu sekmesindedir (yalnızca o bölüm yeniden çalışır)
 
-            for f in selected_funds:
-                slider_key = f"slider_{f}"
-                num_key = f"num_{f}"
-                
-                # Initialize Session State if not Present
-                if slider_key not in st.session_state: st.session_state[slider_key] = eq
-                if num_key not in st.session_state: st.session_state[num_key] = eq
-                
-                c_slide, c_num = st.columns([3, 1])
-                
-                # SLIDER
-                with c_slide:
-                    st.slider(
-                        label=f"{f}",
-                        min_value=0, max_value=100,
-                        key=slider_key,
-                        on_change=update_slider_cb,
-                        args=(slider_key, num_key) 
-                    )
-                
-                # NUMBER INPUT
-                with c_num:
-                    st.number_input(
-                        label="%",
-                        min_value=0, max_value=100,
-                        key=num_key,
-                        step=1,
-                        label_visibility="collapsed",
-                        on_change=update_num_cb,
-                        args=(slider_key, num_key)
-                    )
-                
-                # Use value from one of them (they are synced)
-                current_val = st.session_state[slider_key]
-                sim_weights[f] = current_val / 100
-                total_w += current_val
-            
-            if total_w != 100: st.error(f"Toplam: %{total_w} (Hedef: %100)")
-            else: st.success("Dağılım Tamam")
-            
     # ACTION BUTTON
     btn_label = "🎰 Simülasyonu Başlat" if calisma_modu == "💼 Portföy Simülasyonu" else "🚀 Analizi Çalıştır"
     start_btn = st.button(btn_label, type="primary", use_container_width=True)
@@ -286,19 +233,14 @@ if start_btn:
         st.warning("Lütfen sol menüden fon seçin.")
     else:
         with st.status("Veriler Toplanıyor...", expanded=True) as status:
-            tf = TefasFetcher()
+            tf = cached.LazyTefasFetcher()
             raw_data = []
             
             status.write("📥 TEFAS verileri çekiliyor...")
             for f in selected_funds:
-                # fetch_data requires start, end
-                df = tf.fetch_data(f, start_date, datetime.today())
-                
-                if not df.empty:
-                    # Clean and Process
-                    clean = processor.clean_data(df)
-                    clean = processor.add_financial_metrics(clean)
-                    clean['FundCode'] = f
+                # Temizleme, depo yazımı ve metrikler önbellekte; aynı gün aynı aralık yeniden çekilmez
+                clean = cached.fetch_fund(f, start_date, date.today(), tf)
+                if not clean.empty:
                     raw_data.append(clean)
             
             tf.close()
@@ -315,11 +257,12 @@ if start_btn:
 # --- MAIN TABS ---
 # Tabs: Analiz (Fon), Piyasa (BIST/Dolar), Makro (Faiz/Rezerv), Simülasyon, Diğerleri
 # --- MAIN TABS ---
-tab_analiz, tab_sim, tab_reel, tab_ai, tab_formul = st.tabs([
+tab_analiz, tab_sim, tab_reel, tab_ai, tab_scr, tab_formul = st.tabs([
     "📈 Fon Analizi", 
     "💼 Portföy Simülasyonu", 
     "Reel Getiri", 
     "🧠 AI Tahmin", 
+    "🔎 Fon Tarayıcı",
     "📚 Formüller"
 ])
 
@@ -338,15 +281,15 @@ with tab_analiz:
 # --- TAB 4: SİMÜLASYON ---
 with tab_sim:
     if st.session_state.main_df is not None:
-        views.render_simulation_view(st.session_state.main_df, selected_funds, sim_weights, budget, processor)
+        views.render_simulation_view(st.session_state.main_df, selected_funds, processor)
     else:
         st.info("Simülasyon için önce 'Analizi Çalıştır' butonuna basarak fon verilerini yükleyiniz.")
 
 # --- TAB 5: REEL GETİRİ ---
 with tab_reel:
     if st.session_state.main_df is not None:
-        inf_fetcher = InflationFetcher()
-        inflation_data = inf_fetcher.fetch_inflation_data(start_date)
+        # Enflasyon verisi başlangıç tarihi değişmedikçe tekrar çekilmez (deflatör önbelleği bu veriye bağlı)
+        inflation_data = cached.fetch_inflation(start_date)
         if hasattr(views, 'render_real_return_view'):
             views.render_real_return_view(st.session_state.main_df, inflation_data)
         else:
@@ -357,11 +300,14 @@ with tab_reel:
 # --- TAB 6: AI TAHMİN ---
 with tab_ai:
     if st.session_state.main_df is not None:
-        ai_forecaster = AIForecaster()
-        views.render_ai_view(st.session_state.main_df, ai_forecaster)
+        views.render_ai_view(st.session_state.main_df, ai_forecaster, st.session_state.job_executor)
     else:
         st.info("Veri yüklenmedi.")
 
+# --- TAB: FON TARAYICI (Tüm TEFAS evreni, yerel depo üzerinden) ---
+with tab_scr:
+    views.render_screener_view(cached.get_screener(), start_date, end_date)
+
 # --- TAB 5: FORMÜLLER ---
 with tab_formul:
     views.render_formula_view()
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import copy
+import time
+import threading
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import GradientBoostingRegressor
@@ -8,66 +11,73 @@ try:
 except ImportError:
     XGBOOST_AVAILABLE = False
     XGBRegressor = None  # Will use GradientBoosting as fallback
-from sklearn.model_selection import RandomizedSearchCV
 from sklearn.preprocessing import MinMaxScaler, PolynomialFeatures
 from datetime import timedelta
+from functools import partial
+from contextlib import contextmanager
+from core.feature_stream import StreamingFeatureGenerator
+from core.indicators import IndicatorEngine
+from core.model_registry import ModelRegistry
+from core.fast_models import FastForecaster
+from core.hyperparam_search import SuccessiveHalvingSearch, SearchPriors
+from core.concurrency import BUDGET
+
+
+def build_model(model_name, model_threads, params):
+    """Model ailesi + parametrelerden tahminci üretir (arama işçilerine gönderilebilir, modül seviyesinde)."""
+    if model_name == "xgboost":
+        return XGBRegressor(random_state=42, tree_method='hist', n_jobs=model_threads, **params)
+    return GradientBoostingRegressor(random_state=42, **params)
+
 
 class AIForecaster:
-    def __init__(self):
-        pass
+    MODES = ("recursive", "direct", "tiered")
+    # Doğrudan (direct) modda eğitimde kullanılan ufuk noktaları; aradaki ufuklar model tarafından enterpole edilir
+    DIRECT_HORIZONS = (1, 2, 3, 5, 7, 10, 14, 21, 30, 45, 60, 90, 120, 180, 270, 365)
+    # Bir ufkun eğitilebilmesi için gereken en az (arındırılmış) eğitim ve test çıpası sayısı
+    MIN_HORIZON_TRAIN = 30
+    MIN_HORIZON_TEST = 10
+
+    # Sıcak başlangıç: yeni günlerde eklenen ağaç sayısı ve eğitildikleri son satır sayısı
+    WARM_TREES = 20
+    WARM_WINDOW = 60
+    # Tam yeniden eğitim: son tam eğitimden bu kadar gün sonra, tek seferde daha fazla yeni gün gelirse
+    # ya da yeni günlerdeki artık RMS'i test artık std'sinin DRIFT_THRESHOLD katını aşarsa
+    FULL_RETRAIN_DAYS = 30
+    MAX_WARM_ROWS = 30
+    DRIFT_THRESHOLD = 2.0
+
+    def __init__(self, registry=None, n_jobs=None, model_threads=None, search_budget=30.0, priors=None, feature_store=None,
+                 incremental=True, macro_store=None, budget=None):
+        # Eğitilmiş modeller fon + veri özeti + parametre uzayı anahtarıyla saklanır
+        self.registry = registry if registry is not None else ModelRegistry()
+        # n_jobs: hiperparametre aramasının paralelliği, model_threads: XGBoost iş parçacığı sayısı
+        # (None: eğitim isteğinin eşzamanlılık bütçesinden; toplu tahminde her süreç kendi bütçesiyle çalışır)
+        self.n_jobs = n_jobs
+        self.model_threads = model_threads
+        self.budget = budget if budget is not None else BUDGET
+        # Bu oturumda gözlenen eğitim süresi ortalaması (katmanlı modda gecikme tahmini; işler arasında ortak)
+        self.fit_seconds = None
+        self._fit_lock = threading.Lock()
+        # Ardışık yarılama aramasının süre bütçesi (sn) ve fon bazlı sıcak başlangıç kayıtları
+        self.search_budget = search_budget
+        self.priors = priors if priors is not None else SearchPriors()
+        # Panel / tek seri teknik indikatörler (float64; tahmindeki akış üreticisiyle aynı özellikler)
+        self.indicators = IndicatorEngine()
+        # Verilirse eğitim özellikleri diskteki hazır matristen okunur (FeatureStore, artımlı güncellenir)
+        self.feature_store = feature_store
+        # Yeni gün geldiğinde kayıtlı model baştan eğitilmek yerine sürdürülür (warm_update)
+        self.incremental = incremental
+        # use_macro=True çağrılarında özelliklere eklenen nokta-zamanlı makro matris (MacroFeatureStore)
+        self.macro_store = macro_store
 
-    def calculate_technical_indicators(self, df):
+    def calculate_technical_indicators(self, df, indicators=None):
         """
         Gelişmiş Teknik İndikatörler (Faz 2: Expanded)
+        SMA / EMA / ROC / Momentum / RSI / Bollinger / MACD / Volatilite; hesap IndicatorEngine'dedir
+        (ortak EMA ve SMA bir kez hesaplanır). indicators: yalnızca istenen sütunlar (None = tümü).
         """
-        data = df.copy()
-        
-        # === MOVING AVERAGES (Multiple Timeframes) ===
-        data['SMA_5'] = data['Price'].rolling(window=5).mean()
-        data['SMA_10'] = data['Price'].rolling(window=10).mean()
-        data['SMA_20'] = data['Price'].rolling(window=20).mean()
-        data['SMA_50'] = data['Price'].rolling(window=50).mean()
-        
-        # Exponential Moving Averages
-        data['EMA_12'] = data['Price'].ewm(span=12, adjust=False).mean()
-        data['EMA_26'] = data['Price'].ewm(span=26, adjust=False).mean()
-        
-        # === MOMENTUM INDICATORS ===
-        # Price Rate of Change
-        data['ROC_5'] = ((data['Price'] - data['Price'].shift(5)) / data['Price'].shift(5)) * 100
-        data['ROC_10'] = ((data['Price'] - data['Price'].shift(10)) / data['Price'].shift(10)) * 100
-        
-        # Momentum (raw price difference)
-        data['Momentum_5'] = data['Price'] - data['Price'].shift(5)
-        data['Momentum_10'] = data['Price'] - data['Price'].shift(10)
-        
-        # === RSI ===
-        delta = data['Price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
-        
-        # === BOLLINGER BANDS ===
-        sma20 = data['Price'].rolling(window=20).mean()
-        std20 = data['Price'].rolling(window=20).std()
-        data['BB_Upper'] = sma20 + (2 * std20)
-        data['BB_Lower'] = sma20 - (2 * std20)
-        data['BB_Percent'] = (data['Price'] - data['BB_Lower']) / (data['BB_Upper'] - data['BB_Lower'])
-        
-        # === MACD ===
-        ema12 = data['Price'].ewm(span=12, adjust=False).mean()
-        ema26 = data['Price'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = ema12 - ema26
-        data['MACD_Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
-        data['MACD_Histogram'] = data['MACD'] - data['MACD_Signal']
-        
-        # === VOLATILITY ===
-        data['Volatility_7d'] = data['Price'].rolling(window=7).std()
-        data['Volatility_14d'] = data['Price'].rolling(window=14).std()
-        data['Volatility_ATR_Proxy'] = data['Price'].rolling(window=14).std()
-
-        return data
+        return self.indicators.compute_frame(df, indicators)
 
     def prepare_features(self, df, lags=7):  # Optimized to 7 (not 10)
         if df.empty or 'Price' not in df.columns:
@@ -79,11 +89,10 @@ class AIForecaster:
         # --- 1. LOG RETURN (Daha Normal Dağılım İçin) ---
         data['Return'] = np.log(data['Price'] / data['Price'].shift(1))
         
-        data = self.calculate_technical_indicators(data)
-        
         # --- 2. Selective Lags (Quality over Quantity) ---
-        # Only lag the most predictive features
+        # Only lag the most predictive features (yalnızca bunların indikatörleri hesaplanır)
         core_features = ['Return', 'RSI', 'MACD', 'MACD_Histogram', 'Volatility_7d']
+        data = self.calculate_technical_indicators(data, core_features[1:])
         
         for col in core_features:
             if col not in data.columns:
@@ -98,14 +107,284 @@ class AIForecaster:
         data = data.dropna()
         return data
 
-    def train_and_predict(self, df, days_forward=30):
-        if df.empty or len(df) < 90: return None, 0
+    def model_data(self, df, lags=7, fund_code=None, use_macro=False):
+        """
+        Eğitim tablosu. Özellik deposu varsa fon önce artımlı güncellenir, satırlar memmap'ten okunur
+        (df'in tarih aralığıyla); aksi halde prepare_features ile baştan hesaplanır.
+        use_macro: makro matristen as-of birleştirmeyle Macro_* sütunları eklenir.
+        """
+        data = None
+        store = self.feature_store
+        if store is not None and fund_code and lags == store.lags and not df.empty:
+            try:
+                store.update(fund_code, df)
+                data = store.frame(fund_code, start=df['Date'].min(), end=df['Date'].max())
+                # Depo tablonun son gününe ulaşmıyorsa (güncellenemedi) özellikler baştan hesaplanır
+                if not data.empty and data['Date'].iloc[-1] < pd.Timestamp(df['Date'].max()): data = None
+            except Exception as e:
+                print(f"⚠️ Özellik deposu kullanılamadı ({fund_code}): {e}")
+        if data is None or data.empty:
+            data = self.prepare_features(df, lags=lags)
+        return self._with_macro(data) if use_macro else data
+
+    def _with_macro(self, data):
+        if self.macro_store is None:
+            print("⚠️ Makro özellik deposu tanımlı değil, makro sütunlar eklenmedi.")
+            return data
+        macro = self.macro_store.append(data)
+        if len(macro) < 90:
+            print(f"⚠️ Makro geçmişi yetersiz ({len(macro)} satır), makro sütunlar eklenmedi.")
+            return data
+        return macro
 
-        # Feature Prep (Optimized to 7)
-        lags = 7
-        model_data = self.prepare_features(df, lags=lags)
-        if model_data.empty: return None, 0
+    def _macro_values(self, bundle, df):
+        """Pakette makro özellik varsa son gün itibarıyla bilinen değerler (tahmin boyunca sabit); yoksa {}."""
+        if not any(f.startswith("Macro_") for f in bundle['features']): return {}
+        if self.macro_store is None: return {}
+        return self.macro_store.latest(df['Date'].max())
+
+    def model_space(self):
+        """Kullanılacak model ailesi ve hiperparametre uzayı (model önbelleği anahtarının parçası)."""
+        if XGBOOST_AVAILABLE:
+            # XGBoost with regularization
+            return "xgboost", {
+                'n_estimators': [100, 200, 300],
+                'learning_rate': [0.01, 0.03, 0.05],
+                'max_depth': [3, 4, 5],
+                'subsample': [0.7, 0.8],
+                'colsample_bytree': [0.7, 0.8],
+                'min_child_weight': [3, 5, 7],
+                'reg_alpha': [0.01, 0.1, 1],
+                'reg_lambda': [1, 2, 3]
+            }
+        # Fallback to GradientBoosting
+        return "gbr", {
+            'n_estimators': [100, 200, 300],
+            'learning_rate': [0.01, 0.03, 0.05],
+            'max_depth': [3, 4, 5],
+            'subsample': [0.7, 0.8],
+            'min_samples_leaf': [3, 5, 7]
+        }
+
+    def _key_params(self, mode, days_forward, use_macro=False):
+        model_name, param_dist = self.model_space()
+        key_params = {"model": model_name, "space": param_dist, "lags": 7, "search": "halving", "mode": mode}
+        if use_macro:
+            key_params["macro"] = True
+        if mode == "direct":
+            key_params["max_horizon"] = self._direct_bucket(days_forward)
+        return key_params
+
+    def _cache_key(self, df, fund_code, mode, days_forward, use_macro=False):
+        return self.registry.make_key(fund_code, df, self._key_params(mode, days_forward, use_macro))
+
+    def _direct_bucket(self, days_forward):
+        return next((h for h in self.DIRECT_HORIZONS if h >= days_forward), days_forward)
+
+    def train_and_predict(self, df, days_forward=30, fund_code=None, use_cache=True, category=None, mode="recursive",
+                          latency_budget=None, progress_cb=None, use_macro=False):
+        """
+        Modeli eğitir (veya önbellekten alır) ve days_forward günlük tahmin üretir.
+        mode='recursive': günlük getiri modeli, tahminler özelliklere geri beslenir.
+        mode='direct': ufuk (h) girdili tek model, log(P_t+h / P_t) hedefi; tüm yol tek predict çağrısıyla üretilir.
+        mode='tiered': latency_budget (sn) içinde kalabilecek en iyi katman seçilir (bkz. _train_tiered).
+        progress_cb(fraction, message): özellik, arama, eğitim ve tahmin aşamalarında çağrılır (arka plan işleri).
+        use_macro: özelliklere makro sütunlar eklenir (macro_store gerekir; tahminde son bilinen değerler sabit tutulur).
+        Dönüş: (tahmin tablosu, test R²); katman / önbellek bilgisi gerekiyorsa forecast() kullanılır.
+        """
+        result = self.forecast(df, days_forward, fund_code, use_cache, category, mode, latency_budget, progress_cb,
+                               use_macro)
+        return result['preds'], result['r2']
+
+    def forecast(self, df, days_forward=30, fund_code=None, use_cache=True, category=None, mode="recursive",
+                 latency_budget=None, progress_cb=None, use_macro=False):
+        """
+        train_and_predict ile aynı; sonuç bu çağrıya ait bilgilerle birlikte döner (nesnede saklanmaz, aynı
+        tahminciyi kullanan eşzamanlı işler birbirinin sonucunu ezmez).
+        Dönüş: {'preds', 'r2', 'tier': kullanılan katman, 'cache_hit': model kayıttan mı geldi,
+                'fit_seconds': bu çağrıdaki tam eğitim süresi (eğitim yapılmadıysa None)}
+        """
+        if df.empty or len(df) < 90:
+            return {"preds": None, "r2": 0, "tier": None, "cache_hit": False, "fit_seconds": None}
+        if mode not in self.MODES: raise ValueError(f"Bilinmeyen tahmin modu: {mode}")
+
+        if fund_code is None and 'FundCode' in df.columns: fund_code = df['FundCode'].iloc[0]
+        preds, r2, info = self._train_and_predict(df, days_forward, fund_code, use_cache, category, mode,
+                                                  latency_budget, progress_cb, use_macro)
+        return {"preds": preds, "r2": r2, **info}
+
+    @contextmanager
+    def _training_slot(self, progress_cb=None):
+        """
+        Eğitim (tam / sıcak başlangıç) süreç genelindeki eşzamanlılık bütçesinden bir yuvada çalışır (doluysa sırada
+        bekler). Önbellek okuma, tahmin ve hızlı katman yuva almaz; uzun eğitimlerin arkasında beklemez.
+        """
+        if progress_cb and self.budget.would_wait(): progress_cb(0.0, "Sırada bekleniyor (eşzamanlı eğitim sınırı)...")
+        with self.budget.request() as threads:
+            yield threads
+
+    def _train_and_predict(self, df, days_forward, fund_code, use_cache, category, mode, latency_budget, progress_cb,
+                           use_macro, incremental_plan=None):
+        """
+        incremental_plan: çağıranın hesapladığı _plan_incremental sonucu (katmanlı modda tekrar hesaplanmaz).
+        Dönüş: (tahmin tablosu, test R², {'tier', 'cache_hit', 'fit_seconds'})
+        """
+        if mode == "tiered":
+            return self._train_tiered(df, days_forward, fund_code, use_cache, category, latency_budget, progress_cb,
+                                      use_macro)
+        key = self._cache_key(df, fund_code, mode, days_forward, use_macro)
+
+        bundle = self.registry.get(key) if use_cache else None
+        info = {"tier": "Gradyan Artırma", "cache_hit": bundle is not None, "fit_seconds": None}
+        if bundle is not None:
+            print(f"♻️ {fund_code}: kayıtlı model kullanılıyor.")
+        else:
+            with self._training_slot(progress_cb):
+                if mode == "recursive" and self.incremental:
+                    bundle = self.warm_update(df, fund_code, use_macro, plan=incremental_plan)
+                if bundle is None:
+                    start = time.perf_counter()
+                    if mode == "direct":
+                        bundle = self.fit_direct(df, self._direct_bucket(days_forward), fund_code=fund_code,
+                                                 category=category, progress_cb=progress_cb, use_macro=use_macro)
+                    else:
+                        bundle = self.fit(df, fund_code=fund_code, category=category, progress_cb=progress_cb,
+                                          use_macro=use_macro)
+                    fit_seconds = time.perf_counter() - start
+                    self._record_fit_time(fit_seconds)
+                    if bundle is None: return None, 0, info
+                    info["fit_seconds"] = bundle['fit_seconds'] = fit_seconds  # Kayıt dizininde saklanır (sonraki oturumların süre tahmini)
+            self.registry.put(key, bundle)
+
+        if progress_cb: progress_cb(0.97, "Tahmin yolu üretiliyor...")
+        return self.predict(bundle, df, days_forward), bundle['r2'], info
+
+    # ---------------------------------------------------------
+    # SICAK BAŞLANGIÇ (ARTIMLI EĞİTİM)
+    # ---------------------------------------------------------
+    def _plan_incremental(self, df, fund_code, use_macro=False):
+        """
+        Fonun son kayıtlı modelinin yeni günlerle sürdürülüp sürdürülemeyeceği.
+        Dönüş: ({'bundle', 'data', 'new', 'z_sq'}, None) ya da (None, tam yeniden eğitim nedeni).
+        """
+        _, prev = self.registry.latest(fund_code, self._key_params("recursive", 0, use_macro))
+        if prev is None: return None, "kayıtlı model yok"
+
+        last, until = pd.Timestamp(df['Date'].max()), pd.Timestamp(prev['trained_until'])
+        if last <= until: return None, "yeni gün yok"
+        if (last - pd.Timestamp(prev['full_fit_date'])).days >= self.FULL_RETRAIN_DAYS:
+            return None, f"planlı tam eğitim ({self.FULL_RETRAIN_DAYS} gün)"
+
+        data = self.model_data(df, lags=prev['lags'], fund_code=fund_code, use_macro=use_macro)
+        if not set(prev['features']).issubset(data.columns): return None, "özellik seti değişti"
+        new = (data['Date'] > until).to_numpy()
+        if not new.any(): return None, "yeni gün yok"
+        if new.sum() > self.MAX_WARM_ROWS: return None, f"{new.sum()} yeni gün"
+
+        # Drift: son tam eğitimden beri gelen günlerin standart artıkları (z²) ortalaması eşiği aşarsa
+        X_new = prev['scaler'].transform(data.loc[new, prev['features']].to_numpy())
+        resid = data.loc[new, 'Return'].to_numpy() - prev['model'].predict(X_new)
+        z_sq = float(np.sum((resid / prev['std_error']) ** 2))
+        n_rows = prev['warm_rows'] + int(new.sum())
+        mean_z_sq = (prev['warm_z_sq'] + z_sq) / n_rows
+        if n_rows >= 5 and mean_z_sq > self.DRIFT_THRESHOLD ** 2:
+            return None, f"drift (artık RMS = {np.sqrt(mean_z_sq):.1f}σ)"
+        return {'bundle': prev, 'data': data, 'new': new, 'z_sq': z_sq}, None
+
+    def warm_update(self, df, fund_code, use_macro=False, plan=None):
+        """
+        Kayıtlı modeli yalnızca yeni günlerle sürdürür: son WARM_WINDOW satırda (yeni günler dahil) WARM_TREES ağaç eklenir
+        (XGBoost: xgb_model ile devam, GradientBoosting: warm_start). Tam yeniden eğitim gerekirse None döner.
+        plan: önceden hesaplanmış _plan_incremental sonucu ((plan, neden) çifti); verilmezse burada hesaplanır.
+        """
+        plan, reason = plan if plan is not None else self._plan_incremental(df, fund_code, use_macro)
+        if plan is None:
+            if reason != "kayıtlı model yok": print(f"🔄 {fund_code}: tam yeniden eğitim ({reason}).")
+            return None
+
+        start = time.perf_counter()
+        prev, data = plan['bundle'], plan['data']
+        window = data.iloc[-self.WARM_WINDOW:]
+        X_w = prev['scaler'].transform(window[prev['features']].to_numpy())
+        y_w = window['Return'].to_numpy()
+
+        model = prev['model']
+        if XGBOOST_AVAILABLE and isinstance(model, XGBRegressor):
+            new_model = XGBRegressor(**{**model.get_params(), 'n_estimators': self.WARM_TREES})
+            new_model.fit(X_w, y_w, xgb_model=model.get_booster())
+        else:
+            # Kayıtlı paket önbellekte de tutulduğu için kopya üzerinde devam edilir
+            new_model = copy.deepcopy(model)
+            new_model.set_params(warm_start=True, n_estimators=model.n_estimators + self.WARM_TREES)
+            new_model.fit(X_w, y_w)
+
+        n_new = int(plan['new'].sum())
+        print(f"🔁 {fund_code}: model {n_new} yeni günle güncellendi ({time.perf_counter() - start:.2f} sn).")
+        return {
+            **prev,
+            'model': new_model,
+            'trained_until': data['Date'].max(),
+            'warm_updates': prev['warm_updates'] + 1,
+            'warm_rows': prev['warm_rows'] + n_new,
+            'warm_z_sq': prev['warm_z_sq'] + plan['z_sq']
+        }
+
+    # ---------------------------------------------------------
+    # KATMANLI (TIERED) TAHMİN
+    # ---------------------------------------------------------
+    def _record_fit_time(self, seconds):
+        """Gözlenen eğitim süresinin üssel ortalaması (katman seçiminde maliyet tahmini)."""
+        with self._fit_lock:
+            self.fit_seconds = seconds if self.fit_seconds is None else 0.5 * self.fit_seconds + 0.5 * seconds
+
+    def estimated_fit_seconds(self, fund_code=None, use_macro=False):
+        """
+        Tam eğitim süresi tahmini: fonun kayıtlı son eğitim süresi (oturumlar arası), yoksa bu oturumda gözlenen
+        ortalama, o da yoksa arama bütçesi + 5 sn.
+        """
+        if fund_code:
+            persisted = self.registry.fit_seconds(fund_code, self._key_params("recursive", 0, use_macro))
+            if persisted is not None: return persisted
+        with self._fit_lock:
+            observed = self.fit_seconds
+        return observed if observed is not None else self.search_budget + 5.0
 
+    def _train_tiered(self, df, days_forward, fund_code, use_cache, category, latency_budget, progress_cb=None,
+                      use_macro=False):
+        """
+        Katman 2 (gradyan artırma): model önbellekte ise ya da tahmini eğitim süresi bütçeye sığıyorsa.
+        Katman 1 (hızlı): kapalı form modeller (sürüklenme, EWMA rastgele yürüyüş, AR, ETS), milisaniyeler içinde.
+        latency_budget=None: bütçe yok, her zaman katman 2.
+        Katman 1 yanıtından sonra gradyan artırma modeli arka planda eğitilmelidir (arayüzde JobExecutor ile);
+        eğitim kaydedilince sonraki istekler önbellekten / sıcak başlangıçla katman 2'ye geçer.
+        """
+        key = self._cache_key(df, fund_code, "recursive", days_forward, use_macro)
+        cached = use_cache and self.registry.get(key) is not None
+        # Sıcak başlangıçla güncellenebilecek model de milisaniyeler içinde hazırdır; plan warm_update'e aktarılır
+        plan = self._plan_incremental(df, fund_code, use_macro) if not cached and self.incremental else None
+        warm = plan is not None and plan[0] is not None
+        estimate = self.estimated_fit_seconds(fund_code, use_macro)
+        if cached or warm or latency_budget is None or estimate <= latency_budget:
+            return self._train_and_predict(df, days_forward, fund_code, use_cache, category, "recursive", None,
+                                           progress_cb, use_macro, incremental_plan=plan)
+
+        data = df.sort_values('Date')
+        result = FastForecaster().fit(data['Price'], horizon=days_forward)
+        print(f"⚡ {fund_code}: tahmini eğitim süresi {estimate:.1f} sn > bütçe {latency_budget} sn, "
+              f"{result['model'].name} kullanılıyor.")
+
+        mean, std = result['model'].forecast(days_forward)
+        current_price, last_date = data['Price'].iloc[-1], data['Date'].iloc[-1]
+        new_price = current_price * np.exp(mean)
+        preds = pd.DataFrame({
+            'Date': [last_date + timedelta(days=i + 1) for i in range(days_forward)],
+            'Predicted_Price': new_price,
+            'Lower_Bound': new_price * np.exp(-1.96 * std),
+            'Upper_Bound': new_price * np.exp(1.96 * std)
+        })
+        return preds, result['r2'], {"tier": f"Hızlı: {result['model'].name}", "cache_hit": False, "fit_seconds": None}
+
+    def _feature_columns(self, model_data, lags):
         # Focused feature set (Quality > Quantity)
         features = [f'Return_Lag{i}' for i in range(1, lags + 1)] + \
                    ['RSI_Lag1', 'RSI_Lag2',
@@ -113,8 +392,53 @@ class AIForecaster:
                     'MACD_Histogram_Lag1',
                     'Volatility_7d_Lag1', 'Volatility_7d_Lag2']
         
+        # Makro sütunlar (use_macro) tabloda varsa eklenir
+        features += [c for c in model_data.columns if c.startswith("Macro_")]
+
         # Filter features that exist
-        features = [f for f in features if f in model_data.columns]
+        return [f for f in features if f in model_data.columns]
+
+    def _threads(self):
+        """(arama işçisi sayısı, arama modeli iş parçacığı, son model iş parçacığı); toplam istek bütçesini aşmaz."""
+        threads = self.budget.current_threads()
+        n_jobs = self.n_jobs or threads
+        per_fit = self.model_threads or max(1, threads // max(1, n_jobs))
+        return n_jobs, per_fit, self.model_threads or threads
+
+    def _tune(self, X_train_scaled, y_values, fund_code=None, category=None, tag=None, progress_cb=None, purge=None):
+        """Ardışık yarılama araması; eğitilmemiş en iyi modeli döndürür. purge: SuccessiveHalvingSearch.fit'e bakınız."""
+        model_name, param_dist = self.model_space()
+        n_jobs, search_threads, final_threads = self._threads()
+        make_model = partial(build_model, model_name, search_threads)
+        prior_key = f"{model_name}-{tag}" if tag else model_name
+        
+        # --- HYPERPARAMETER SEARCH (Successive Halving on TimeSeriesSplit) ---
+        # Zaman sıralı katmanlar; fonun önceki en iyi parametreleri ilk adaylar arasına eklenir
+        search = SuccessiveHalvingSearch(make_model, param_dist, time_budget=self.search_budget,
+                                         priors=self.priors.get(prior_key, fund_code, category), n_jobs=n_jobs)
+        # Arama ilerlemesi toplam işin %10-%80 aralığına yansıtılır
+        search_cb = (lambda f, msg: progress_cb(0.1 + 0.7 * f, msg)) if progress_cb else None
+        result = search.fit(X_train_scaled, y_values, progress_cb=search_cb, purge=purge)
+        
+        cv_scores = result['cv_scores']
+        print(f"CV Scores: {cv_scores}")
+        print(f"Mean CV R²: {np.mean(cv_scores):.3f} ({result['n_fits']} fit, {result['elapsed']:.1f} sn)")
+        self.priors.update(prior_key, result['params'], result['score'], fund_code, category)
+        # Son eğitim tek modeldir; isteğin tüm iş parçacıkları bu modele verilir
+        return build_model(model_name, final_threads, result['params'])
+
+    def fit(self, df, lags=7, fund_code=None, category=None, progress_cb=None, use_macro=False):
+        """
+        Modeli eğitir. Dönüş paketi: model, scaler, features, std_error (test artık std), r2, lags.
+        """
+        if df.empty or len(df) < 90: return None
+
+        # Feature Prep (Optimized to 7)
+        if progress_cb: progress_cb(0.02, "Özellikler hazırlanıyor...")
+        model_data = self.model_data(df, lags=lags, fund_code=fund_code, use_macro=use_macro)
+        if model_data.empty: return None
+
+        features = self._feature_columns(model_data, lags)
         
         X = model_data[features]
         y = model_data['Return']
@@ -124,7 +448,7 @@ class AIForecaster:
         X_train, y_train = X.iloc[:split], y.iloc[:split]
         X_test, y_test = X.iloc[split:], y.iloc[split:]
         
-        if len(X_train) < 10: return None, 0
+        if len(X_train) < 10: return None
 
         # --- OUTLIER REMOVAL (More Conservative: 5σ) ---
         # Extreme outliers only (black swan events)
@@ -140,64 +464,20 @@ class AIForecaster:
         # Using raw features instead
         
         # Scaling (Keep this - important for GradientBoosting)
+        # Tahminde akış vektörleri (isimsiz dizi) ölçeklendiğinden scaler da dizi üzerinde eğitilir
         scaler_X = MinMaxScaler()
-        X_train_scaled = scaler_X.fit_transform(X_train)
-        X_test_scaled = scaler_X.transform(X_test)
-        
-        # --- MODEL SELECTION (XGBoost or GradientBoosting) ---
-        if XGBOOST_AVAILABLE:
-            # XGBoost with regularization
-            param_dist = {
-                'n_estimators': [100, 200, 300],
-                'learning_rate': [0.01, 0.03, 0.05],
-                'max_depth': [3, 4, 5],
-                'subsample': [0.7, 0.8],
-                'colsample_bytree': [0.7, 0.8],
-                'min_child_weight': [3, 5, 7],
-                'reg_alpha': [0.01, 0.1, 1],
-                'reg_lambda': [1, 2, 3]
-            }
-            model = XGBRegressor(random_state=42, tree_method='hist')
-        else:
-            # Fallback to GradientBoosting
-            param_dist = {
-                'n_estimators': [100, 200, 300],
-                'learning_rate': [0.01, 0.03, 0.05],
-                'max_depth': [3, 4, 5],
-                'subsample': [0.7, 0.8],
-                'min_samples_leaf': [3, 5, 7]
-            }
-            model = GradientBoostingRegressor(random_state=42)
-        
-        random_search = RandomizedSearchCV(model, param_distributions=param_dist, n_iter=15, cv=3, n_jobs=-1, random_state=42)
+        X_train_scaled = scaler_X.fit_transform(X_train.to_numpy())
+        X_test_scaled = scaler_X.transform(X_test.to_numpy())
         
+        # --- MODEL SELECTION + HYPERPARAMETER SEARCH ---
+        y_values = y_train.to_numpy()
         if len(X_train) > 1000:
-            sample_X = X_train_scaled[-1000:]
-            sample_y = y_train[-1000:]
-            random_search.fit(sample_X, sample_y)
+            best_model = self._tune(X_train_scaled[-1000:], y_values[-1000:], fund_code, category, progress_cb=progress_cb)
         else:
-            random_search.fit(X_train_scaled, y_train)
-            
-        best_model = random_search.best_estimator_
-        
-        # --- TIME SERIES CROSS-VALIDATION ---
-        # Get more reliable score using proper time series validation
-        from sklearn.model_selection import TimeSeriesSplit
-        tscv = TimeSeriesSplit(n_splits=3)
-        cv_scores = []
-        
-        for train_idx, val_idx in tscv.split(X_train_scaled):
-            X_tr, X_val = X_train_scaled[train_idx], X_train_scaled[val_idx]
-            y_tr, y_val = y_train.iloc[train_idx], y_train.iloc[val_idx]
-            
-            temp_model = random_search.best_estimator_
-            temp_model.fit(X_tr, y_tr)
-            cv_scores.append(temp_model.score(X_val, y_val))
-        
-        print(f"CV Scores: {cv_scores}")
-        print(f"Mean CV R²: {np.mean(cv_scores):.3f}")
+            best_model = self._tune(X_train_scaled, y_values, fund_code, category, progress_cb=progress_cb)
         
         # Final training on all training data
+        if progress_cb: progress_cb(0.85, "Son model tüm eğitim verisiyle eğitiliyor...")
         best_model.fit(X_train_scaled, y_train)
         
         # Test score
@@ -206,18 +486,148 @@ class AIForecaster:
         preds_test = best_model.predict(X_test_scaled)
         std_error = (y_test - preds_test).std()
 
+        return {
+            'model': best_model,
+            'scaler': scaler_X,
+            'features': features,
+            'std_error': std_error,
+            'r2': r2_score,
+            'lags': lags,
+            # Sıcak başlangıç kayıtları: eğitim verisinin son günü, son tam eğitim ve sonraki güncellemeler
+            'trained_until': model_data['Date'].max(),
+            'full_fit_date': model_data['Date'].max(),
+            'warm_updates': 0,
+            'warm_rows': 0,
+            'warm_z_sq': 0.0
+        }
+
+    def fit_direct(self, df, max_horizon=30, lags=7, fund_code=None, category=None, progress_cb=None, use_macro=False):
+        """
+        Doğrudan çok ufuklu model: her çıpa günü t ve ufuk h için girdi = t anındaki gecikmeli özellikler + h,
+        hedef = log(P_t+h / P_t). Artık std ufuk bazında ölçülür (özyinelemeli hata birikimi yoktur).
+        """
+        if df.empty or len(df) < 90: return None
+
+        if progress_cb: progress_cb(0.02, "Özellikler hazırlanıyor...")
+        model_data = self.model_data(df, lags=lags, fund_code=fund_code, use_macro=use_macro)
+        if len(model_data) < 30: return None
+        features = self._feature_columns(model_data, lags)
+
+        # Satır r+1'in gecikmeli özellikleri, r gününün kapanışında bilinen bilgidir (Lag1 = r günü)
+        F = model_data[features].to_numpy(dtype=float)[1:]
+        log_price = np.log(model_data['Price'].to_numpy(dtype=float))
+        n_anchor = len(F)
+        horizons = [h for h in self.DIRECT_HORIZONS if h <= max_horizon] or [max_horizon]
+
+        anchors, hs = [], []
+        for h in horizons:
+            a = np.arange(n_anchor)
+            a = a[a + h < len(log_price)]
+            anchors.append(a)
+            hs.append(np.full(len(a), h))
+        anchors, hs = np.concatenate(anchors), np.concatenate(hs)
+        if len(anchors) == 0: return None
+
+        order = np.lexsort((hs, anchors))  # zaman sıralı (TimeSeriesSplit için)
+        anchors, hs = anchors[order], hs[order]
+        X = np.column_stack([F[anchors], hs])
+        y = log_price[anchors + hs] - log_price[anchors]
+
+        # Train-Test Split: son %20 çıpa günü test. Eğitim satırının hedefi (a + h) de test penceresinden önce
+        # gerçekleşmelidir; aksi halde uzun ufuklarda test fiyatları eğitime sızar
+        split_anchor = int(n_anchor * 0.8)
+        train, test = anchors + hs < split_anchor, anchors >= split_anchor
+
+        # Arındırılmış eğitim veya test çıpası yetmeyen ufuklar düşer; model geçmişin desteklediği en uzun ufka kadar
+        # tahmin eder (bantlar doldurulmuş / eğitim artıklarından değil, ölçülen test artıklarından gelir)
+        n_train_h, n_test_h = np.bincount(hs[train], minlength=max(horizons) + 1), np.bincount(hs[test], minlength=max(horizons) + 1)
+        supported = [h for h in horizons if n_train_h[h] >= self.MIN_HORIZON_TRAIN and n_test_h[h] >= self.MIN_HORIZON_TEST]
+        if not supported: return None
+        if supported[-1] < max_horizon:
+            print(f"⚠️ Geçmiş veri en fazla {supported[-1]} günlük ufku destekliyor (istenen: {max_horizon}).")
+        keep = np.isin(hs, supported)
+        anchors, hs, X, y, train, test = anchors[keep], hs[keep], X[keep], y[keep], train[keep], test[keep]
+        horizons, max_horizon = supported, min(max_horizon, supported[-1])
+        if train.sum() < 50 or test.sum() < 10: return None
+
+        scaler_X = MinMaxScaler()
+        X_train_scaled = scaler_X.fit_transform(X[train])
+        X_test_scaled = scaler_X.transform(X[test])
+        y_train, y_test = y[train], y[test]
+
+        # Arama için son ~1000 çıpa günü; katmanlar hedef zamanına göre arındırılır
+        recent = anchors[train] >= split_anchor - 1000
+        train_anchors, train_ends = anchors[train][recent], (anchors + hs)[train][recent]
+        best_model = self._tune(X_train_scaled[recent], y_train[recent], fund_code, category, tag="direct",
+                                progress_cb=progress_cb, purge=(train_anchors, train_ends))
+        if progress_cb: progress_cb(0.85, "Son model tüm eğitim verisiyle eğitiliyor...")
+        best_model.fit(X_train_scaled, y_train)
+
+        preds_test = best_model.predict(X_test_scaled)
+        r2_score = best_model.score(X_test_scaled, y_test)
+
+        # Ufuk bazında test artık std; desteklenen ufuk noktaları arasında doğrusal enterpolasyon
+        resid = pd.Series(y_test - preds_test).groupby(hs[test]).std().reindex(horizons)
+        horizon_std = np.interp(np.arange(1, max_horizon + 1), resid.index.to_numpy(dtype=float), resid.to_numpy())
+
+        return {
+            'mode': 'direct',
+            'model': best_model,
+            'scaler': scaler_X,
+            'features': features,
+            'horizon_std': horizon_std,
+            'max_horizon': max_horizon,
+            'r2': r2_score,
+            'lags': lags
+        }
+
+    def predict(self, bundle, df, days_forward=30):
+        """Eğitilmiş paketle fiyat tahmini (Date, Predicted_Price, Lower_Bound, Upper_Bound)."""
+        if bundle.get('mode') == 'direct':
+            return self._predict_direct(bundle, df, days_forward)
+        return self._predict_recursive(bundle, df, days_forward)
+
+    def _predict_direct(self, bundle, df, days_forward=30):
+        """Tüm ufuklar tek toplu predict çağrısıyla."""
+        sim_df = df.iloc[-150:].sort_values('Date')
+        stream = StreamingFeatureGenerator(lags=bundle['lags']).warm_up(sim_df['Price'])
+        row = stream.vector(bundle['features'], include_last=True, extra=self._macro_values(bundle, df))
+        if row is None: return pd.DataFrame()
+
+        horizons = np.arange(1, min(days_forward, bundle['max_horizon']) + 1)
+        X = np.column_stack([np.repeat(row, len(horizons), axis=0), horizons])
+        pred_log = bundle['model'].predict(bundle['scaler'].transform(X))
+        sigma = bundle['horizon_std'][horizons - 1]
+
+        current_price = df['Price'].iloc[-1]
+        new_price = current_price * np.exp(pred_log)
+        return pd.DataFrame({
+            'Date': [df['Date'].max() + timedelta(days=int(h)) for h in horizons],
+            'Predicted_Price': new_price,
+            'Lower_Bound': new_price * np.exp(-1.96 * sigma),
+            'Upper_Bound': new_price * np.exp(1.96 * sigma)
+        })
+
+    def _predict_recursive(self, bundle, df, days_forward=30):
+        """Özyinelemeli fiyat tahmini."""
+        best_model, scaler_X = bundle['model'], bundle['scaler']
+        features, std_error, lags = bundle['features'], bundle['std_error'], bundle['lags']
+
         # RECURSIVE FORECAST
+        # Son 150 günlük pencere bir kez işlenir; sonraki her adım O(1) durum güncellemesidir
         future_predictions = []
-        sim_df = df.iloc[-150:].copy() 
+        sim_df = df.iloc[-150:].sort_values('Date')
+        stream = StreamingFeatureGenerator(lags=lags).warm_up(sim_df['Price'])
         current_price = df['Price'].iloc[-1]
+        last_date = df['Date'].max()
         
         cum_std = 0
+        macro = self._macro_values(bundle, df)
         
         for i in range(days_forward):
-            current_feats_df = self.prepare_features(sim_df, lags=lags)
-            if current_feats_df.empty: break
+            last_row_vals = stream.vector(features, extra=macro)
+            if last_row_vals is None: break
                 
-            last_row_vals = current_feats_df.iloc[-1][features].values.reshape(1, -1)
             # Apply Scaler -> Predict (NO POLY anymore)
             last_row_scaled = scaler_X.transform(last_row_vals)
             
@@ -229,7 +639,7 @@ class AIForecaster:
             # ln(P_t/P_{t-1}) = r  => P_t = P_{t-1} * e^r
             new_price = current_price * np.exp(pred_log_return)
             
-            new_date = df['Date'].max() + timedelta(days=i+1)
+            new_date = last_date + timedelta(days=i+1)
             
             cum_std += std_error
             # Log return hatasını fiyata yansıtmak yaklaşık olarak:
@@ -244,8 +654,7 @@ class AIForecaster:
                 'Upper_Bound': upper_bound
             })
             
-            new_row = pd.DataFrame({'Date': [new_date], 'Price': [new_price]})
-            sim_df = pd.concat([sim_df, new_row], ignore_index=True)
+            stream.push(new_price)
             current_price = new_price 
             
-        return pd.DataFrame(future_predictions), r2_score
+        return pd.DataFrame(future_predictions)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import itertools
+import numpy as np
+import pandas as pd
+
+
+class PortfolioBacktester:
+    """
+    Takvim / bant rebalanslı, işlem maliyetli portföy geri testi.
+    Tüm strateji varyantları (S adet) tek zaman döngüsünde S x N matrisleri üzerinde birlikte simüle edilir.
+
+    Strateji sözlüğü:
+        name            : Görünen ad
+        weights         : {FundCode: hedef ağırlık}
+        rebalance       : 'none' (al-tut), 'M' (aylık), 'Q' (çeyreklik), 'band' (eşik bandı)
+        band            : 'band' modunda hedeften izin verilen maksimum sapma (örn: 0.05)
+        fee_bps         : İşlem hacmi üzerinden maliyet (baz puan)
+        settlement_lag  : TEFAS valörü; t gününde verilen emir t+lag gününün fiyatıyla gerçekleşir
+    """
+
+    REBALANCE_MODES = ("none", "M", "Q", "band")
+    MODE_LABELS = {"none": "Al-Tut", "M": "Aylık", "Q": "Çeyreklik", "band": "Bant"}
+
+    def __init__(self, trading_days=252):
+        self.trading_days = trading_days
+
+    @classmethod
+    def strategy_grid(cls, weights, modes=("none", "M", "Q", "band"), fees_bps=(0,), lags=(0,), bands=(0.05,)):
+        """Mod x maliyet x valör (x bant) kombinasyonlarından strateji listesi üretir."""
+        strategies = []
+        for mode, fee, lag in itertools.product(modes, fees_bps, lags):
+            # Al-tut hiç işlem yapmaz; maliyet / valör varyantları aynı sonucu verir
+            if mode == "none" and (fee, lag) != (fees_bps[0], lags[0]): continue
+            for band in (bands if mode == "band" else (None,)):
+                label = cls.MODE_LABELS.get(mode, mode) + (f" %{band * 100:.0f}" if band else "")
+                strategies.append({
+                    "name": f"{label} | {fee}bp | T+{lag}",
+                    "weights": weights,
+                    "rebalance": mode,
+                    "band": band or 0.0,
+                    "fee_bps": fee,
+                    "settlement_lag": lag
+                })
+        return strategies
+
+    def run(self, returns, strategies, initial_capital=100000):
+        """
+        returns: Date x FundCode günlük basit getiri matrisi (eksiksiz).
+        Dönüş: {'equity': Date x strateji portföy değeri, 'summary': strateji bazında metrikler}
+        """
+        if returns.empty or not strategies: return None
+
+        funds = list(returns.columns)
+        R = returns.to_numpy(dtype=float)
+        n_days = len(R)
+        n_strat = len(strategies)
+
+        target = np.array([[s['weights'].get(f, 0) for f in funds] for s in strategies], dtype=float)
+        totals = target.sum(axis=1, keepdims=True)
+        if (totals <= 0).any(): return None
+        target = target / totals
+
+        modes = np.array([s.get('rebalance', 'none') for s in strategies])
+        bands = np.array([s.get('band', 0.0) or 0.0 for s in strategies], dtype=float)
+        fees = np.array([s.get('fee_bps', 0) for s in strategies], dtype=float) / 10000
+        lags = np.array([s.get('settlement_lag', 0) for s in strategies], dtype=int)
+
+        # Takvim sinyalleri: ayın / çeyreğin son işlem günü
+        dates = pd.DatetimeIndex(returns.index)
+        month_end = np.append(dates.month[1:] != dates.month[:-1], False)
+        quarter_end = np.append(dates.quarter[1:] != dates.quarter[:-1], False)
+        is_m, is_q, is_band = modes == "M", modes == "Q", modes == "band"
+
+        V = target * initial_capital
+        pending = np.full(n_strat, -1)
+        equity = np.empty((n_days, n_strat))
+        turnover = np.zeros(n_strat)
+        costs = np.zeros(n_strat)
+        n_rebalance = np.zeros(n_strat, dtype=int)
+
+        for t in range(n_days):
+            V *= 1 + R[t]
+            P = V.sum(axis=1)
+            w = V / P[:, None]
+
+            signal = (is_m & month_end[t]) | (is_q & quarter_end[t])
+            signal |= is_band & (np.abs(w - target).max(axis=1) > bands)
+            signal &= pending < 0
+            pending[signal] = t + lags[signal]
+
+            due = pending == t
+            if due.any():
+                trade = target[due] * P[due, None] - V[due]
+                traded = np.abs(trade).sum(axis=1)
+                cost = fees[due] * traded
+                V[due] = target[due] * (P[due] - cost)[:, None]
+                turnover[due] += traded / P[due] / 2
+                costs[due] += cost
+                n_rebalance[due] += 1
+                pending[due] = -1
+
+            equity[t] = V.sum(axis=1)
+
+        names = [s.get('name', f"Strateji {i + 1}") for i, s in enumerate(strategies)]
+        equity_df = pd.DataFrame(equity, index=returns.index, columns=names)
+        return {'equity': equity_df, 'summary': self._summarize(equity_df, initial_capital, turnover, costs, n_rebalance)}
+
+    def _summarize(self, equity_df, initial_capital, turnover, costs, n_rebalance):
+        values = equity_df.to_numpy()
+        daily = np.diff(np.vstack([np.full((1, values.shape[1]), initial_capital), values]), axis=0)
+        daily = daily / np.vstack([np.full((1, values.shape[1]), initial_capital), values[:-1]])
+
+        mean_ret = daily.mean(axis=0) * self.trading_days
+        vol = daily.std(axis=0, ddof=1) * np.sqrt(self.trading_days)
+        running_max = np.maximum.accumulate(values, axis=0)
+        years = max(len(values) / self.trading_days, 1e-9)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(vol > 0, mean_ret / vol, 0.0)
+
+        return pd.DataFrame({
+            "Toplam Getiri": values[-1] / initial_capital - 1,
+            "Yıllık Volatilite": vol,
+            "Sharpe Oranı": sharpe,
+            "Max Drawdown": ((values - running_max) / running_max).min(axis=0),
+            "Yıllık Devir (Turnover)": turnover / years,
+            "Rebalans Sayısı": n_rebalance,
+            "Toplam Maliyet": costs
+        }, index=equity_df.columns)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+
+from core.ai_forecaster import AIForecaster
+from core.model_registry import ModelRegistry
+from core.feature_store import FeatureStore
+from core.job_executor import JobCancelled
+from core.concurrency import BUDGET, init_worker, worker_budget
+
+
+def _forecast_fund(fund_code, df, days_forward, threads, registry_root, use_cache, mode="recursive", feature_root=None):
+    """Tek fon için eğitim + tahmin (süreç havuzu işçisi). BLAS / OpenMP iş parçacıkları bütçeyle sınırlanır."""
+    start = time.perf_counter()
+    with threadpool_limits(limits=threads):
+        store = FeatureStore(root=feature_root) if feature_root else None
+        forecaster = AIForecaster(registry=ModelRegistry(root=registry_root), n_jobs=1, model_threads=threads,
+                                  feature_store=store, budget=worker_budget(threads))
+        try:
+            result = forecaster.forecast(df, days_forward=days_forward, fund_code=fund_code, use_cache=use_cache,
+                                         mode=mode)
+            error = None
+        except Exception as e:
+            result, error = {"preds": None, "r2": None, "cache_hit": False}, str(e)
+    return {
+        "FundCode": fund_code,
+        "preds": result["preds"],
+        "r2": result["r2"],
+        "cached": result["cache_hit"],
+        "seconds": time.perf_counter() - start,
+        "error": error
+    }
+
+
+class BatchForecaster:
+    """
+    Birden fazla fon için paralel tahmin (sabah raporu).
+    Her fon ayrı süreçte eğitilir; işçi sayısı x işçi başına iş parçacığı eşzamanlılık bütçesindeki tek istek
+    payını aşmaz (core.concurrency), böylece XGBoost / sklearn iç paralelliği çekirdekleri aşırı doldurmaz.
+    """
+
+    def __init__(self, max_workers=None, threads_per_worker=None, registry_root=None, feature_root=None, budget=None):
+        self.budget = budget if budget is not None else BUDGET
+        # None: bütçe planından (run sırasında)
+        self.max_workers = max_workers
+        self.threads_per_worker = threads_per_worker
+        self.registry_root = registry_root or ModelRegistry().root
+        # Eğitim özellikleri fon başına diskteki hazır matristen (memmap) okunur
+        self.feature_root = feature_root or FeatureStore().root
+
+    def run(self, full_df, funds=None, days_forward=30, use_cache=True, mode="recursive", progress_cb=None):
+        """
+        Dönüş: {'forecasts': FundCode, Date, Predicted_Price, Lower_Bound, Upper_Bound (uzun tablo),
+                'timing': fon bazında süre, R², önbellek ve hata bilgisi}
+        progress_cb(fraction, message): her fon tamamlandığında çağrılır.
+        """
+        if full_df.empty: return None
+        funds = list(funds) if funds is not None else list(full_df['FundCode'].unique())
+        tasks = [(f, full_df[full_df['FundCode'] == f].sort_values('Date')) for f in funds]
+        tasks = [(f, sub) for f, sub in tasks if not sub.empty]
+        if not tasks: return None
+
+        with self.budget.pool(len(tasks), self.max_workers, self.threads_per_worker) as (n_workers, threads):
+            results = self._run_tasks(tasks, days_forward, use_cache, mode, n_workers, threads, progress_cb)
+
+        order = {f: i for i, (f, _) in enumerate(tasks)}
+        results.sort(key=lambda r: order[r["FundCode"]])
+
+        frames = []
+        for r in results:
+            if r["preds"] is not None and not r["preds"].empty:
+                frames.append(r["preds"].assign(FundCode=r["FundCode"]))
+        forecasts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if not forecasts.empty:
+            forecasts = forecasts[['FundCode', 'Date', 'Predicted_Price', 'Lower_Bound', 'Upper_Bound']]
+
+        timing = pd.DataFrame({
+            "Süre (sn)": [r["seconds"] for r in results],
+            "Test R²": [r["r2"] for r in results],
+            "Önbellek": [r["cached"] for r in results],
+            "Durum": [r["error"] or ("OK" if r["preds"] is not None else "Yetersiz veri") for r in results]
+        }, index=pd.Index([r["FundCode"] for r in results], name="FundCode"))
+
+        return {"forecasts": forecasts, "timing": timing}
+
+    def _run_tasks(self, tasks, days_forward, use_cache, mode, n_workers, threads, progress_cb):
+        results = None
+        if n_workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker, initargs=(threads,)) as pool:
+                    futures = [pool.submit(_forecast_fund, f, sub, days_forward, threads,
+                                           self.registry_root, use_cache, mode, self.feature_root) for f, sub in tasks]
+                    results = []
+                    try:
+                        for fut in as_completed(futures):
+                            results.append(fut.result())
+                            if progress_cb:
+                                progress_cb(len(results) / len(tasks), f"{results[-1]['FundCode']} tamamlandı ({len(results)}/{len(tasks)})")
+                    except JobCancelled:
+                        for fut in futures: fut.cancel()  # sırada bekleyen fonlar başlatılmaz
+                        raise
+            except JobCancelled:
+                raise
+            except Exception as e:
+                print(f"⚠️ Süreç havuzu kullanılamadı, seri tahmine geçiliyor: {e}")
+                results = None
+
+        if results is None:
+            results = []
+            for f, sub in tasks:
+                results.append(_forecast_fund(f, sub, days_forward, threads, self.registry_root, use_cache,
+                                              mode, self.feature_root))
+                if progress_cb: progress_cb(len(results) / len(tasks), f"{f} tamamlandı ({len(results)}/{len(tasks)})")
+        return results
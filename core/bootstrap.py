@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from core.concurrency import BUDGET, init_worker
+
+RISK_METRICS = ["Toplam Getiri", "Yıllık Volatilite", "Sharpe Oranı", "Sortino Oranı", "Calmar Oranı", "Max Drawdown"]
+COMPARATIVE_METRICS = ["Beta", "Alpha", "Treynor Oranı", "R-Kare (R²)", "Information Ratio"]
+
+
+def stationary_bootstrap_indices(n_obs, n_resamples, block_length, seed=None):
+    """
+    Politis-Romano durağan bootstrap indeksleri (n_resamples x n_obs).
+    Her adımda 1/block_length olasılıkla rastgele yeni blok başlar, aksi halde bir sonraki gün alınır (dairesel).
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_obs)
+    new_block = rng.random((n_resamples, n_obs)) < 1.0 / block_length
+    new_block[:, 0] = True
+    block_start = np.maximum.accumulate(np.where(new_block, t, 0), axis=1)
+    start_pos = rng.integers(0, n_obs, size=(n_resamples, n_obs))
+    start_pos = np.take_along_axis(start_pos, block_start, axis=1)
+    return ((start_pos + t - block_start) % n_obs).astype(np.int32)
+
+
+def bootstrap_metrics_chunk(returns, benchmark, indices, trading_days=252, min_overlap=20, path_dtype=np.float32):
+    """
+    Bir grup yeniden örnekleme için tüm fonların metrikleri (B x N x M).
+    returns: (T, N) fon getirileri; fonun ilk gözlemi 0, fonun olmadığı günler NaN
+    (add_financial_metrics ile aynı). benchmark: (T,) veya None.
+    Tanımlar calculate_risk_metrics / calculate_comparative_metrics ile birebir aynıdır.
+
+    Toplamsal istatistikler (ortalama, varyans, kovaryans...) sıraya bağlı olmadığından her örneklem
+    gün tekrar sayılarına (B x T) indirgenir ve tek matris çarpımıyla hesaplanır; yalnızca
+    drawdown için örneklenmiş yol oluşturulur (bellek bant genişliği için varsayılan float32).
+    """
+    n_resamples, n_obs = indices.shape
+    valid = ~np.isnan(returns)
+    Z = np.where(valid, returns, 0.0)
+    V = valid.astype(np.float64)
+    neg = V * (Z < 0)
+
+    flat = (indices + (np.arange(n_resamples) * n_obs)[:, None]).ravel()
+    C = np.bincount(flat, minlength=n_resamples * n_obs).reshape(n_resamples, n_obs).astype(np.float64)
+    ann = np.sqrt(trading_days)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n, s1, s2 = C @ V, C @ Z, C @ (Z * Z)
+        mean = s1 / n
+        vol = np.sqrt(np.maximum(s2 - s1 * mean, 0) / (n - 1)) * ann
+        annual = mean * trading_days
+        sharpe = np.where((vol > 0) & np.isfinite(vol), annual / vol, 0.0)
+
+        n_neg, s1n, s2n = C @ neg, C @ (Z * neg), C @ (Z * Z * neg)
+        down_std = np.sqrt(np.maximum(s2n - s1n * s1n / n_neg, 0) / (n_neg - 1)) * ann
+        sortino = np.where((down_std > 0) & np.isfinite(down_std), annual / down_std, 0.0)
+
+        # Fiyat yolu (log uzayında): ilk fiyat 1 kabul edilir (ilk gün getirisi 0 olduğundan orijinal seriyle aynı)
+        log_path = np.cumsum(np.log1p(Z).astype(path_dtype)[indices], axis=1)
+        peak = np.maximum(np.maximum.accumulate(log_path, axis=1), 0.0)
+        max_dd = np.expm1((log_path - peak).min(axis=1).astype(np.float64))
+        total = np.expm1(log_path[:, -1, :].astype(np.float64))
+        calmar = np.where(max_dd != 0, annual / np.abs(max_dd), 0.0)
+
+    metrics = [total, vol, sharpe, sortino, calmar, max_dd]
+
+    if benchmark is not None:
+        x = np.nan_to_num(benchmark)[:, None]
+        B = V * ~np.isnan(benchmark)[:, None]              # fon ve benchmark'ın ortak günleri
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nb = C @ B
+            sx, sy = C @ (B * x), C @ (B * Z)
+            sxx, syy, sxy = C @ (B * x * x), C @ (B * Z * Z), C @ (B * x * Z)
+            mx, my = sx / nb, sy / nb
+            cxx, cyy, cxy = sxx - sx * mx, syy - sy * my, sxy - sx * my
+
+            ok = (nb >= min_overlap) & (cxx > 0)
+            beta = np.where(ok, (cxy / (nb - 1)) / (cxx / nb), np.nan)
+            mean_fund, mean_bench = my * trading_days, mx * trading_days
+            alpha = mean_fund - beta * mean_bench
+            r_squared = np.where(ok, cxy ** 2 / (cxx * cyy), np.nan)
+            treynor = np.where(np.abs(beta) > 0.01, mean_fund / beta, np.where(ok, 0.0, np.nan))
+            tracking = np.sqrt(np.maximum(cyy + cxx - 2 * cxy, 0) / (nb - 1)) * ann
+            info_ratio = np.where(ok, np.where(tracking > 0, (mean_fund - mean_bench) / tracking, 0.0), np.nan)
+        metrics += [beta, alpha, treynor, r_squared, info_ratio]
+
+    return np.stack(metrics, axis=-1)
+
+
+class BootstrapEngine:
+    """
+    Performans metrikleri için durağan bootstrap güven aralıkları.
+    İndeks dizileri bir kez üretilir; her yeniden örneklemede tüm fonlar matris işlemleriyle birlikte
+    değerlendirilir (ortak takvim korunduğu için Beta / Alpha gibi karşılaştırmalı metrikler de tutarlıdır).
+    Parçalar isteğe bağlı olarak süreç havuzuna dağıtılır.
+    """
+
+    def __init__(self, n_resamples=5000, block_length=None, confidence=0.95, max_workers=None,
+                 max_chunk_elements=4_000_000, seed=42, trading_days=252, budget=None):
+        self.n_resamples = n_resamples
+        self.block_length = block_length
+        self.confidence = confidence
+        # None: eşzamanlılık bütçesinin süreç sınırı (core.concurrency)
+        self.max_workers = max_workers
+        self.budget = budget if budget is not None else BUDGET
+        self.max_chunk_elements = max_chunk_elements
+        self.seed = seed
+        self.trading_days = trading_days
+
+    def run(self, returns, benchmark=None):
+        """
+        returns: Date x FundCode getiri matrisi (fonun olmadığı günler NaN).
+        benchmark: aynı indekse hizalı benchmark getiri serisi (opsiyonel).
+        Dönüş: (FundCode, Metrik) indeksli; Tahmin, Alt, Üst, Std Hata sütunlu tablo.
+        """
+        if returns.empty or len(returns) < 2: return pd.DataFrame()
+
+        R = returns.to_numpy(dtype=np.float64)
+        x = None if benchmark is None else benchmark.reindex(returns.index).to_numpy(dtype=np.float64)
+        n_obs, n_funds = R.shape
+
+        block = self.block_length or max(1, int(round(n_obs ** (1 / 3))))
+        indices = stationary_bootstrap_indices(n_obs, self.n_resamples, block, self.seed)
+
+        chunk = max(1, self.max_chunk_elements // (n_obs * n_funds))
+        chunks = [indices[i:i + chunk] for i in range(0, self.n_resamples, chunk)]
+        samples = self._evaluate(R, x, chunks)
+
+        point = bootstrap_metrics_chunk(R, x, np.arange(n_obs)[None, :], self.trading_days, path_dtype=np.float64)[0]
+        alpha = (1 - self.confidence) / 2
+        with np.errstate(all='ignore'):
+            lower = np.nanquantile(samples, alpha, axis=0)
+            upper = np.nanquantile(samples, 1 - alpha, axis=0)
+            std_err = np.nanstd(samples, axis=0, ddof=1)
+
+        names = RISK_METRICS + (COMPARATIVE_METRICS if x is not None else [])
+        index = pd.MultiIndex.from_product([returns.columns, names], names=['FundCode', 'Metrik'])
+        return pd.DataFrame({
+            "Tahmin": point.ravel(),
+            "Alt": lower.ravel(),
+            "Üst": upper.ravel(),
+            "Std Hata": std_err.ravel()
+        }, index=index)
+
+    def _evaluate(self, R, x, chunks):
+        with self.budget.pool(len(chunks), self.max_workers) as (n_workers, threads):
+            return self._evaluate_chunks(R, x, chunks, n_workers, threads)
+
+    def _evaluate_chunks(self, R, x, chunks, n_workers, threads):
+        results = None
+        if n_workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker, initargs=(threads,)) as pool:
+                    futures = [pool.submit(bootstrap_metrics_chunk, R, x, idx, self.trading_days) for idx in chunks]
+                    results = [f.result() for f in futures]
+            except Exception as e:
+                print(f"⚠️ Süreç havuzu kullanılamadı, seri hesaba geçiliyor: {e}")
+                results = None
+
+        if results is None:
+            results = [bootstrap_metrics_chunk(R, x, idx, self.trading_days) for idx in chunks]
+        return np.concatenate(results, axis=0)
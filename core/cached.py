@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Streamlit önbellek katmanı.
+cache_resource: oturumlar ve arka plan işleri arasında paylaşılan ağır tekil nesneler (işlemci, depolar, model kaydı,
+                tarayıcı); iç önbellekleri ve fon bazlı yazımları kilitlidir.
+cache_data    : veri çekimleri ve türetilmiş tablolar; girdilerin içeriğine göre anahtarlanır, TTL ile sınırlanır.
+Aynı girdilerle yeniden çalıştırmada hesap yapılmaz. '_' ile başlayan parametreler anahtara girmez.
+"""
+import pandas as pd
+import streamlit as st
+
+from core.processor import DataProcessor
+from core.price_store import PriceStore
+from core.feature_store import FeatureStore
+from core.macro_features import MacroFeatureStore
+from core.model_registry import ModelRegistry
+from core.screener import FundScreener
+
+# Süreler (sn): dış kaynaklı veriler gün içinde güncellenir, türetilmiş tablolar yalnızca bellek için sınırlanır
+FETCH_TTL = 3600
+INFLATION_TTL = 6 * 3600
+DERIVED_TTL = 3600
+MAX_ENTRIES = 64
+
+
+# ---------------------------------------------------------
+# TEKİL NESNELER (cache_resource)
+# ---------------------------------------------------------
+@st.cache_resource
+def get_processor():
+    return DataProcessor()
+
+
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+
+@st.cache_resource
+def get_feature_store():
+    return FeatureStore()
+
+
+@st.cache_resource
+def get_macro_store():
+    return MacroFeatureStore()
+
+
+@st.cache_resource
+def get_model_registry():
+    """Eğitilmiş modeller (bellek içi LRU + disk) tüm oturumlarca paylaşılır."""
+    return ModelRegistry()
+
+
+@st.cache_resource
+def get_screener():
+    return FundScreener(get_price_store(), get_processor())
+
+
+# ---------------------------------------------------------
+# VERİ ÇEKİMLERİ (cache_data)
+# ---------------------------------------------------------
+class LazyTefasFetcher:
+    """Tarayıcı yalnızca önbellekte olmayan ilk fon istendiğinde açılır (tümü önbellekteyse hiç açılmaz)."""
+
+    def __init__(self):
+        self._fetcher = None
+
+    def get(self):
+        if self._fetcher is None:
+            from core.tefas_fetcher import TefasFetcher
+            self._fetcher = TefasFetcher()
+        return self._fetcher
+
+    def close(self):
+        if self._fetcher is not None: self._fetcher.close()
+        self._fetcher = None
+
+
+def fetch_fund(fund_code, start_date, end_date, fetcher):
+    """
+    TEFAS'tan fon geçmişi: temizlenir, fiyat ve özellik depolarına yazılır, finansal metrikler eklenir.
+    Anahtar: (fon, başlangıç, bitiş günü). Boş sonuçlar önbellekte tutulmaz (sonraki denemede yeniden çekilir).
+    """
+    df = _fetch_fund(fund_code, start_date, end_date, fetcher)
+    if df.empty: _fetch_fund.clear(fund_code, start_date, end_date, fetcher)
+    return df
+
+
+@st.cache_data(ttl=FETCH_TTL, max_entries=256, show_spinner=False)
+def _fetch_fund(fund_code, start_date, end_date, _fetcher):
+    df = _fetcher.get().fetch_data(fund_code, start_date, end_date)
+    if df.empty: return pd.DataFrame()
+    processor = get_processor()
+    clean = processor.clean_data(df)
+    clean['FundCode'] = fund_code
+    get_price_store().save(fund_code, clean)  # Tarayıcı için yerel depoya da yaz
+    get_feature_store().update(fund_code, get_price_store().load(fund_code))  # Yalnızca yeni günlerin özellikleri eklenir
+    return processor.add_financial_metrics(clean)
+
+
+def fetch_inflation(start_date=None, end_date=None, api_key=None):
+    df = _fetch_inflation(start_date, end_date, api_key)
+    if df.empty: _fetch_inflation.clear(start_date, end_date, api_key)
+    return df
+
+
+@st.cache_data(ttl=INFLATION_TTL, max_entries=16, show_spinner=False)
+def _fetch_inflation(start_date=None, end_date=None, api_key=None):
+    from core.inflation_fetcher import InflationFetcher
+    return InflationFetcher(api_key).fetch_inflation_data(start_date, end_date)
+
+
+# ---------------------------------------------------------
+# TÜRETİLMİŞ TABLOLAR (cache_data)
+# ---------------------------------------------------------
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def normalized_panel(df):
+    return get_processor().normalize_for_comparison(df)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def metrics_table(df, benchmark_df=None, skip=None):
+    """Fon bazında risk metrikleri (+ benchmark varsa karşılaştırmalı metrikler); indeks 'Fon'."""
+    processor = get_processor()
+    rows = []
+    for f in df['FundCode'].unique():
+        if f == skip: continue
+        sub = df[df['FundCode'] == f]
+        m = processor.calculate_risk_metrics(sub)
+        if not m: continue
+        if benchmark_df is not None and not benchmark_df.empty:
+            m.update(processor.calculate_comparative_metrics(sub, benchmark_df))
+        m['Fon'] = f
+        rows.append(m)
+    return pd.DataFrame(rows).set_index("Fon") if rows else pd.DataFrame()
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def correlation_matrix(df, method="sample"):
+    return get_processor().calculate_correlation_matrix(df, method=method)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def drawdown_panel(df):
+    return get_processor().calculate_drawdown_panel(df)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def drawdown_episodes(df):
+    return get_processor().calculate_drawdown_episodes(df)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def efficient_frontier(df, funds, bounds):
+    return get_processor().calculate_efficient_frontier(df, list(funds), bounds=bounds)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def optimal_portfolios(df, funds, objectives, bounds):
+    return get_processor().calculate_optimal_portfolios(df, list(funds), tuple(objectives), bounds=bounds)
+
+
+@st.cache_data(ttl=DERIVED_TTL, max_entries=MAX_ENTRIES, show_spinner=False)
+def returns_matrix(df, funds):
+    """Simülasyonun ortak tarihli getiri matrisi; ağırlık değişimleri bu matris üzerinden hesaplanır."""
+    return get_processor().portfolio_returns_matrix(df, list(funds))
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_limits
+
+
+def _env_int(name, default):
+    try:
+        value = int(os.environ.get(name, ""))
+        return value if value > 0 else default
+    except ValueError:
+        return default
+
+
+class ConcurrencyBudget:
+    """
+    Süreç genelinde iş parçacığı / süreç bütçesi (tüm Streamlit oturumları ortak kullanır).
+
+    total_threads : süreçteki ağır işlerin toplam iş parçacığı üst sınırı (FADES_MAX_THREADS, varsayılan çekirdek sayısı)
+    max_requests  : aynı anda çalışabilecek ağır istek sayısı (FADES_MAX_REQUESTS, varsayılan 2); fazlası sırada bekler
+    request_threads: istek başına iş parçacığı = total_threads / max_requests (FADES_REQUEST_THREADS ile değiştirilebilir)
+    max_processes : süreç havuzlarının işçi üst sınırı (FADES_MAX_PROCESSES, varsayılan min(4, çekirdek - 1))
+
+    İstekler request() bağlamında çalışır: yuva alınır, BLAS / OpenMP havuzları istek bütçesiyle sınırlanır ve
+    döndürülen iş parçacığı sayısı arama paralelliği (n_jobs) ile XGBoost iş parçacıklarına paylaştırılır.
+    Süreç havuzu kullanan işler pool() ile işçi sayısı x işçi başına iş parçacığını aynı istek bütçesine sığdırır;
+    böylece toplam iş parçacığı max_requests x request_threads <= total_threads kalır.
+    """
+
+    def __init__(self, total_threads=None, max_requests=None, request_threads=None, max_processes=None):
+        cpu = os.cpu_count() or 1
+        self.total_threads = total_threads or _env_int("FADES_MAX_THREADS", cpu)
+        self.max_requests = max_requests or _env_int("FADES_MAX_REQUESTS", 2)
+        self.request_threads = min(self.total_threads, request_threads or _env_int(
+            "FADES_REQUEST_THREADS", max(1, self.total_threads // self.max_requests)))
+        self.max_processes = max_processes or _env_int("FADES_MAX_PROCESSES", max(1, min(4, cpu - 1)))
+        self._slots = threading.BoundedSemaphore(self.max_requests)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._limiter = None
+
+    @property
+    def active(self):
+        """Şu anda çalışan ağır istek sayısı."""
+        return self._active
+
+    @property
+    def busy(self):
+        """Tüm yuvalar dolu mu (yeni istek sırada bekleyecek)."""
+        return self._active >= self.max_requests
+
+    def would_wait(self):
+        """Çağıran iş parçacığının yeni bir isteği sırada bekleyecek mi (iç içe çağrılar beklemez)."""
+        return getattr(self._local, "depth", 0) == 0 and self.busy
+
+    def current_threads(self):
+        """Çağıran iş parçacığı bir istek içindeyse onun bütçesi, değilse istek başına bütçe."""
+        return getattr(self._local, "threads", None) or self.request_threads
+
+    @contextmanager
+    def request(self, threads=None):
+        """
+        Ağır istek yuvası. Aynı iş parçacığında iç içe çağrılar yeni yuva almaz (ör. katmanlı -> özyinelemeli).
+        Dönüş: bu isteğin kullanabileceği iş parçacığı sayısı.
+        """
+        if getattr(self._local, "depth", 0) > 0:
+            self._local.depth += 1
+            try:
+                yield self._local.threads
+            finally:
+                self._local.depth -= 1
+            return
+
+        threads = max(1, min(threads or self.request_threads, self.request_threads))
+        self._slots.acquire()
+        self._enter()
+        self._local.depth, self._local.threads = 1, threads
+        try:
+            yield threads
+        finally:
+            self._local.depth, self._local.threads = 0, None
+            self._exit()
+            self._slots.release()
+
+    def _enter(self):
+        # threadpoolctl sınırı süreç geneldir: ilk istek koyar, son istek kaldırır (tüm istekler aynı sınırı paylaşır)
+        with self._lock:
+            self._active += 1
+            if self._limiter is None:
+                self._limiter = threadpool_limits(limits=self.request_threads)
+
+    def _exit(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0 and self._limiter is not None:
+                self._limiter.restore_original_limits()
+                self._limiter = None
+
+    def plan(self, n_tasks, max_workers=None, threads_per_worker=None, threads=None):
+        """
+        Süreç havuzu planı: (işçi sayısı, işçi başına iş parçacığı), işçi x iş parçacığı <= threads (istek bütçesi).
+        max_workers verilmezse max_processes kullanılır.
+        """
+        threads = threads or self.current_threads()
+        workers = max(1, min(max_workers or self.max_processes, n_tasks, threads))
+        per_worker = max(1, threads // workers)
+        return workers, max(1, min(threads_per_worker or per_worker, per_worker))
+
+    @contextmanager
+    def pool(self, n_tasks, max_workers=None, threads_per_worker=None):
+        """
+        Süreç havuzu kullanan işler için istek yuvası + plan. Havuz çalışırken diğer ağır istekler
+        yuva bekler; dönüş: (işçi sayısı, işçi başına iş parçacığı).
+        """
+        with self.request() as threads:
+            yield self.plan(n_tasks, max_workers, threads_per_worker, threads)
+
+
+# Süreç genelinde tek bütçe (ortam değişkenlerinden)
+BUDGET = ConcurrencyBudget()
+
+
+def init_worker(threads):
+    """ProcessPoolExecutor initializer'ı: işçi sürecinin BLAS / OpenMP iş parçacıklarını plan bütçesiyle sınırlar."""
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    threadpool_limits(limits=threads)
+
+
+def worker_budget(threads):
+    """
+    Süreç havuzu işçisindeki AIForecaster için ayrı bütçe (tek istek, plan kadar iş parçacığı).
+    fork ile kopyalanan üst süreç semaforu işçide kullanılmaz.
+    """
+    return ConcurrencyBudget(total_threads=threads, max_requests=1, max_processes=1)
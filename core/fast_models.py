@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ---------------------------------------------------------
+# KAPALI FORM HIZLI MODELLER (günlük log getiri üzerinde)
+# Her model: fit(r) -> self, forecast(h) -> (kümülatif log getiri ortalaması, std) [h uzunluğunda],
+#            predict_returns(r) -> her t için r[:t] ile r[t]'nin bir adım tahmini (holdout skoru için)
+# ---------------------------------------------------------
+class DriftModel:
+    """Sabit sürüklenmeli rastgele yürüyüş: ortalama log getiri, std sqrt(h) ile büyür."""
+    name = "Sürüklenme"
+
+    def fit(self, r):
+        self.mu, self.sigma = float(np.mean(r)), float(np.std(r, ddof=1))
+        return self
+
+    def forecast(self, h):
+        steps = np.arange(1, h + 1)
+        return self.mu * steps, self.sigma * np.sqrt(steps)
+
+    def predict_returns(self, r):
+        return np.full(len(r), self.mu)
+
+
+class EWMARandomWalk:
+    """Sürüklenmesiz rastgele yürüyüş; oynaklık RiskMetrics EWMA (lambda = 0.94) ile güncel tutulur."""
+    name = "EWMA Rastgele Yürüyüş"
+
+    def __init__(self, lam=0.94):
+        self.lam = lam
+
+    def fit(self, r):
+        r = np.asarray(r, dtype=float)
+        weights = (1 - self.lam) * self.lam ** np.arange(len(r))[::-1]
+        self.sigma = float(np.sqrt(np.sum(weights * r ** 2) / weights.sum()))
+        return self
+
+    def forecast(self, h):
+        steps = np.arange(1, h + 1)
+        return np.zeros(h), self.sigma * np.sqrt(steps)
+
+    def predict_returns(self, r):
+        return np.zeros(len(r))
+
+
+class ARModel:
+    """AR(p) + sabit, en küçük kareler (gecikme matrisi sliding_window_view ile tek seferde). Belirsizlik psi ağırlıklarıyla."""
+
+    def __init__(self, p=5):
+        self.p = p
+        self.name = f"AR({p})"
+
+    def _design(self, r):
+        lags = sliding_window_view(r, self.p)[:-1][:, ::-1]  # satır t: r[t-1], ..., r[t-p]
+        return np.column_stack([np.ones(len(lags)), lags])
+
+    def fit(self, r):
+        r = np.asarray(r, dtype=float)
+        X, y = self._design(r), r[self.p:]
+        self.coef = np.linalg.lstsq(X, y, rcond=None)[0]
+        resid = y - X @ self.coef
+        self.sigma = float(np.std(resid, ddof=X.shape[1]))
+        self.mu = float(np.mean(r))
+        self._tail = r[-self.p:][::-1].copy()
+        return self
+
+    def forecast(self, h):
+        c, phi = self.coef[0], self.coef[1:]
+        state, means = list(self._tail), np.empty(h)
+        for i in range(h):
+            means[i] = c + np.dot(phi, state[:self.p])
+            state.insert(0, means[i])
+        # Kümülatif getiri hatası: sum_k e_{t+k}, katsayılar psi'lerin kümülatif toplamı
+        psi = np.zeros(h)
+        psi[0] = 1.0
+        for j in range(1, h):
+            k = min(j, self.p)
+            psi[j] = np.dot(phi[:k], psi[j - 1::-1][:k])
+        cum_psi = np.cumsum(psi)
+        return np.cumsum(means), self.sigma * np.sqrt(np.cumsum(cum_psi ** 2))
+
+    def predict_returns(self, r):
+        out = np.full(len(r), self.mu)
+        if len(r) > self.p: out[self.p:] = self._design(np.asarray(r, dtype=float)) @ self.coef
+        return out
+
+
+class HoltETS:
+    """
+    Toplamsal trendli üstel düzeltme (Holt) log fiyat üzerinde. (alpha, beta) ızgarası SSE'ye göre seçilir;
+    filtre zaman üzerinde döner, tüm ızgara noktaları tek numpy vektörüyle birlikte güncellenir.
+    """
+    name = "ETS (Holt)"
+
+    def __init__(self, alphas=np.linspace(0.05, 1.0, 12), betas=(0.0, 0.01, 0.02, 0.05, 0.1, 0.2, 0.3)):
+        self.alphas, self.betas = alphas, betas
+
+    @staticmethod
+    def _filter(y, alpha, beta):
+        """Tüm (alpha, beta) çiftleri için bir adım hatalar; dönüş (hatalar (T-1, G), son düzey, son trend)."""
+        level = np.full(alpha.shape, y[0])
+        trend = np.full(alpha.shape, y[1] - y[0] if len(y) > 1 else 0.0)
+        errors = np.empty((len(y) - 1,) + alpha.shape)
+        for t in range(1, len(y)):
+            forecast = level + trend
+            e = y[t] - forecast
+            errors[t - 1] = e
+            level = forecast + alpha * e
+            trend = trend + alpha * beta * e
+        return errors, level, trend
+
+    def fit(self, r):
+        r = np.asarray(r, dtype=float)
+        y = np.concatenate([[0.0], np.cumsum(r)])
+        a, b = np.meshgrid(self.alphas, self.betas, indexing='ij')
+        a, b = a.ravel(), b.ravel()
+        errors, level, trend = self._filter(y, a, b)
+        best = int(np.argmin(np.sum(errors[2:] ** 2, axis=0)))
+        self.alpha, self.beta = float(a[best]), float(b[best])
+        self.level, self.trend = float(level[best]), float(trend[best])
+        self.last = float(y[-1])
+        self.sigma = float(np.std(errors[2:, best], ddof=2))
+        return self
+
+    def forecast(self, h):
+        steps = np.arange(1, h + 1)
+        means = self.level + steps * self.trend - self.last
+        coef = self.alpha * (1 + np.arange(1, h) * self.beta)
+        var = np.concatenate([[1.0], 1.0 + np.cumsum(coef ** 2)])
+        return means, self.sigma * np.sqrt(var)
+
+    def predict_returns(self, r):
+        r = np.asarray(r, dtype=float)
+        y = np.concatenate([[0.0], np.cumsum(r)])
+        errors, _, _ = self._filter(y, np.array([self.alpha]), np.array([self.beta]))
+        return r - errors[:, 0]
+
+
+FAST_MODELS = (DriftModel, EWMARandomWalk, ARModel, HoltETS)
+
+
+class FastForecaster:
+    """
+    Hızlı katman: kapalı form modeller (milisaniyeler). Son %20'lik bölümde birkaç başlangıç noktasından
+    ufuk getirisi hatasıyla (MAE) en iyi model seçilir, ardından tüm veriyle yeniden kurulur.
+    """
+
+    def __init__(self, models=FAST_MODELS, max_history=750, n_origins=6):
+        self.models = models
+        self.max_history = max_history
+        self.n_origins = n_origins
+
+    def fit(self, prices, horizon=30):
+        """Dönüş: {'model': seçilen model, 'scores': {isim: MAE}, 'r2': bir adım holdout R²}"""
+        p = np.asarray(prices, dtype=float)[-(self.max_history + 1):]
+        r = np.diff(np.log(p))
+        split = int(len(r) * 0.8)
+        h = max(1, min(horizon, (len(r) - split) // 2))
+        origins = np.unique(np.linspace(split, len(r) - h, self.n_origins).astype(int))
+
+        scores, fitted = {}, {}
+        for cls in self.models:
+            errors = []
+            for o in origins:
+                mean, _ = cls().fit(r[:o]).forecast(h)
+                errors.append(abs(mean[-1] - r[o:o + h].sum()))
+            model = cls()
+            scores[model.name] = float(np.mean(errors))
+            fitted[model.name] = model
+
+        best = min(scores, key=scores.get)
+        holdout = fitted[best].fit(r[:split]).predict_returns(r)[split:]
+        actual = r[split:]
+        ss_tot = np.sum((actual - actual.mean()) ** 2)
+        r2 = 1 - np.sum((actual - holdout) ** 2) / ss_tot if ss_tot > 0 else 0.0
+        return {'model': fitted[best].fit(r), 'scores': scores, 'r2': float(r2)}
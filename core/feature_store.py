@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+from core.price_store import DATA_DIR
+from core.indicators import IndicatorEngine
+from core.feature_stream import StreamingFeatureGenerator
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    HAS_FCNTL = False
+
+
+class FeatureStore:
+    """
+    Tahminci girdilerinin kalıcı deposu (data/features).
+    Her fon için:
+        <KOD>.f64        : satır = gün, sütun = COLUMNS (float64, yalnızca sona eklenir; tahmindeki akış
+                           üreticisiyle aynı hassasiyet)
+        <KOD>.dates      : satır tarihleri (int64 ns, yalnızca sona eklenir)
+        <KOD>.meta.json  : sütunlar, satır sayısı, son tarih / fiyat ve akış (StreamingFeatureGenerator) durumu
+    İlk kurulumda tüm geçmiş IndicatorEngine ile vektörel hesaplanır; yeni günler akış durumundan
+    gün başına O(1) eklenir, geçmiş yeniden hesaplanmaz. Okuma np.memmap ile diskten kopyasız yapılır.
+    Satırlar prepare_features ile aynı sütunları taşır; yetersiz geçmişli satırlar NaN içerir (okurken elenir).
+    Depo oturumlar ve toplu tahmin süreçleri arasında paylaşılır: aynı fonun güncelleme ve okumaları fon bazlı
+    iş parçacığı kilidi + dosya kilidiyle (<KOD>.lock, fcntl) sıralanır; meta en son, atomik değiştirmeyle yazılır.
+    """
+
+    INDICATORS = ['RSI', 'MACD', 'MACD_Histogram', 'Volatility_7d']
+    DTYPE = np.float64
+
+    def __init__(self, root=None, lags=7, indicator_lags=2):
+        self.root = root or os.path.join(DATA_DIR, "features")
+        self.lags = lags
+        self.indicator_lags = indicator_lags
+        self.columns = ['Price', 'Return'] + self.INDICATORS + \
+                       [f'Return_Lag{i}' for i in range(1, lags + 1)] + \
+                       [f'{c}_Lag{i}' for c in self.INDICATORS for i in range(1, indicator_lags + 1)]
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock(self, fund_code):
+        with self._locks_guard:
+            return self._locks.setdefault(str(fund_code).upper(), threading.Lock())
+
+    def _base(self, fund_code):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9_-]", "_", str(fund_code).upper()))
+
+    def _paths(self, fund_code):
+        base = self._base(fund_code)
+        return f"{base}.f64", f"{base}.dates", f"{base}.meta.json"
+
+    @contextmanager
+    def _locked(self, fund_code):
+        """Fon bazlı kilit: süreç içinde iş parçacıkları, süreçler arasında (toplu tahmin işçileri) dosya kilidi."""
+        with self._lock(fund_code):
+            with open(f"{self._base(fund_code)}.lock", "a") as lock_file:
+                if HAS_FCNTL: fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if HAS_FCNTL: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _meta(self, fund_code):
+        try:
+            with open(self._paths(fund_code)[2], encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Eski (float32 / farklı sütunlu) depolar yeniden kurulur
+        return meta if meta.get('columns') == self.columns and meta.get('dtype') == np.dtype(self.DTYPE).name else None
+
+    def _write_meta(self, fund_code, meta):
+        path = self._paths(fund_code)[2]
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path), suffix=".tmp", dir=self.root)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+
+    # ---------------------------------------------------------
+    # YAZMA
+    # ---------------------------------------------------------
+    def _history_matrix(self, prices):
+        """Tüm geçmiş için özellik matrisi (prepare_features ile aynı tanımlar, dropna yapılmadan)."""
+        ind = IndicatorEngine(dtype=np.float64).compute(prices, ['Return'] + self.INDICATORS)
+        cols = {'Price': prices, **ind}
+
+        def lag(x, i):
+            out = np.full(len(x), np.nan)
+            out[i:] = x[:-i]
+            return out
+
+        for i in range(1, self.lags + 1):
+            cols[f'Return_Lag{i}'] = lag(ind['Return'], i)
+        for c in self.INDICATORS:
+            for i in range(1, self.indicator_lags + 1):
+                cols[f'{c}_Lag{i}'] = lag(ind[c], i)
+        return np.column_stack([cols[c] for c in self.columns])
+
+    def _append(self, fund_code, meta, dates, matrix, stream):
+        data_path, dates_path, meta_path = self._paths(fund_code)
+        n_old = meta['n_rows'] if meta else 0
+        mode = "r+b" if meta else "wb"
+        # Yeniden kurulumda eski meta önce silinir: yazım yarıda kalırsa kırpılmış dosyalar eski meta ile okunmaz
+        if meta is None and os.path.exists(meta_path): os.remove(meta_path)
+        # Yarım kalmış önceki yazımlar meta'daki satır sayısına kırpılır, sonra yeni satırlar eklenir
+        for path, values, width in ((data_path, matrix.astype(self.DTYPE), np.dtype(self.DTYPE).itemsize * len(self.columns)),
+                                    (dates_path, dates.astype('datetime64[ns]').view(np.int64), 8)):
+            with open(path, mode if os.path.exists(path) else "wb") as f:
+                f.truncate(n_old * width)
+                f.seek(n_old * width)
+                f.write(np.ascontiguousarray(values).tobytes())
+
+        self._write_meta(fund_code, {
+            'columns': self.columns,
+            'dtype': np.dtype(self.DTYPE).name,
+            'n_rows': n_old + len(matrix),
+            'first_date': str(meta['first_date'] if meta else pd.Timestamp(dates[0])),
+            'last_date': str(pd.Timestamp(dates[-1])),
+            'last_price': float(stream.last_price),
+            'stream': stream.state()
+        })
+
+    def update(self, fund_code, df):
+        """
+        Fonun fiyat geçmişini (Date, Price) depoyla eşitler. Depodaki son tarihten sonraki günler eklenir;
+        depodaki geçmişin bir alt aralığı (seçili tarih penceresi) değişiklik yapmaz.
+        Depo yoksa, geçmiş depodan daha eskiye uzanıyorsa ya da kayıtlı bir günün fiyatı değişmişse yeniden kurulur.
+        Dönüş: eklenen satır sayısı.
+        """
+        if df.empty or 'Price' not in df.columns: return 0
+        with self._locked(fund_code):
+            return self._update(fund_code, df)
+
+    def _consistent(self, fund_code, meta, dates, prices):
+        """Tablonun depodaki geçmişle örtüşen günleri depoda var ve fiyatları aynı mı (alt aralıklar tutarlıdır)."""
+        if dates[0] < np.datetime64(pd.Timestamp(meta['first_date']), 'ns'): return False
+        stored_dates, matrix = self.load(fund_code)
+        if stored_dates is None: return False
+        overlap = dates <= stored_dates[-1]
+        idx = np.searchsorted(stored_dates, dates[overlap])
+        if (idx >= len(stored_dates)).any() or (stored_dates[idx] != dates[overlap]).any(): return False
+        stored_prices = matrix[idx, self.columns.index('Price')]
+        return bool(np.allclose(prices[overlap], stored_prices, rtol=1e-10, atol=0))
+
+    def _update(self, fund_code, df):
+        data = df[['Date', 'Price']].dropna().drop_duplicates('Date', keep='last').sort_values('Date')
+        dates = pd.to_datetime(data['Date']).to_numpy(dtype='datetime64[ns]')
+        prices = data['Price'].to_numpy(dtype=np.float64)
+        if len(prices) == 0: return 0
+
+        meta = self._meta(fund_code)
+        if meta is not None and not self._consistent(fund_code, meta, dates, prices): meta = None
+
+        if meta is None:
+            stream = StreamingFeatureGenerator.from_history(prices, lags=self.lags, indicator_lags=self.indicator_lags)
+            self._append(fund_code, None, dates, self._history_matrix(prices), stream)
+            return len(prices)
+
+        last_date = np.datetime64(pd.Timestamp(meta['last_date']), 'ns')
+        new = dates > last_date
+        if not new.any(): return 0
+        if not (dates == last_date).any():
+            # Yeni günler depodaki son günle bitişik değil (aradaki günler eksik): akış sürdürülemez, depo korunur
+            print(f"⚠️ {fund_code}: özellik deposu {str(last_date)[:10]} sonrasıyla bitişik olmayan tabloyla güncellenmedi.")
+            return 0
+
+        # Yeni günler: akış durumundan gün başına O(1)
+        stream = StreamingFeatureGenerator.from_state(meta['stream'])
+        rows = []
+        for price in prices[new]:
+            stream.push(price)
+            lags = stream.features() or {}
+            row = {'Price': price, **stream.current(), **lags}
+            rows.append([row.get(c, np.nan) for c in self.columns])
+        self._append(fund_code, meta, dates[new], np.array(rows, dtype=np.float64), stream)
+        return int(new.sum())
+
+    def sync(self, price_store, fund_codes=None):
+        """Fiyat deposundaki (veya istenen) fonları artımlı günceller. Dönüş: {FundCode: eklenen satır}."""
+        out = {}
+        for code in (fund_codes if fund_codes is not None else price_store.list_funds()):
+            try:
+                out[code] = self.update(code, price_store.load(code))
+            except Exception as e:
+                print(f"⚠️ {code} özellikleri güncellenemedi: {e}")
+        return out
+
+    # ---------------------------------------------------------
+    # OKUMA (memmap)
+    # ---------------------------------------------------------
+    def load(self, fund_code):
+        """Dönüş: (tarihler datetime64[ns], (n, len(columns)) salt okunur float64 memmap) veya (None, None)."""
+        meta = self._meta(fund_code)
+        if meta is None or meta['n_rows'] == 0: return None, None
+        data_path, dates_path, _ = self._paths(fund_code)
+        n, k = meta['n_rows'], len(self.columns)
+        matrix = np.memmap(data_path, dtype=self.DTYPE, mode='r', shape=(n, k))
+        dates = np.memmap(dates_path, dtype=np.int64, mode='r', shape=(n,)).view('datetime64[ns]')
+        return dates, matrix
+
+    def frame(self, fund_code, start=None, end=None, dropna=True):
+        """prepare_features biçiminde tablo (Date + COLUMNS), isteğe bağlı tarih aralığıyla (memmap'ten kopya)."""
+        with self._locked(fund_code):
+            return self._frame(fund_code, start, end, dropna)
+
+    def _frame(self, fund_code, start, end, dropna):
+        dates, matrix = self.load(fund_code)
+        if dates is None: return pd.DataFrame()
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        values = matrix[lo:hi]
+        if dropna:
+            keep = ~np.isnan(values).any(axis=1)
+            values, row_dates = values[keep], dates[lo:hi][keep]
+        else:
+            row_dates = dates[lo:hi]
+        # Kilit bırakıldıktan sonra yeniden kurulumda dosya kırpılabilir: memmap'e bağlı görünüm döndürülmez
+        data = pd.DataFrame(np.array(values), columns=self.columns)
+        data.insert(0, 'Date', pd.to_datetime(np.array(row_dates)))
+        return data
+
+    def clear(self, fund_code=None):
+        codes = [fund_code] if fund_code else {os.path.basename(p).split('.')[0] for p in os.listdir(self.root)}
+        for code in codes:
+            with self._locked(code):
+                for path in self._paths(code):
+                    if os.path.exists(path): os.remove(path)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+from collections import deque
+
+
+class StreamingFeatureGenerator:
+    """
+    AIForecaster.prepare_features'ın son satırını adım adım (O(1)) üreten durum makinesi.
+    Özyinelemeli tahminde her yeni fiyat için tüm indikatörleri baştan hesaplamak yerine
+    EMA durumları, RSI kazanç/kayıp pencereleri, oynaklık penceresi ve gecikme halka tamponları güncellenir.
+
+    Tanımlar calculate_technical_indicators ile aynıdır:
+        EMA_12 / EMA_26 / MACD sinyali (adjust=False, pencerenin ilk fiyatıyla başlar),
+        RSI = 14 günlük basit ortalama kazanç / kayıp, Volatility_7d = 7 günlük fiyat std (ddof=1).
+    features() çıktısı prepare_features(df).iloc[-1] ile aynıdır: gecikmeler son satırın kendisini içermez.
+    """
+
+    INDICATORS = ('RSI', 'MACD', 'MACD_Histogram', 'Volatility_7d')
+
+    def __init__(self, lags=7, indicator_lags=2, rsi_window=14, vol_window=7):
+        self.lags = lags
+        self.indicator_lags = indicator_lags
+        self.rsi_window = rsi_window
+        self.vol_window = vol_window
+
+        self._alpha12, self._alpha26, self._alpha9 = 2 / 13, 2 / 27, 2 / 10
+        self.ema12 = self.ema26 = self.signal = None
+        self.last_price = None
+        self.n_obs = 0
+
+        self._gains = deque(maxlen=rsi_window)
+        self._losses = deque(maxlen=rsi_window)
+        self._prices = deque(maxlen=vol_window)
+        self._returns = deque(maxlen=lags + 1)
+        self._history = {k: deque(maxlen=indicator_lags + 1) for k in self.INDICATORS}
+
+    @classmethod
+    def from_history(cls, prices, **kwargs):
+        """
+        warm_up(prices) ile aynı durumu döngüsüz kurar: EMA'lar ve indikatör geçmişi IndicatorEngine ile
+        vektörel hesaplanır, pencereler yalnızca son fiyatlardan doldurulur (uzun geçmişler için).
+        """
+        from core.indicators import IndicatorEngine
+
+        gen = cls(**kwargs)
+        p = np.asarray(prices, dtype=float)
+        if len(p) < 2: return gen.warm_up(p)
+
+        ind = IndicatorEngine(dtype=np.float64, rsi_window=gen.rsi_window).compute(
+            p, ['EMA_12', 'EMA_26', 'MACD_Signal', 'RSI', 'MACD', 'MACD_Histogram', f'Volatility_{gen.vol_window}d'])
+        ind['Volatility_7d'] = ind.pop(f'Volatility_{gen.vol_window}d')
+        gen.ema12, gen.ema26, gen.signal = ind['EMA_12'][-1], ind['EMA_26'][-1], ind['MACD_Signal'][-1]
+        gen.last_price, gen.n_obs = p[-1], len(p)
+
+        delta = np.concatenate([[0.0], np.diff(p)])
+        gen._gains.extend(np.where(delta > 0, delta, 0.0)[-gen.rsi_window:])
+        gen._losses.extend(np.where(delta < 0, -delta, 0.0)[-gen.rsi_window:])
+        gen._prices.extend(p[-gen.vol_window:])
+        gen._returns.extend(np.log(p[1:] / p[:-1])[-(gen.lags + 1):])
+        for k in cls.INDICATORS:
+            gen._history[k].extend(ind[k][-(gen.indicator_lags + 1):])
+        return gen
+
+    def state(self):
+        """JSON'a yazılabilir durum (özellik deposunda artımlı güncelleme için)."""
+        return {
+            'params': [self.lags, self.indicator_lags, self.rsi_window, self.vol_window],
+            'ema': [self.ema12, self.ema26, self.signal],
+            'last_price': self.last_price,
+            'n_obs': self.n_obs,
+            'gains': list(self._gains), 'losses': list(self._losses),
+            'prices': list(self._prices), 'returns': list(self._returns),
+            'history': {k: [None if np.isnan(v) else float(v) for v in vals] for k, vals in self._history.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        gen = cls(*state['params'])
+        gen.ema12, gen.ema26, gen.signal = state['ema']
+        gen.last_price, gen.n_obs = state['last_price'], state['n_obs']
+        gen._gains.extend(state['gains'])
+        gen._losses.extend(state['losses'])
+        gen._prices.extend(state['prices'])
+        gen._returns.extend(state['returns'])
+        for k, vals in state['history'].items():
+            gen._history[k].extend(np.nan if v is None else v for v in vals)
+        return gen
+
+    def current(self):
+        """Son satırın kendi değerleri (Return ve indikatörler; gecikmesiz)."""
+        out = {'Return': self._returns[-1] if self._returns and self.n_obs > 1 else np.nan}
+        out.update({k: vals[-1] if vals else np.nan for k, vals in self._history.items()})
+        return out
+
+    def warm_up(self, prices):
+        """Başlangıç penceresindeki fiyatları (tarih sıralı) sırayla işler."""
+        for p in np.asarray(prices, dtype=float):
+            self.push(p)
+        return self
+
+    def push(self, price):
+        """Yeni fiyatı ekler ve tüm durumları tek adımda günceller."""
+        price = float(price)
+        if self.last_price is None:
+            self.ema12 = self.ema26 = price
+            self.signal = 0.0
+            delta = 0.0  # diff() ilk satırda NaN -> kazanç/kayıp 0 sayılır
+        else:
+            self.ema12 += self._alpha12 * (price - self.ema12)
+            self.ema26 += self._alpha26 * (price - self.ema26)
+            delta = price - self.last_price
+            self._returns.append(np.log(price / self.last_price))
+
+        macd = self.ema12 - self.ema26
+        self.signal = macd if self.last_price is None else self.signal + self._alpha9 * (macd - self.signal)
+
+        self._gains.append(delta if delta > 0 else 0.0)
+        self._losses.append(-delta if delta < 0 else 0.0)
+        self._prices.append(price)
+        self.last_price = price
+        self.n_obs += 1
+
+        rsi = np.nan
+        if len(self._gains) == self.rsi_window:
+            loss = sum(self._losses) / self.rsi_window
+            gain = sum(self._gains) / self.rsi_window
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = 100 - 100 / (1 + np.float64(gain) / loss)
+        vol = np.std(self._prices, ddof=1) if len(self._prices) == self.vol_window else np.nan
+
+        self._history['RSI'].append(rsi)
+        self._history['MACD'].append(macd)
+        self._history['MACD_Histogram'].append(macd - self.signal)
+        self._history['Volatility_7d'].append(vol)
+
+    def features(self, include_last=False):
+        """
+        Son satırın gecikmeli özellikleri (Return_Lag1..N, <indikatör>_Lag1..2). Yetersiz geçmişte None.
+        include_last=True: henüz gelmemiş bir sonraki satırın özellikleri (Lag1 = son gözlem).
+        """
+        offset = 0 if include_last else 1
+        if len(self._returns) < self.lags + offset or len(self._history['RSI']) < self.indicator_lags + offset:
+            return None
+
+        returns = list(self._returns)
+        out = {f'Return_Lag{i}': returns[-i - offset] for i in range(1, self.lags + 1)}
+        for name, values in self._history.items():
+            values = list(values)
+            for i in range(1, self.indicator_lags + 1):
+                out[f'{name}_Lag{i}'] = values[-i - offset]
+        return out
+
+    def vector(self, feature_names, include_last=False, extra=None):
+        """Model girdisi olarak (1, n_features) dizi. extra: akıştan gelmeyen sabit özellikler (ör. makro)."""
+        feats = self.features(include_last)
+        if feats is None: return None
+        if extra: feats = {**feats, **extra}
+        row = np.array([feats.get(f, np.nan) for f in feature_names], dtype=float)
+        return None if np.isnan(row).any() else row.reshape(1, -1)
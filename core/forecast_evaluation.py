@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+
+from core.ai_forecaster import AIForecaster
+from core.concurrency import BUDGET, init_worker, worker_budget
+
+
+class _NoPriors:
+    """Değerlendirmede arama öncülleri kullanılmaz (paralel katmanlar arasında geleceğe bakışı önler)."""
+
+    def get(self, *args, **kwargs):
+        return []
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+def _evaluate_block(fund_code, history, origins, horizons, modes, search_budget, threads):
+    """
+    Bir yeniden eğitim bloğu (süreç havuzu işçisi): origins[0] gününe kadarki veriyle bir kez eğitilir,
+    bloktaki her başlangıç gününden (origin) tahmin üretilir. history: fonun origins[-1] + max ufka kadarki verisi.
+    """
+    prices = history['Price'].to_numpy(dtype=float)
+    log_p = np.log(prices)
+    train = history.iloc[:origins[0] + 1]
+    max_h = max(horizons)
+    rows, latency = [], []
+
+    # Naif (son fiyat) ve sürüklenme (başlangıca kadarki ortalama log getiri) kıyasları
+    for o in origins:
+        drift = (log_p[o] - log_p[0]) / o if o > 0 else 0.0
+        for h in horizons:
+            if o + h >= len(prices): continue
+            rows.append((fund_code, o, h, "Naif", prices[o], np.nan, np.nan, prices[o + h], prices[o]))
+            rows.append((fund_code, o, h, "Sürüklenme", prices[o] * np.exp(drift * h), np.nan, np.nan, prices[o + h], prices[o]))
+
+    with threadpool_limits(limits=threads):
+        forecaster = AIForecaster(n_jobs=1, model_threads=threads, search_budget=search_budget, priors=_NoPriors(),
+                                  budget=worker_budget(threads))
+        for mode in modes:
+            start = time.perf_counter()
+            try:
+                if mode == "direct":
+                    bucket = next((h for h in forecaster.DIRECT_HORIZONS if h >= max_h), max_h)
+                    bundle = forecaster.fit_direct(train, bucket, fund_code=fund_code)
+                else:
+                    bundle = forecaster.fit(train, fund_code=fund_code)
+            except Exception as e:
+                print(f"⚠️ {fund_code} ({mode}) eğitilemedi: {e}")
+                bundle = None
+            fit_seconds = time.perf_counter() - start
+            if bundle is None: continue
+
+            model = f"AI ({mode})"
+            predict_ms = []
+            for o in origins:
+                start = time.perf_counter()
+                preds = forecaster.predict(bundle, history.iloc[:o + 1], days_forward=max_h)
+                predict_ms.append((time.perf_counter() - start) * 1000)
+                if preds is None or preds.empty: continue
+                for h in horizons:
+                    if o + h >= len(prices) or h > len(preds): continue
+                    p = preds.iloc[h - 1]
+                    rows.append((fund_code, o, h, model, p['Predicted_Price'], p['Lower_Bound'], p['Upper_Bound'],
+                                 prices[o + h], prices[o]))
+            latency.append({"FundCode": fund_code, "Model": model, "Eğitim Başlangıcı": history['Date'].iloc[origins[0]],
+                            "Eğitim Satırı": len(train), "Eğitim (sn)": fit_seconds,
+                            "Tahmin (ms)": float(np.mean(predict_ms)) if predict_ms else np.nan,
+                            "Başlangıç Sayısı": len(origins)})
+
+    dates = history['Date'].to_numpy()
+    frame = pd.DataFrame(rows, columns=["FundCode", "Origin", "Ufuk", "Model", "Tahmin", "Alt", "Üst", "Gerçekleşen", "Son Fiyat"])
+    frame.insert(1, "Tarih", dates[frame["Origin"].to_numpy(dtype=int)] if not frame.empty else pd.Series(dtype='datetime64[ns]'))
+    return frame.drop(columns="Origin"), latency
+
+
+class ForecastEvaluator:
+    """
+    AIForecaster için genişleyen pencereli (expanding window) geçmişe dönük değerlendirme.
+
+    Her fonda min_train günden sonra her retrain_every günde bir model yeniden eğitilir; aradaki günlerde
+    (her eval_every günde bir) son model, o güne kadarki veriyle tahmin üretir. Her ufuk (iş günü) için tahmin,
+    naif (son fiyat) ve sürüklenme (ortalama log getiri) kıyaslarıyla karşılaştırılır. Eğitim süresi ve tahmin
+    gecikmesi kaydedilir. Yeniden eğitim blokları birbirinden bağımsızdır; süreç havuzuna dağıtılır
+    (işçi ve iş parçacığı sayıları eşzamanlılık bütçesinden, bkz. core.concurrency).
+    """
+
+    def __init__(self, horizons=(1, 5, 10, 21), retrain_every=21, eval_every=1, min_train=250,
+                 modes=("recursive",), search_budget=10.0, max_workers=None, threads_per_worker=None, budget=None):
+        self.budget = budget if budget is not None else BUDGET
+        self.horizons = tuple(sorted(horizons))
+        self.retrain_every = retrain_every
+        self.eval_every = eval_every
+        self.min_train = min_train
+        self.modes = tuple(modes)
+        self.search_budget = search_budget
+        self.max_workers, self.threads_per_worker = self.budget.plan(self.budget.max_processes, max_workers,
+                                                                     threads_per_worker, self.budget.request_threads)
+
+    def _tasks(self, full_df, funds):
+        tasks = []
+        max_h = max(self.horizons)
+        for f in funds:
+            sub = full_df[full_df['FundCode'] == f].sort_values('Date').reset_index(drop=True)[['Date', 'Price']]
+            last_origin = len(sub) - 1 - min(self.horizons)
+            for block_start in range(self.min_train - 1, last_origin + 1, self.retrain_every):
+                origins = list(range(block_start, min(block_start + self.retrain_every, last_origin + 1), self.eval_every))
+                tasks.append((f, sub.iloc[:origins[-1] + max_h + 1], origins))
+        return tasks
+
+    def run(self, full_df, funds=None, progress_cb=None):
+        """
+        Dönüş: {'errors': tahmin bazında uzun tablo, 'summary': (Model, Ufuk) x metrikler,
+                'latency': blok bazında eğitim / tahmin süreleri, 'elapsed': toplam süre}
+        """
+        if full_df.empty: return None
+        start = time.perf_counter()
+        funds = list(funds) if funds is not None else list(full_df['FundCode'].unique())
+        tasks = self._tasks(full_df, funds)
+        if not tasks:
+            print(f"⚠️ Değerlendirme için yeterli geçmiş yok (en az {self.min_train} gün gerekli).")
+            return None
+
+        with self.budget.pool(len(tasks), self.max_workers, self.threads_per_worker) as (n_workers, threads):
+            results = self._run_tasks(tasks, n_workers, threads, progress_cb)
+
+        errors = pd.concat([r[0] for r in results], ignore_index=True).sort_values(['FundCode', 'Tarih', 'Ufuk', 'Model'])
+        latency = pd.DataFrame([row for r in results for row in r[1]])
+        return {
+            'errors': errors.reset_index(drop=True),
+            'summary': self.summarize(errors),
+            'latency': latency,
+            'elapsed': time.perf_counter() - start
+        }
+
+    def _run_tasks(self, tasks, n_workers, threads, progress_cb):
+        args = (self.horizons, self.modes, self.search_budget, threads)
+        results = None
+        if n_workers > 1:
+            try:
+                results = []
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=init_worker, initargs=(threads,)) as pool:
+                    futures = [pool.submit(_evaluate_block, f, hist, origins, *args) for f, hist, origins in tasks]
+                    for fut in as_completed(futures):
+                        results.append(fut.result())
+                        if progress_cb: progress_cb(len(results), len(tasks))
+            except Exception as e:
+                print(f"⚠️ Süreç havuzu kullanılamadı, seri değerlendirmeye geçiliyor: {e}")
+                results = None
+
+        if results is None:
+            results = []
+            for f, hist, origins in tasks:
+                results.append(_evaluate_block(f, hist, origins, *args))
+                if progress_cb: progress_cb(len(results), len(tasks))
+        return results
+
+    @staticmethod
+    def summarize(errors):
+        """Model ve ufuk bazında hata metrikleri; beceri = 1 - MAE / naif MAE (aynı tahmin noktalarında)."""
+        if errors.empty: return pd.DataFrame()
+        e = errors.assign(
+            Hata=errors['Tahmin'] / errors['Gerçekleşen'] - 1,
+            # Yön isabeti yalnızca yön öngören modeller için (naif tahmin değişim öngörmez)
+            Yon=(np.sign(errors['Tahmin'] - errors['Son Fiyat']) == np.sign(errors['Gerçekleşen'] - errors['Son Fiyat']))
+            .where(errors['Tahmin'] != errors['Son Fiyat']),
+            Kapsama=(errors['Gerçekleşen'] >= errors['Alt']) & (errors['Gerçekleşen'] <= errors['Üst'])
+        )
+        e['AbsHata'] = e['Hata'].abs()
+        naive = e[e['Model'] == "Naif"].set_index(['FundCode', 'Tarih', 'Ufuk'])['AbsHata']
+        e['NaifAbsHata'] = naive.reindex(pd.MultiIndex.from_frame(e[['FundCode', 'Tarih', 'Ufuk']])).to_numpy()
+
+        g = e.groupby(['Model', 'Ufuk'])
+        summary = pd.DataFrame({
+            "MAPE (%)": g['AbsHata'].mean() * 100,
+            "RMSE (%)": np.sqrt(g['Hata'].apply(lambda x: np.mean(x ** 2))) * 100,
+            "Sapma (%)": g['Hata'].mean() * 100,
+            "Yön İsabeti (%)": g['Yon'].mean() * 100,
+            "Bant Kapsaması (%)": g['Kapsama'].mean().where(g['Alt'].count() > 0) * 100,
+            "Naife Göre Beceri": 1 - g['AbsHata'].sum() / g['NaifAbsHata'].sum(),
+            "Tahmin Sayısı": g.size()
+        })
+        return summary
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+from datetime import datetime
+from joblib import Parallel, delayed
+from sklearn.model_selection import ParameterSampler, TimeSeriesSplit
+
+from core.price_store import DATA_DIR
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows
+    HAS_FCNTL = False
+
+
+def _fit_score(make_model, params, X, y, train_idx, val_idx):
+    model = make_model(params)
+    model.fit(X[train_idx], y[train_idx])
+    return model.score(X[val_idx], y[val_idx])
+
+
+class SuccessiveHalvingSearch:
+    """
+    Zaman serisi katmanlarında (TimeSeriesSplit) ardışık yarılama (successive halving) ile hiperparametre araması.
+
+    Kaynak = katman başına kullanılan en yeni eğitim satırı sayısı. İlk basamakta tüm adaylar verinin
+    küçük bir kısmıyla denenir; her basamakta en iyi 1/eta aday eta kat daha fazla veriyle devam eder.
+    Önceki çalışmalardan gelen en iyi parametreler (priors) her zaman aday listesine eklenir.
+    Süre bütçesi her eğitimden sonra denetlenir: aşılınca kalan eğitimler bırakılır ve o ana kadarki en iyi aday
+    döner (ilk basamak yarıda kalırsa tüm katmanları tamamlanmış adaylar arasından seçilir).
+    """
+
+    def __init__(self, make_model, param_space, n_candidates=12, eta=3, n_splits=3, min_samples=60,
+                 time_budget=30.0, priors=None, n_jobs=1, random_state=42):
+        self.make_model = make_model
+        self.param_space = param_space
+        self.n_candidates = n_candidates
+        self.eta = eta
+        self.n_splits = n_splits
+        self.min_samples = min_samples
+        self.time_budget = time_budget
+        self.priors = priors or []
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def _candidates(self):
+        seen, out = set(), []
+        for params in list(self.priors) + list(ParameterSampler(self.param_space, self.n_candidates, random_state=self.random_state)):
+            key = json.dumps(params, sort_keys=True, default=str)
+            if key in seen: continue
+            seen.add(key)
+            out.append(dict(params))
+        return out[:max(self.n_candidates, len(self.priors))]
+
+    def fit(self, X, y, progress_cb=None, purge=None):
+        """
+        Dönüş: {'params': en iyi parametreler, 'score': ortalama R², 'cv_scores': son basamaktaki katman skorları,
+                'n_fits': toplam eğitim sayısı, 'elapsed': süre, 'history': basamak özeti}
+        progress_cb(fraction, message): her katman eğitiminden sonra çağrılır (iptal için istisna fırlatabilir).
+        purge: (başlangıç, bitiş) dizileri — her satırın girdi zamanı ve hedefinin gerçekleştiği zaman. Verilirse
+               hedefi doğrulama katmanının başlangıcına taşan eğitim satırları katmandan çıkarılır (çok ufuklu hedefler).
+        """
+        X, y = np.asarray(X), np.asarray(y)
+        start = time.perf_counter()
+        folds = list(TimeSeriesSplit(n_splits=self.n_splits).split(X))
+        if purge is not None:
+            row_start, row_end = (np.asarray(a) for a in purge)
+            purged = [(tr[row_end[tr] < row_start[val].min()], val) for tr, val in folds]
+            purged = [(tr, val) for tr, val in purged if len(tr) >= self.min_samples]
+            if purged: folds = purged
+            else: print("⚠️ Arındırılmış katmanlar için yeterli eğitim satırı yok, katmanlar arındırılmadan kullanılıyor.")
+        max_train = max(len(tr) for tr, _ in folds)
+
+        candidates = self._candidates()
+        n_rungs = max(1, int(np.ceil(np.log(len(candidates)) / np.log(self.eta))) + 1) if len(candidates) > 1 else 1
+        best = {'params': candidates[0], 'score': -np.inf, 'cv_scores': []}
+        history, n_fits = [], 0
+        # İlerleme için toplam eğitim sayısı tahmini (her basamakta adaylar 1/eta'ya iner)
+        total_fits, n = 0, len(candidates)
+        for _ in range(n_rungs):
+            total_fits += n * len(folds)
+            n = max(1, int(np.ceil(n / self.eta)))
+
+        over_budget = False
+        for rung in range(n_rungs):
+            if rung > 0 and time.perf_counter() - start > self.time_budget: break
+
+            resource = int(max(self.min_samples, max_train / self.eta ** (n_rungs - 1 - rung)))
+            tasks = [(ci, tr[-resource:], val) for ci in range(len(candidates)) for tr, val in folds]
+            results = Parallel(n_jobs=self.n_jobs, return_as="generator")(
+                delayed(_fit_score)(self.make_model, candidates[ci], X, y, tr, val) for ci, tr, val in tasks
+            )
+            scores = []
+            for score in results:
+                scores.append(score)
+                n_fits += 1
+                if progress_cb:
+                    progress_cb(n_fits / total_fits, f"Hiperparametre araması: basamak {rung + 1}/{n_rungs}, "
+                                                     f"{len(candidates)} aday ({n_fits}/{total_fits} eğitim)")
+                if time.perf_counter() - start > self.time_budget and len(scores) < len(tasks):
+                    over_budget = True
+                    break
+
+            # Bütçe yarıda kestiyse: önceki basamağın sonucu geçerli; ilk basamakta tamamlanan adaylar değerlendirilir
+            n_done = len(scores) // len(folds)
+            if over_budget and (rung > 0 or n_done == 0): break
+
+            per_cand = np.array(scores[:n_done * len(folds)], dtype=float).reshape(n_done, len(folds))
+            means = np.nan_to_num(per_cand.mean(axis=1), nan=-np.inf)
+            order = np.argsort(-means)
+            best = {'params': candidates[order[0]], 'score': float(means[order[0]]), 'cv_scores': per_cand[order[0]].tolist()}
+            history.append({'rung': rung, 'resource': resource, 'n_candidates': n_done, 'best_score': best['score']})
+
+            keep = max(1, int(np.ceil(len(candidates) / self.eta)))
+            if over_budget or len(candidates) == 1: break
+            candidates = [candidates[i] for i in order[:keep]]
+
+        best.update({'n_fits': n_fits, 'elapsed': time.perf_counter() - start, 'history': history})
+        return best
+
+
+# Süreç içi yazıcılar (JobExecutor iş parçacıkları) için; süreçler arası kilit dosya kilidiyle sağlanır
+_PRIORS_LOCK = threading.Lock()
+
+
+class SearchPriors:
+    """
+    Fon (ve varsa kategori) bazında en iyi hiperparametre kayıtları (data/models/search_priors.json).
+    Bir sonraki aramada sıcak başlangıç adayları olarak kullanılır.
+    """
+
+    def __init__(self, path=None, keep=3):
+        self.path = path or os.path.join(DATA_DIR, "models", "search_priors.json")
+        self.keep = keep
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+        return self._data
+
+    @staticmethod
+    def _keys(model_name, fund_code=None, category=None):
+        keys = []
+        if fund_code: keys.append(f"{model_name}:fund:{fund_code}")
+        if category: keys.append(f"{model_name}:category:{category}")
+        keys.append(f"{model_name}:global")
+        return keys
+
+    def get(self, model_name, fund_code=None, category=None):
+        """Fon → kategori → genel sırasıyla tekrarsız öncül parametre listesi."""
+        data, out, seen = self._load(), [], set()
+        for key in self._keys(model_name, fund_code, category):
+            for entry in data.get(key, []):
+                sig = json.dumps(entry['params'], sort_keys=True)
+                if sig not in seen:
+                    seen.add(sig)
+                    out.append(entry['params'])
+        return out[:self.keep * 2]
+
+    @contextmanager
+    def _locked(self):
+        """Aynı süreçteki iş parçacıkları ve paralel süreçler arasında dosya kilidi (fcntl yoksa yalnızca süreç içi)."""
+        with _PRIORS_LOCK:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(f"{self.path}.lock", "a") as lock_file:
+                if HAS_FCNTL: fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if HAS_FCNTL: fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update(self, model_name, params, score, fund_code=None, category=None):
+        params = {k: (v.item() if hasattr(v, 'item') else v) for k, v in params.items()}
+        try:
+            # Paralel yazıcılar birbirinin kaydını ezmesin: kilit altında dosya yeniden okunur, birleştirilir ve
+            # çağrıya özgü geçici dosya üzerinden atomik olarak değiştirilir
+            with self._locked():
+                self._data = None
+                data = self._load()
+                for key in self._keys(model_name, fund_code, category):
+                    entries = [e for e in data.get(key, []) if e['params'] != params]
+                    entries.append({'params': params, 'score': float(score), 'updated': datetime.now().isoformat(timespec='seconds')})
+                    data[key] = sorted(entries, key=lambda e: e['score'], reverse=True)[:self.keep]
+
+                fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path), suffix=".tmp",
+                                                dir=os.path.dirname(self.path))
+                try:
+                    with os.fdopen(fd, "w", encoding="utf-8") as f:
+                        json.dump(data, f, ensure_ascii=False, indent=1)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    if os.path.exists(tmp_path): os.remove(tmp_path)
+                    raise
+        except OSError as e:
+            print(f"⚠️ Arama öncülleri kaydedilemedi: {e}")
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+import re
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+
+class IndicatorEngine:
+    """
+    Fon x tarih fiyat matrisi (T, N) üzerinde tek geçişte teknik indikatörler.
+    Yalnızca istenen indikatörler hesaplanır; EMA, SMA, hareketli std ve fiyat farkı gibi ara sonuçlar
+    bir hesaplama içinde önbelleğe alınıp paylaşılır (ör. MACD ve MACD_Histogram aynı EMA_12/EMA_26'yı kullanır).
+    Hesaplama ve varsayılan çıktı float64'tür (eğitim özellikleri tahmindeki akış üreticisiyle aynı kalır);
+    dtype=np.float32 yalnızca panel geneli tarama gibi model eğitimi dışındaki kullanımlar içindir.
+
+    Tanımlar calculate_technical_indicators ile aynıdır:
+        SMA_n / Volatility_nd : n günlük basit ortalama / std (ddof=1), pencere dolana kadar NaN
+        EMA_n                 : adjust=False üssel ortalama (fonun ilk fiyatıyla başlar), lfilter ile
+        ROC_n, Momentum_n     : n günlük yüzde / fiyat farkı
+        RSI                   : 14 günlük basit ortalama kazanç / kayıp
+        BB_Upper / BB_Lower / BB_Percent : 20 günlük ortalama ± 2 std
+        MACD / MACD_Signal / MACD_Histogram : EMA_12 - EMA_26, sinyal = 9 günlük EMA
+    Fonun ilk gözleminden önceki satırlar NaN kalır; aradaki eksik günlerde fiyat ileri taşınır.
+    """
+
+    ALL_INDICATORS = (
+        'SMA_5', 'SMA_10', 'SMA_20', 'SMA_50', 'EMA_12', 'EMA_26',
+        'ROC_5', 'ROC_10', 'Momentum_5', 'Momentum_10', 'RSI',
+        'BB_Upper', 'BB_Lower', 'BB_Percent',
+        'MACD', 'MACD_Signal', 'MACD_Histogram',
+        'Volatility_7d', 'Volatility_14d', 'Volatility_ATR_Proxy'
+    )
+
+    _WINDOWED = re.compile(r'^(SMA|EMA|ROC|Momentum)_(\d+)$')
+    _VOLATILITY = re.compile(r'^Volatility_(\d+)d$')
+
+    def __init__(self, dtype=np.float64, rsi_window=14, bb_window=20, bb_width=2.0):
+        self.dtype = dtype
+        self.rsi_window = rsi_window
+        self.bb_window = bb_window
+        self.bb_width = bb_width
+
+    # ---------------------------------------------------------
+    # ARA SONUÇLAR (hesaplama başına önbellekli)
+    # ---------------------------------------------------------
+    def _cached(self, cache, key, fn):
+        if key not in cache: cache[key] = fn()
+        return cache[key]
+
+    @staticmethod
+    def _ema(x, span):
+        """adjust=False EMA: y_t = (1-a) y_{t-1} + a x_t, y_0 = ilk geçerli değer. Sütunlar tek lfilter çağrısıyla."""
+        alpha = 2.0 / (span + 1)
+        valid = ~np.isnan(x)
+        first = np.where(valid.any(axis=0), valid.argmax(axis=0), 0)
+        x0 = x[first, np.arange(x.shape[1])]
+        # İlk gözlemden önceki satırlar ilk değerle doldurulur: sabit önek EMA'yı değiştirmez
+        filled = np.where(np.arange(len(x))[:, None] < first, x0, x)
+        out = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=0, zi=((1.0 - alpha) * x0)[None, :])[0]
+        out[~np.maximum.accumulate(valid, axis=0)] = np.nan
+        return out
+
+    @staticmethod
+    def _rolling(x, window, stat):
+        """
+        Hareketli ortalama / std (ddof=1). Pencere ofsetleri üzerinden kaydırılmış dilimlerle toplanır: ek bellek
+        (T, N) düzeyindedir ((T, N, w) pencere kopyası oluşmaz) ve iki geçişli std akış üreticisindeki np.std ile
+        aynı sırada toplar. Pencerede NaN varsa sonuç NaN'dır.
+        """
+        out = np.full(x.shape, np.nan)
+        if len(x) < window: return out
+        n = len(x) - window + 1
+        total = x[:n].copy()
+        for k in range(1, window):
+            total += x[k:k + n]
+        mean = total / window
+        if stat == 'mean':
+            out[window - 1:] = mean
+            return out
+        sq = (x[:n] - mean) ** 2
+        for k in range(1, window):
+            sq += (x[k:k + n] - mean) ** 2
+        out[window - 1:] = np.sqrt(sq / (window - 1))
+        return out
+
+    def _sma(self, cache, p, w):
+        return self._cached(cache, ('sma', w), lambda: self._rolling(p, w, 'mean'))
+
+    def _std(self, cache, p, w):
+        return self._cached(cache, ('std', w), lambda: self._rolling(p, w, 'std'))
+
+    def _ema_price(self, cache, p, span):
+        return self._cached(cache, ('ema', span), lambda: self._ema(p, span))
+
+    def _shift(self, cache, p, n):
+        def build():
+            out = np.full(p.shape, np.nan)
+            out[n:] = p[:-n]
+            return out
+        return self._cached(cache, ('shift', n), build)
+
+    def _macd(self, cache, p):
+        return self._cached(cache, 'macd', lambda: self._ema_price(cache, p, 12) - self._ema_price(cache, p, 26))
+
+    def _macd_signal(self, cache, p):
+        return self._cached(cache, 'macd_signal', lambda: self._ema(self._macd(cache, p), 9))
+
+    def _rsi(self, cache, p):
+        delta = p - self._shift(cache, p, 1)
+        # diff()'in ilk satırı NaN -> kazanç / kayıp 0 sayılır (fonun olmadığı satırlar NaN kalır)
+        gain = np.where(np.isnan(p), np.nan, np.where(delta > 0, delta, 0.0))
+        loss = np.where(np.isnan(p), np.nan, np.where(delta < 0, -delta, 0.0))
+        avg_gain = self._rolling(gain, self.rsi_window, 'mean')
+        avg_loss = self._rolling(loss, self.rsi_window, 'mean')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def _bollinger(self, cache, p, side):
+        sma, std = self._sma(cache, p, self.bb_window), self._std(cache, p, self.bb_window)
+        upper, lower = sma + self.bb_width * std, sma - self.bb_width * std
+        if side == 'upper': return upper
+        if side == 'lower': return lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (p - lower) / (upper - lower)
+
+    def _one(self, name, cache, p):
+        m = self._WINDOWED.match(name)
+        if m:
+            kind, n = m.group(1), int(m.group(2))
+            if kind == 'SMA': return self._sma(cache, p, n)
+            if kind == 'EMA': return self._ema_price(cache, p, n)
+            prev = self._shift(cache, p, n)
+            if kind == 'Momentum': return p - prev
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return (p - prev) / prev * 100
+        m = self._VOLATILITY.match(name)
+        if m: return self._std(cache, p, int(m.group(1)))
+
+        if name == 'Volatility_ATR_Proxy': return self._std(cache, p, 14)
+        if name == 'Return':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.log(p / self._shift(cache, p, 1))
+        if name == 'RSI': return self._rsi(cache, p)
+        if name == 'MACD': return self._macd(cache, p)
+        if name == 'MACD_Signal': return self._macd_signal(cache, p)
+        if name == 'MACD_Histogram': return self._macd(cache, p) - self._macd_signal(cache, p)
+        if name == 'BB_Upper': return self._bollinger(cache, p, 'upper')
+        if name == 'BB_Lower': return self._bollinger(cache, p, 'lower')
+        if name == 'BB_Percent': return self._bollinger(cache, p, 'percent')
+        raise ValueError(f"Bilinmeyen indikatör: {name}")
+
+    # ---------------------------------------------------------
+    # GİRİŞ NOKTALARI
+    # ---------------------------------------------------------
+    def compute(self, prices, indicators=None):
+        """
+        prices: (T,) veya (T, N) tarih sıralı fiyatlar. indicators: istenen isimler (None = ALL_INDICATORS).
+        Dönüş: {isim: prices ile aynı şekilde dtype dizisi}
+        """
+        p = np.asarray(prices, dtype=np.float64)
+        single = p.ndim == 1
+        if single: p = p[:, None]
+        if np.isnan(p).any():
+            p = pd.DataFrame(p).ffill().to_numpy()  # aradaki eksik günler; baştaki NaN'lar kalır
+
+        cache, out = {}, {}
+        for name in (indicators or self.ALL_INDICATORS):
+            values = self._one(name, cache, p).astype(self.dtype, copy=False)
+            out[name] = values[:, 0] if single else values
+        return out
+
+    def compute_frame(self, df, indicators=None, price_col='Price'):
+        """Tek fon tablosuna (tarih sıralı) istenen indikatör sütunlarını ekler."""
+        data = df.copy()
+        for name, values in self.compute(data[price_col].to_numpy(), indicators).items():
+            data[name] = values
+        return data
+
+    def panel(self, full_df, indicators=None):
+        """
+        Uzun formattaki (Date, FundCode, Price) tüm fonlar için tek geçiş.
+        Dönüş: (tarihler, fon kodları, (T, N, K) dtype küpü, indikatör isimleri)
+        """
+        indicators = list(indicators or self.ALL_INDICATORS)
+        prices = full_df.pivot_table(index='Date', columns='FundCode', values='Price', aggfunc='last').sort_index()
+        values = self.compute(prices.to_numpy(), indicators)
+        cube = np.stack([values[name] for name in indicators], axis=-1) if indicators else np.empty(prices.shape + (0,), self.dtype)
+        return prices.index, prices.columns, cube, indicators
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.concurrency import BUDGET
+
+
+class JobCancelled(Exception):
+    """İş iptal edildiğinde progress_cb tarafından fırlatılır (iş kendi ilerleme noktasında durur)."""
+
+
+class Job:
+    """Arka plan işinin durumu. status: Bekliyor / Çalışıyor / Tamamlandı / Hata / İptal"""
+
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+        self.status = "Bekliyor"
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in ("Tamamlandı", "Hata", "İptal")
+
+    @property
+    def elapsed(self):
+        if self.started is None: return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def report(self, fraction, message=None):
+        """İşin içinden ilerleme bildirimi; iptal istenmişse JobCancelled fırlatır."""
+        if self._cancel.is_set(): raise JobCancelled()
+        self.progress = min(1.0, max(self.progress, float(fraction)))
+        if message: self.message = message
+
+
+class JobExecutor:
+    """
+    Uzun süren tahmin / eğitim işleri için iş parçacığı havuzu.
+    submit() bir iş kimliği döndürür; iş fonksiyonuna progress_cb(fraction, message) parametresi verilir.
+    Durum ve sonuç sonraki Streamlit yeniden çalıştırmalarında kimlikle okunur; widget etkileşimi işi yeniden başlatmaz.
+    İptal işbirliklidir: bir sonraki progress_cb çağrısında JobCancelled fırlatılır.
+    İş parçacığı sayısı varsayılan olarak eşzamanlılık bütçesindeki istek yuvası kadardır; ağır işler ayrıca
+    süreç genelindeki yuvaları bekler (tüm oturumların toplamı bütçeyi aşmaz).
+    """
+
+    def __init__(self, max_workers=None, keep_finished=20):
+        max_workers = max_workers or BUDGET.max_requests
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fades-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.keep_finished = keep_finished
+
+    def submit(self, name, fn, *args, **kwargs):
+        job = Job(uuid.uuid4().hex[:8], name)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        self._prune()
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        # done, status'tan okunur: sonuç / hata ve bitiş zamanı, durum değişmeden önce yazılır
+        if job._cancel.is_set():
+            job.finished, job.status = time.time(), "İptal"
+            return
+        job.status, job.started = "Çalışıyor", time.time()
+        try:
+            job.result = fn(*args, progress_cb=job.report, **kwargs)
+            job.progress = 1.0
+            job.finished, job.status = time.time(), "Tamamlandı"
+        except JobCancelled:
+            job.finished, job.status = time.time(), "İptal"
+        except Exception as e:
+            job.error = str(e)
+            job.finished, job.status = time.time(), "Hata"
+            print(f"⚠️ Arka plan işi başarısız ({job.name}): {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.done: return False
+        job._cancel.set()
+        job.message = "İptal ediliyor..."
+        return True
+
+    def pop_result(self, job_id):
+        """Tamamlanan işin sonucunu alır ve işi listeden çıkarır (tamamlanmadıysa None)."""
+        job = self.get(job_id)
+        if job is None or not job.done: return None
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        return job
+
+    def _prune(self):
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished or 0)
+            for job in finished[:max(0, len(finished) - self.keep_finished)]:
+                self._jobs.pop(job.id, None)
+
+    def shutdown(self, wait=False):
+        for job in self.jobs():
+            job._cancel.set()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import numpy as np
+import pandas as pd
+
+from core.price_store import DATA_DIR
+
+
+# ---------------------------------------------------------
+# YAYIN GECİKMELERİ (gözlem günü -> verinin kamuya açıklandığı gün, takvim günü)
+# Faiz ve piyasa verileri ertesi gün, haftalık rezerv bir hafta sonra, aylık güven endeksi
+# (ayın ilk gününe tarihlenir) ay sonuna doğru açıklanır.
+# ---------------------------------------------------------
+PUBLICATION_LAGS = {
+    'Faiz (%)': 1,
+    'Rezerv (Milyar $)': 7,
+    'Güven Endeksi': 30,
+    'ABD 10Y Faiz': 1,
+    'Dolar Endeksi (DXY)': 1,
+    'VIX (Korku Endeksi)': 1
+}
+
+# Model özelliği adları (Macro_<ad>)
+COLUMN_NAMES = {
+    'Faiz (%)': 'Faiz',
+    'Rezerv (Milyar $)': 'Rezerv',
+    'Güven Endeksi': 'Guven',
+    'ABD 10Y Faiz': 'US10Y',
+    'Dolar Endeksi (DXY)': 'DXY',
+    'VIX (Korku Endeksi)': 'VIX'
+}
+
+
+class MacroFeatureStore:
+    """
+    Tahminci için nokta-zamanlı (point-in-time) makro özellik matrisi (data/macro).
+        observations.parquet : ham gözlemler [Series, Date, Value] (ileri doldurulmamış, yeni çekimlerle birleştirilir)
+        features.parquet     : günlük takvim x özellik matrisi (float32), her gün o gün yayınlanmış son değer
+    Her gözlem Date + yayın gecikmesi gününde kullanılabilir sayılır; hizalama merge_asof (geriye dönük) ile yapılır,
+    böylece eğitim satırları henüz açıklanmamış makro veriyi görmez. Matris bir kez kurulur ve bellekte tutulur;
+    fon tablolarına ekleme yalnızca as-of birleştirmedir (ağ çağrısı yoktur).
+    Özellikler: seri düzeyi (Macro_<ad>) ve CHANGE_DAYS takvim günlük değişimi (Macro_<ad>_Chg).
+    """
+
+    PREFIX = "Macro_"
+    CHANGE_DAYS = 30
+
+    def __init__(self, root=None, lags=None):
+        self.root = root or os.path.join(DATA_DIR, "macro")
+        self.lags = dict(PUBLICATION_LAGS if lags is None else lags)
+        self.obs_path = os.path.join(self.root, "observations.parquet")
+        self.features_path = os.path.join(self.root, "features.parquet")
+        self._matrix = None
+        self._mtime = None
+        os.makedirs(self.root, exist_ok=True)
+
+    def column_name(self, series):
+        return f"{self.PREFIX}{COLUMN_NAMES.get(series) or re.sub(r'[^A-Za-z0-9]+', '_', series).strip('_')}"
+
+    # ---------------------------------------------------------
+    # YAZMA
+    # ---------------------------------------------------------
+    def version(self):
+        """Matris yeniden kurulduğunda değişen damga (dosya değişiklik zamanı, yoksa 0)."""
+        return os.path.getmtime(self.features_path) if os.path.exists(self.features_path) else 0.0
+
+    def is_stale(self, max_age_hours=24):
+        return (pd.Timestamp.now().timestamp() - self.version()) > max_age_hours * 3600
+
+    def update(self, observations):
+        """Ham gözlemleri depodakilerle birleştirir (aynı seri + tarihte yeni değer geçerli) ve matrisi yeniden kurar."""
+        if observations is None or observations.empty: return 0
+        new = observations[['Series', 'Date', 'Value']].copy()
+        new['Date'] = pd.to_datetime(new['Date'])
+        old = pd.read_parquet(self.obs_path) if os.path.exists(self.obs_path) else pd.DataFrame()
+        merged = pd.concat([old, new], ignore_index=True) if not old.empty else new
+        merged = merged.drop_duplicates(subset=['Series', 'Date'], keep='last').sort_values(['Series', 'Date'])
+        merged.to_parquet(self.obs_path, index=False)
+
+        matrix = self.build(merged)
+        if matrix.empty: return 0
+        tmp_path = f"{self.features_path}.{os.getpid()}.tmp"
+        matrix.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.features_path)
+        self._matrix = None
+        return len(matrix)
+
+    def refresh(self, fetcher=None, max_age_hours=24, years=5):
+        """Matris max_age_hours'tan eskiyse MacroFetcher ile ham gözlemleri çekip günceller. Dönüş: güncellendi mi."""
+        if not self.is_stale(max_age_hours): return False
+        if fetcher is None:
+            from core.macro_fetcher import MacroFetcher
+            fetcher = MacroFetcher()
+        try:
+            observations = fetcher.fetch_raw_observations(years=years)
+        except Exception as e:
+            print(f"⚠️ Makro veriler alınamadı: {e}")
+            return False
+        if observations.empty:
+            print("⚠️ Makro veri çekilemedi, mevcut matris kullanılıyor.")
+            return False
+        return self.update(observations) > 0
+
+    def build(self, observations):
+        """Günlük takvim matrisi: her seri için gün d'de, available_date = Date + gecikme <= d olan son gözlem."""
+        obs = observations[observations['Series'].isin(self.lags)]
+        if obs.empty: return pd.DataFrame()
+        calendar = pd.DataFrame({'Date': pd.date_range(obs['Date'].min(), pd.Timestamp.now().normalize(), freq='D')})
+        past = pd.DataFrame({'Date': calendar['Date'] - pd.Timedelta(days=self.CHANGE_DAYS)})
+        out = calendar.copy()
+
+        for series, lag in self.lags.items():
+            s = obs.loc[obs['Series'] == series, ['Date', 'Value']].sort_values('Date')
+            if s.empty: continue
+            s = s.assign(Available=s['Date'] + pd.Timedelta(days=lag))[['Available', 'Value']]
+            col = self.column_name(series)
+            # allow_exact_matches: yayın günü dahil kullanılabilir
+            level = pd.merge_asof(calendar, s, left_on='Date', right_on='Available', direction='backward',
+                                  allow_exact_matches=True)['Value'].to_numpy()
+            before = pd.merge_asof(past, s, left_on='Date', right_on='Available', direction='backward',
+                                   allow_exact_matches=True)['Value'].to_numpy()
+            out[col] = level.astype(np.float32)
+            out[f"{col}_Chg"] = (level - before).astype(np.float32)
+        return out.dropna(how='all', subset=[c for c in out.columns if c != 'Date'])
+
+    # ---------------------------------------------------------
+    # OKUMA
+    # ---------------------------------------------------------
+    def load(self):
+        """Günlük matris (bellekte tutulur, dosya değişince yeniden okunur); yoksa boş tablo."""
+        if not os.path.exists(self.features_path): return pd.DataFrame()
+        mtime = os.path.getmtime(self.features_path)
+        if self._matrix is None or self._mtime != mtime:
+            self._matrix = pd.read_parquet(self.features_path).sort_values('Date').reset_index(drop=True)
+            self._mtime = mtime
+        return self._matrix
+
+    @property
+    def columns(self):
+        matrix = self.load()
+        return [c for c in matrix.columns if c.startswith(self.PREFIX)]
+
+    def align(self, dates):
+        """Verilen günlerde bilinen makro değerler (dates sırasıyla, as-of birleştirme). Dönüş: Date + makro sütunları."""
+        matrix = self.load()
+        left = pd.DataFrame({'Date': pd.to_datetime(pd.Series(dates)).astype('datetime64[ns]')})
+        if matrix.empty: return left
+        order = np.argsort(left['Date'].to_numpy(), kind='stable')
+        joined = pd.merge_asof(left.iloc[order], matrix.astype({'Date': 'datetime64[ns]'}), on='Date',
+                               direction='backward')
+        joined.index = order
+        return joined.sort_index()
+
+    def latest(self, date):
+        """date gününün kapanışında bilinen makro değerler {sütun: değer} (tahmin ufku boyunca sabit tutulur)."""
+        row = self.align([date])
+        return {c: float(row[c].iloc[0]) for c in row.columns if c.startswith(self.PREFIX)}
+
+    def append(self, data):
+        """
+        Özellik tablosuna makro sütunlarını ekler. Satır t'ye t-1 kapanışında bilinen değerler yazılır
+        (Return_Lag1 ile aynı bilgi anı); eklenen makro sütunlarında değeri olmayan satırlar düşer
+        (düşen satır sayısı bildirilir, fon sütunlarındaki NaN'lara dokunulmaz).
+        """
+        matrix = self.load()
+        if matrix.empty or data.empty: return data
+        data = data.sort_values('Date').reset_index(drop=True)
+        macro = self.align(data['Date'])[self.columns].shift(1)
+        macro = macro.loc[:, macro.notna().any()]
+        keep = macro.notna().all(axis=1).to_numpy()
+        if not keep.all():
+            first = pd.Timestamp(data['Date'][keep].min()).date() if keep.any() else "-"
+            print(f"⚠️ Makro geçmişi {(~keep).sum()} satırı kapsamıyor: eğitim tablosu {len(data)} → {keep.sum()} satır "
+                  f"(ilk makro günü {first}).")
+        return pd.concat([data, macro], axis=1)[keep].reset_index(drop=True)
@@ -13,6 +13,40 @@ class MacroFetcher:
     def __init__(self, api_key=None):
         self.api_key = api_key if api_key else SABIT_API_KEY
 
+    def _evds_series(self, series_code, rename_to, start_date, end_date, frequency=None):
+        """EVDS'den tek seri (Date indeksli, doldurulmamış ham gözlemler)."""
+        try:
+            url = (
+                f"https://evds2.tcmb.gov.tr/service/evds/"
+                f"series={series_code}"
+                f"&startDate={start_date.strftime('%d-%m-%Y')}"
+                f"&endDate={end_date.strftime('%d-%m-%Y')}"
+                f"&type=json"
+            )
+            if frequency: url += f"&frequency={frequency}"
+            
+            headers = {"key": self.api_key, "User-Agent": "Mozilla/5.0"}
+            res = requests.get(url, headers=headers, verify=False, timeout=10)
+            data = res.json()
+            
+            if 'items' not in data: return pd.DataFrame()
+            
+            df = pd.DataFrame(data['items'])
+            df['Date'] = pd.to_datetime(df['Tarih'], format="%d-%m-%Y", errors='coerce')
+            # Aylık seriler "YYYY-M" biçiminde döner (ayın ilk günü)
+            monthly = pd.to_datetime(df['Tarih'], format="%Y-%m", errors='coerce')
+            df['Date'] = df['Date'].fillna(monthly)
+            
+            # Column name cleaning (EVDS returns TP_KTF10 for TP.KTF10)
+            api_col = series_code.replace('.', '_')
+            if api_col in df.columns:
+                 df[rename_to] = pd.to_numeric(df[api_col], errors='coerce')
+            
+            return df[['Date', rename_to]].dropna().set_index('Date')
+        except Exception as e:
+            print(f"Error fetching {series_code}: {e}")
+            return pd.DataFrame()
+
     def fetch_evds_data(self):
         """
         TCMB EVDS Sisteminden Makro Verileri Çeker (Ayrı Ayrı).
@@ -22,34 +56,7 @@ class MacroFetcher:
         
         # Helper: Fetch Single Series
         def get_series(series_code, rename_to, frequency=None):
-            try:
-                url = (
-                    f"https://evds2.tcmb.gov.tr/service/evds/"
-                    f"series={series_code}"
-                    f"&startDate={start_date.strftime('%d-%m-%Y')}"
-                    f"&endDate={end_date.strftime('%d-%m-%Y')}"
-                    f"&type=json"
-                )
-                if frequency: url += f"&frequency={frequency}"
-                
-                headers = {"key": self.api_key, "User-Agent": "Mozilla/5.0"}
-                res = requests.get(url, headers=headers, verify=False, timeout=10)
-                data = res.json()
-                
-                if 'items' not in data: return pd.DataFrame()
-                
-                df = pd.DataFrame(data['items'])
-                df['Date'] = pd.to_datetime(df['Tarih'], format="%d-%m-%Y", errors='coerce')
-                
-                # Column name cleaning (EVDS returns TP_KTF10 for TP.KTF10)
-                api_col = series_code.replace('.', '_')
-                if api_col in df.columns:
-                     df[rename_to] = pd.to_numeric(df[api_col], errors='coerce')
-                
-                return df[['Date', rename_to]].dropna().set_index('Date')
-            except Exception as e:
-                print(f"Error fetching {series_code}: {e}")
-                return pd.DataFrame()
+            return self._evds_series(series_code, rename_to, start_date, end_date, frequency)
 
         # 1. Faiz (Günlük)
         df_faiz = get_series("TP.KTF10", "Faiz (%)")
@@ -127,6 +134,43 @@ class MacroFetcher:
             print(f"Global Data Error: {e}")
             return pd.DataFrame()
 
+    def fetch_raw_observations(self, years=2):
+        """
+        Tüm makro serilerin ham gözlemleri (ileri doldurma ve birleştirme yapılmadan), nokta-zamanlı
+        hizalama için (bkz. core.macro_features). Dönüş: uzun tablo [Series, Date, Value];
+        Date, gözlemin ait olduğu gündür (yayın günü değil).
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=int(365 * years))
+        frames = []
+
+        evds = [("TP.KTF10", "Faiz (%)", 1.0), ("TP.AB.C2", "Rezerv (Milyar $)", 1 / 1000),
+                ("TP.RKGE.K1", "Güven Endeksi", 1.0)]
+        for code, name, factor in evds:
+            df = self._evds_series(code, name, start_date, end_date)
+            if df.empty: continue
+            frames.append(pd.DataFrame({'Series': name, 'Date': df.index, 'Value': df[name].to_numpy() * factor}))
+
+        from core.utils import fetch_symbol_robust
+        symbols = {'^TNX': 'ABD 10Y Faiz', 'DX-Y.NYB': 'Dolar Endeksi (DXY)', '^VIX': 'VIX (Korku Endeksi)'}
+        period = f"{max(1, int(round(years)))}y"
+        for sym, name in symbols.items():
+            try:
+                df_sym = fetch_symbol_robust(sym, period=period)
+            except Exception as e:
+                print(f"⚠️ {sym} Makro veri alınamadı: {e}")
+                continue
+            col = 'Adj Close' if 'Adj Close' in df_sym.columns else 'Close'
+            if df_sym.empty or col not in df_sym.columns: continue
+            values = df_sym[col]
+            if isinstance(values, pd.DataFrame): values = values.iloc[:, 0]
+            dates = pd.to_datetime(values.index)
+            if dates.tz is not None: dates = dates.tz_localize(None)
+            frames.append(pd.DataFrame({'Series': name, 'Date': dates.normalize(), 'Value': values.to_numpy(dtype=float)}))
+
+        if not frames: return pd.DataFrame(columns=['Series', 'Date', 'Value'])
+        return pd.concat(frames, ignore_index=True).dropna(subset=['Value'])
+
     def get_combined_macro_data(self):
         """
         EVDS ve Global verileri birleştirir.
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import glob
+import json
+import hashlib
+import tempfile
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+from core.price_store import DATA_DIR
+
+
+class ModelRegistry:
+    """
+    Eğitilmiş tahmin modellerinin önbelleği.
+    Anahtar: fon kodu + eğitim verisinin (Date, Price) özeti + hiperparametre uzayının özeti.
+    Paket (model, scaler, özellik listesi, artık std vb.) bellekte ve data/models altında joblib ile saklanır;
+    diskte en son kullanılan max_entries paket tutulur (LRU, erişimde dosya zamanı güncellenir).
+    Her paketin yanında küçük bir dizin dosyası (<anahtar>.meta.json: trained_until, fit_seconds) bulunur;
+    latest() ve fit_seconds() paketleri açmadan bu dosyalardan okur.
+    Tüm oturumlar ve arka plan işleri tek kaydı paylaşır: bellek LRU'su kilitlidir, paketler geçici dosya üzerinden
+    atomik olarak yazılır.
+    """
+
+    def __init__(self, root=None, max_entries=50, memory_entries=8):
+        self.root = root or os.path.join(DATA_DIR, "models")
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def data_fingerprint(df):
+        """Eğitim verisinin (tarih sıralı Date, Price) kısa özeti."""
+        data = df[['Date', 'Price']].sort_values('Date')
+        h = hashlib.sha1()
+        h.update(pd.to_datetime(data['Date']).to_numpy(dtype='datetime64[ns]').view(np.int64).tobytes())
+        h.update(data['Price'].to_numpy(dtype=np.float64).tobytes())
+        return h.hexdigest()[:16]
+
+    @staticmethod
+    def params_fingerprint(params):
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def _safe_code(fund_code):
+        return re.sub(r"[^A-Za-z0-9_-]", "_", str(fund_code or "FON"))
+
+    def make_key(self, fund_code, df, params):
+        return f"{self._safe_code(fund_code)}_{self.data_fingerprint(df)}_{self.params_fingerprint(params)}"
+
+    def _candidates(self, fund_code, params):
+        """Fonun aynı parametre uzayıyla kaydedilmiş paket anahtarları (disk + bellek)."""
+        prefix, suffix = f"{self._safe_code(fund_code)}_", f"_{self.params_fingerprint(params)}"
+        # Kod başka bir kodun öneki olabilir (ör. AK / AK_X): arada yalnızca 16 karakterlik veri özeti olmalı
+        matches = lambda k: k.startswith(prefix) and k.endswith(suffix) and len(k) == len(prefix) + 16 + len(suffix)
+
+        paths = glob.glob(os.path.join(self.root, f"{glob.escape(prefix)}*{suffix}.joblib"))
+        with self._lock:
+            memory_keys = list(self._memory)
+        keys = {os.path.splitext(os.path.basename(p))[0] for p in paths} | set(memory_keys)
+        return [k for k in keys if matches(k)]
+
+    def _info(self, key):
+        """Paketin dizin kaydı {'trained_until', 'fit_seconds'}; dizin dosyası yoksa paket bir kez okunup yazılır."""
+        with self._lock:
+            bundle = self._memory.get(key)
+        if bundle is not None: return self._summary(bundle)
+        try:
+            with open(self._meta_path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        path = self._path(key)
+        if not os.path.exists(path): return None
+        try:
+            info = self._summary(joblib.load(path))  # Eski kayıtlar: LRU'ya ve dosya zamanına dokunmadan
+        except Exception:
+            return None
+        self._write_meta(key, info)
+        return info
+
+    @staticmethod
+    def _summary(bundle):
+        until = bundle.get('trained_until')
+        return {'trained_until': None if until is None else pd.Timestamp(until).isoformat(),
+                'fit_seconds': bundle.get('fit_seconds')}
+
+    def latest(self, fund_code, params):
+        """
+        Fonun aynı parametre uzayıyla eğitilmiş en son paketi (veri özeti ne olursa olsun); yeni gün geldiğinde
+        sıcak başlangıçla güncellenecek modeli bulmak için. Yalnızca seçilen paket yüklenir.
+        Dönüş: (anahtar, paket) veya (None, None).
+        """
+        best_key, best_until = None, None
+        for key in self._candidates(fund_code, params):
+            info = self._info(key)
+            until = info.get('trained_until') if info else None
+            if until is None: continue
+            until = pd.Timestamp(until)
+            if best_until is None or until > best_until:
+                best_key, best_until = key, until
+        if best_key is None: return None, None
+        bundle = self.get(best_key)
+        return (best_key, bundle) if bundle is not None else (None, None)
+
+    def fit_seconds(self, fund_code, params):
+        """Fonun en son kaydedilen tam eğitim süresi (sn; oturumlar arası kalıcı), yoksa None."""
+        best = None
+        for key in self._candidates(fund_code, params):
+            info = self._info(key)
+            if info and info.get('fit_seconds') is not None and info.get('trained_until'):
+                if best is None or pd.Timestamp(info['trained_until']) > pd.Timestamp(best['trained_until']):
+                    best = info
+        return best['fit_seconds'] if best else None
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, f"{key}.meta.json")
+
+    def _write_meta(self, key, info):
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=key, suffix=".tmp", dir=self.root)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(info, f)
+            os.replace(tmp_path, self._meta_path(key))
+        except OSError as e:
+            print(f"⚠️ Model dizin kaydı yazılamadı ({key}): {e}")
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.joblib")
+
+    def get(self, key):
+        with self._lock:
+            bundle = self._memory.get(key)
+            if bundle is not None:
+                self._memory.move_to_end(key)
+                return bundle
+
+        path = self._path(key)
+        if not os.path.exists(path): return None
+        try:
+            bundle = joblib.load(path)
+        except Exception as e:
+            print(f"⚠️ Kayıtlı model okunamadı ({key}): {e}")
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass  # Başka bir iş parçacığı tarafından silinmiş olabilir
+        self._remember(key, bundle)
+        return bundle
+
+    def put(self, key, bundle):
+        self._remember(key, bundle)
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=key, suffix=".tmp", dir=self.root)
+            os.close(fd)
+            try:
+                joblib.dump(bundle, tmp_path, compress=3)
+                os.replace(tmp_path, self._path(key))
+            finally:
+                if os.path.exists(tmp_path): os.remove(tmp_path)
+        except Exception as e:
+            print(f"⚠️ Model diske yazılamadı ({key}): {e}")
+            return
+        self._write_meta(key, self._summary(bundle))
+        self._evict()
+
+    def _remember(self, key, bundle):
+        with self._lock:
+            self._memory[key] = bundle
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except OSError:
+            return 0.0
+
+    def _evict(self):
+        paths = sorted(glob.glob(os.path.join(self.root, "*.joblib")), key=self._mtime)
+        for path in paths[:max(0, len(paths) - self.max_entries)]:
+            for p in (path, f"{os.path.splitext(path)[0]}.meta.json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path in glob.glob(os.path.join(self.root, "*.joblib")) + glob.glob(os.path.join(self.root, "*.meta.json")):
+            os.remove(path)
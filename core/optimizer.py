@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import scipy.optimize as sco
+import scipy.sparse as sp
+from scipy.cluster.hierarchy import linkage, leaves_list
+from scipy.spatial.distance import squareform
+from concurrent.futures import ProcessPoolExecutor
+
+from core.concurrency import BUDGET, init_worker
+
+# Her fon en az %2, en çok %60 (tek fona yığılmayı engeller)
+DEFAULT_BOUNDS = (0.02, 0.60)
+
+
+def feasible_bounds(n_assets, bounds=DEFAULT_BOUNDS):
+    """Fon sayısı arttığında (örn: 60 fon x %2 > %100) sınırları uygulanabilir hale getirir."""
+    low, high = bounds
+    return min(low, 1.0 / n_assets), max(high, 1.0 / n_assets)
+
+
+def project_to_bounds(weights, bounds=DEFAULT_BOUNDS, tol=1e-12, max_iter=200):
+    """
+    Ağırlıkların toplamı 1 ve her biri uygulanabilir [alt, üst] sınırında olan en yakın (Öklid) vektöre izdüşümü:
+    w_i = clip(x_i - tau, alt, üst), tau ikiye bölme ile bulunur. Kapalı form hedefler (risk paritesi, HRP) için.
+    """
+    x = np.asarray(weights, dtype=float)
+    low, high = feasible_bounds(len(x), bounds)
+    lo, hi = x.min() - high, x.max() - low
+    for _ in range(max_iter):
+        tau = 0.5 * (lo + hi)
+        total = np.clip(x - tau, low, high).sum()
+        if abs(total - 1.0) < tol: break
+        if total > 1.0: lo = tau
+        else: hi = tau
+    return np.clip(x - tau, low, high)
+
+
+def _slsqp(objective, n_assets, bounds, x0):
+    low, high = feasible_bounds(n_assets, bounds)
+    x0 = np.full(n_assets, 1.0 / n_assets) if x0 is None else np.clip(x0, low, high)
+    constraints = ({'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones_like(w)},)
+    res = sco.minimize(objective, x0, jac=True, method='SLSQP', bounds=[(low, high)] * n_assets, constraints=constraints)
+    return res.x
+
+
+def solve_max_sharpe(mean, cov, bounds=DEFAULT_BOUNDS, x0=None):
+    """Maksimum Sharpe ağırlıkları (analitik gradyanlı SLSQP)."""
+    def neg_sharpe(w):
+        cov_w = cov @ w
+        vol = np.sqrt(max(w @ cov_w, 1e-16))
+        ret = w @ mean
+        grad = (mean * vol - ret * cov_w / vol) / vol ** 2
+        return -ret / vol, -grad
+    return _slsqp(neg_sharpe, len(mean), bounds, x0)
+
+
+def solve_min_volatility(mean, cov, bounds=DEFAULT_BOUNDS, x0=None):
+    """Minimum volatilite ağırlıkları (varyans minimizasyonu, analitik gradyan)."""
+    def variance(w):
+        cov_w = cov @ w
+        return w @ cov_w, 2 * cov_w
+    return _slsqp(variance, len(mean), bounds, x0)
+
+
+def solve_target_return(mean, cov, target, bounds=DEFAULT_BOUNDS, x0=None):
+    """
+    Etkin sınır noktası: getirisi target olan minimum varyans ağırlıkları (max Sharpe / min vol ile aynı
+    uygulanabilir sınırlar ve analitik gradyanlar). Hedef bu sınırlarla ulaşılamazsa None.
+    """
+    n_assets = len(mean)
+    low, high = feasible_bounds(n_assets, bounds)
+    x0 = np.full(n_assets, 1.0 / n_assets) if x0 is None else np.clip(x0, low, high)
+
+    def variance(w):
+        cov_w = cov @ w
+        return w @ cov_w, 2 * cov_w
+    constraints = ({'type': 'eq', 'fun': lambda w: np.sum(w) - 1, 'jac': lambda w: np.ones_like(w)},
+                   {'type': 'eq', 'fun': lambda w: w @ mean - target, 'jac': lambda w: mean})
+    res = sco.minimize(variance, x0, jac=True, method='SLSQP', bounds=[(low, high)] * n_assets, constraints=constraints)
+    return res.x if res.success else None
+
+
+def solve_equal_weight(mean, cov, bounds=DEFAULT_BOUNDS, x0=None):
+    return np.full(len(mean), 1.0 / len(mean))
+
+
+def solve_max_diversification(mean, cov, bounds=DEFAULT_BOUNDS, x0=None):
+    """Maksimum çeşitlendirme oranı: (w' sigma) / sqrt(w' S w), analitik gradyanlı."""
+    sigma = np.sqrt(np.diag(cov))
+
+    def neg_ratio(w):
+        cov_w = cov @ w
+        vol = np.sqrt(max(w @ cov_w, 1e-16))
+        num = w @ sigma
+        grad = (sigma * vol - num * cov_w / vol) / vol ** 2
+        return -num / vol, -grad
+    return _slsqp(neg_ratio, len(mean), bounds, x0)
+
+
+def solve_risk_parity(mean, cov, bounds=DEFAULT_BOUNDS, x0=None, tol=1e-10, max_iter=500):
+    """
+    Eşit risk katkısı (ERC). 0.5 x'Sx - sum(log x) probleminin döngüsel koordinat inişi;
+    her koordinat adımı kapalı formdaki ikinci derece kökünden gelir. Sonuç ağırlık sınırlarına izdüşürülür
+    (sınır bağlayıcıysa risk katkıları tam eşit olmaz).
+    """
+    n = len(mean)
+    budget = np.full(n, 1.0 / n)
+    diag = np.diag(cov)
+    x = np.full(n, 1.0 / np.sqrt(np.sum(cov))) if x0 is None else np.maximum(np.asarray(x0, dtype=float), 1e-8)
+    for _ in range(max_iter):
+        x_old = x.copy()
+        for i in range(n):
+            c = cov[i] @ x - diag[i] * x[i]
+            x[i] = (-c + np.sqrt(c * c + 4 * diag[i] * budget[i])) / (2 * diag[i])
+        if np.max(np.abs(x - x_old)) < tol * np.max(np.abs(x)): break
+    return project_to_bounds(x / x.sum(), bounds)
+
+
+def solve_hrp(mean, cov, bounds=DEFAULT_BOUNDS, x0=None):
+    """
+    Hierarchical Risk Parity (Lopez de Prado): korelasyon mesafesiyle kümeleme, yarı-köşegenleştirme
+    ve kümeler arası ters varyans bölüşümü. Tamamen kapalı form; sonuç ağırlık sınırlarına izdüşürülür.
+    """
+    n = len(mean)
+    if n == 1: return np.ones(1)
+    std = np.sqrt(np.diag(cov))
+    corr = np.clip(cov / np.outer(std, std), -1.0, 1.0)
+    dist = np.sqrt(np.clip((1 - corr) / 2, 0.0, None))
+    np.fill_diagonal(dist, 0.0)
+    order = leaves_list(linkage(squareform(dist, checks=False), method='single'))
+
+    weights = np.ones(n)
+    clusters = [order]
+    while clusters:
+        next_clusters = []
+        for cluster in clusters:
+            if len(cluster) < 2: continue
+            half = len(cluster) // 2
+            left, right = cluster[:half], cluster[half:]
+            var_left = _cluster_variance(cov, left)
+            var_right = _cluster_variance(cov, right)
+            alpha = 1 - var_left / (var_left + var_right)
+            weights[left] *= alpha
+            weights[right] *= 1 - alpha
+            next_clusters += [left, right]
+        clusters = next_clusters
+    return project_to_bounds(weights / weights.sum(), bounds)
+
+
+def _cluster_variance(cov, idx):
+    sub = cov[np.ix_(idx, idx)]
+    ivp = 1 / np.diag(sub)
+    ivp /= ivp.sum()
+    return ivp @ sub @ ivp
+
+
+def solve_min_cvar(scenarios, bounds=DEFAULT_BOUNDS, beta=0.95):
+    """
+    Minimum CVaR (Rockafellar-Uryasev) doğrusal programı, senaryolar = geçmiş günlük getiriler.
+    Değişkenler: [w (N), VaR (1), u (T)];  min VaR + sum(u) / ((1-beta) T),  u_t >= -r_t.w - VaR,  u >= 0.
+    Program çözülemezse None (çağıran hedefi başarısız olarak gösterir; eşit ağırlık yerine geçmez).
+    """
+    scenarios = np.asarray(scenarios, dtype=float)
+    n_obs, n = scenarios.shape
+    low, high = feasible_bounds(n, bounds)
+
+    c = np.concatenate([np.zeros(n), [1.0], np.full(n_obs, 1.0 / ((1 - beta) * n_obs))])
+    A_ub = sp.hstack([sp.csr_matrix(-scenarios), -np.ones((n_obs, 1)), -sp.eye(n_obs)], format='csr')
+    b_ub = np.zeros(n_obs)
+    A_eq = np.concatenate([np.ones(n), [0.0], np.zeros(n_obs)])[None, :]
+    var_bounds = [(low, high)] * n + [(None, None)] + [(0, None)] * n_obs
+
+    res = sco.linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=[1.0], bounds=var_bounds, method='highs')
+    if not res.success:
+        print(f"⚠️ Min CVaR programı çözülemedi: {res.message}")
+        return None
+    return res.x[:n]
+
+
+SOLVERS = {
+    "max_sharpe": solve_max_sharpe,
+    "min_vol": solve_min_volatility,
+    "equal_weight": solve_equal_weight,
+    "risk_parity": solve_risk_parity,
+    "max_diversification": solve_max_diversification,
+    "hrp": solve_hrp,
+}
+
+OBJECTIVE_LABELS = {
+    "max_sharpe": "Max Sharpe",
+    "min_vol": "Min Volatilite",
+    "equal_weight": "Eşit Ağırlık",
+    "risk_parity": "Risk Paritesi",
+    "min_cvar": "Min CVaR (%95)",
+    "max_diversification": "Max Çeşitlendirme",
+    "hrp": "HRP",
+}
+
+
+def optimize_portfolio(objective, mean, cov, bounds=DEFAULT_BOUNDS, scenarios=None, x0=None):
+    """Hedef adına göre uygun çözücüyü çağırır. min_cvar senaryo (getiri) matrisi ister; çözülemezse None."""
+    if objective == "min_cvar":
+        return solve_min_cvar(scenarios, bounds)
+    return SOLVERS[objective](mean, cov, bounds, x0=x0)
+
+
+def _solve_window_chunk(values, windows, objective, bounds, trading_days):
+    """
+    Ardışık pencereleri sırayla çözer; her pencere bir öncekinin çözümüyle sıcak başlatılır.
+    Süreç havuzunda çalışabilmesi için modül seviyesinde tanımlıdır.
+    """
+    weights, prev = [], None
+    for start, end in windows:
+        sample = values[start:end]
+        mean = sample.mean(axis=0) * trading_days
+        cov = np.cov(sample, rowvar=False) * trading_days
+        w = optimize_portfolio(objective, mean, np.atleast_2d(cov), bounds, scenarios=sample, x0=prev)
+        if w is None:
+            # Çözülemeyen pencerede önceki ağırlıklar korunur (ilk pencerede eşit ağırlık)
+            w = prev if prev is not None else np.full(values.shape[1], 1.0 / values.shape[1])
+        prev = w
+        weights.append(w)
+    return weights
+
+
+class WalkForwardOptimizer:
+    """
+    Örneklem dışı (walk-forward) optimizasyon testi.
+    Ağırlıklar kayan ('rolling') veya genişleyen ('expanding') pencerede yeniden optimize edilir,
+    bir sonraki test dönemine uygulanır ve dönem sonuçları tek bir özsermaye eğrisinde birleştirilir.
+    Pencereler süreç havuzunda paralel çözülür: her işçi ardışık bir pencere bloğunu alır,
+    böylece blok içinde komşu pencereler arasında sıcak başlatma korunur.
+    """
+
+    def __init__(self, objectives=("max_sharpe", "min_vol", "equal_weight"), train_window=252, test_window=21,
+                 mode="rolling", bounds=DEFAULT_BOUNDS, max_workers=None, trading_days=252, budget=None):
+        self.objectives = tuple(objectives)
+        self.train_window = train_window
+        self.test_window = test_window
+        self.mode = mode
+        self.bounds = bounds
+        # None: eşzamanlılık bütçesinin süreç sınırı (core.concurrency)
+        self.max_workers = max_workers
+        self.trading_days = trading_days
+        self.budget = budget if budget is not None else BUDGET
+
+    def windows(self, n_obs):
+        """(eğitim başı, eğitim sonu = test başı, test sonu) üçlüleri."""
+        out = []
+        for train_end in range(self.train_window, n_obs, self.test_window):
+            train_start = train_end - self.train_window if self.mode == "rolling" else 0
+            out.append((train_start, train_end, min(train_end + self.test_window, n_obs)))
+        return out
+
+    def _solve_all(self, values, windows):
+        train = [(s, e) for s, e, _ in windows]
+        with self.budget.pool(max(1, len(train) // 4), self.max_workers) as (n_chunks, threads):
+            chunks = [list(c) for c in np.array_split(np.array(train), n_chunks) if len(c)]
+            tasks = [(obj, chunk) for obj in self.objectives for chunk in chunks]
+            results = self._solve_tasks(values, tasks, n_chunks, threads)
+
+        weights = {obj: [] for obj in self.objectives}
+        for (obj, _), res in zip(tasks, results):
+            weights[obj].extend(res)
+        return weights
+
+    def _solve_tasks(self, values, tasks, n_chunks, threads):
+        results = None
+        if n_chunks > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=n_chunks, initializer=init_worker, initargs=(threads,)) as pool:
+                    futures = [pool.submit(_solve_window_chunk, values, chunk, obj, self.bounds, self.trading_days) for obj, chunk in tasks]
+                    results = [f.result() for f in futures]
+            except Exception as e:
+                print(f"⚠️ Süreç havuzu kullanılamadı, seri çözüme geçiliyor: {e}")
+                results = None
+
+        if results is None:
+            results = [_solve_window_chunk(values, chunk, obj, self.bounds, self.trading_days) for obj, chunk in tasks]
+        return results
+
+    def run(self, returns, initial_capital=100000):
+        """
+        returns: Date x FundCode günlük getiri matrisi (eksiksiz, ortak tarihler).
+        Dönüş: {'equity': Date x hedef portföy değeri, 'weights': {hedef: rebalans tarihi x fon}, 'summary': DataFrame}
+        """
+        values = returns.to_numpy(dtype=float)
+        windows = self.windows(len(values))
+        if not windows: return None
+
+        solved = self._solve_all(values, windows)
+        test_index = returns.index[windows[0][1]:windows[-1][2]]
+
+        equity, weight_tables = {}, {}
+        for obj, weight_list in solved.items():
+            daily = []
+            for (_, start, end), w in zip(windows, weight_list):
+                # Test döneminde al-tut: ağırlıklar fiyat hareketiyle kayar
+                growth = np.cumprod(1 + values[start:end], axis=0) @ w
+                daily.append(np.diff(np.concatenate([[1.0], growth])) / np.concatenate([[1.0], growth[:-1]]))
+            label = OBJECTIVE_LABELS.get(obj, obj)
+            equity[label] = initial_capital * np.cumprod(1 + np.concatenate(daily))
+            weight_tables[label] = pd.DataFrame(weight_list, index=returns.index[[s for _, s, _ in windows]], columns=returns.columns)
+
+        equity_df = pd.DataFrame(equity, index=test_index)
+        return {'equity': equity_df, 'weights': weight_tables, 'summary': self._summarize(equity_df, initial_capital, len(windows))}
+
+    def _summarize(self, equity_df, initial_capital, n_windows):
+        daily = equity_df.pct_change().fillna(equity_df.iloc[0] / initial_capital - 1)
+        vol = daily.std() * np.sqrt(self.trading_days)
+        mean_ret = daily.mean() * self.trading_days
+        drawdown = equity_df / equity_df.cummax() - 1
+        return pd.DataFrame({
+            "Toplam Getiri": equity_df.iloc[-1] / initial_capital - 1,
+            "Yıllık Volatilite": vol,
+            "Sharpe Oranı": (mean_ret / vol).where(vol > 0, 0.0),
+            "Max Drawdown": drawdown.min(),
+            "Pencere Sayısı": n_windows
+        })
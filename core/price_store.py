@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import os
+import glob
+import threading
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import timedelta
+
+# Proje kökündeki yerel veri klasörü (fiyat deposu, tarayıcı tabloları vb.)
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+try:
+    from tefas import Crawler
+    TEFAS_CRAWLER_AVAILABLE = True
+except ImportError:
+    TEFAS_CRAWLER_AVAILABLE = False
+    Crawler = None
+
+
+class PriceStore:
+    """
+    Yerel fon fiyat deposu. Her fon data/prices/<KOD>.parquet dosyasında tutulur
+    (Date, Price, FundCode, FundName). Yeni veriler mevcut geçmişle birleştirilir.
+    Depo oturumlar arasında paylaşılır: aynı fonun birleştir-yaz adımları kilitlidir, dosya atomik olarak değiştirilir.
+    """
+
+    COLUMNS = ['Date', 'Price', 'FundCode', 'FundName']
+    SCHEMA = pa.schema([('Date', pa.timestamp('ns')), ('Price', pa.float64()),
+                        ('FundCode', pa.string()), ('FundName', pa.string())])
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(DATA_DIR, "prices")
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock(self, fund_code):
+        with self._locks_guard:
+            return self._locks.setdefault(fund_code.upper(), threading.Lock())
+
+    def _path(self, fund_code):
+        return os.path.join(self.root, f"{fund_code.upper()}.parquet")
+
+    def list_funds(self):
+        return sorted(os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(self.root, "*.parquet")))
+
+    def version(self):
+        """Depo değiştiğinde değişen damga (dosya sayısı, en son değişiklik zamanı)."""
+        paths = glob.glob(os.path.join(self.root, "*.parquet"))
+        return (len(paths), max((os.path.getmtime(p) for p in paths), default=0.0))
+
+    def save(self, fund_code, df):
+        """Temizlenmiş fiyat verisini depoya ekler (aynı tarihte yeni gelen değer geçerlidir)."""
+        if df.empty: return
+        new = df[[c for c in self.COLUMNS if c in df.columns]].copy()
+        new['FundCode'] = fund_code.upper()
+        if 'FundName' not in new.columns: new['FundName'] = None
+
+        with self._lock(fund_code):
+            self._merge_write(fund_code, new)
+
+    def _merge_write(self, fund_code, new):
+        old = self.load(fund_code)
+        merged = pd.concat([old, new], ignore_index=True) if not old.empty else new
+        merged = merged.drop_duplicates(subset=['Date'], keep='last').sort_values('Date').reset_index(drop=True)
+        merged['Date'] = pd.to_datetime(merged['Date'])
+        merged['Price'] = merged['Price'].astype(float)
+        merged['FundName'] = merged['FundName'].astype(object).where(merged['FundName'].notna(), None)
+        table = pa.Table.from_pandas(merged[self.COLUMNS], schema=self.SCHEMA, preserve_index=False)
+        fd, tmp_path = tempfile.mkstemp(prefix=fund_code.upper(), suffix=".tmp", dir=self.root)
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, self._path(fund_code))
+        finally:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+
+    def load(self, fund_code):
+        path = self._path(fund_code)
+        if not os.path.exists(path): return pd.DataFrame(columns=self.COLUMNS)
+        return pd.read_parquet(path)
+
+    def load_all(self, fund_codes=None):
+        """Depodaki (veya istenen) tüm fonları tek uzun tabloda döndürür."""
+        codes = fund_codes if fund_codes is not None else self.list_funds()
+        paths = [self._path(c) for c in codes if os.path.exists(self._path(c))]
+        if not paths: return pd.DataFrame(columns=self.COLUMNS)
+        # Tek tek read_parquet yerine tüm dosyalar tek bir arrow dataset taramasıyla okunur
+        return ds.dataset(paths, schema=self.SCHEMA, format="parquet").to_table().to_pandas()
+
+    def last_date(self, fund_code):
+        df = self.load(fund_code)
+        return None if df.empty else df['Date'].max()
+
+    def sync_universe(self, start_date, end_date, chunk_days=60):
+        """
+        tefas-crawler ile tarih aralığındaki TÜM TEFAS fonlarını çekip depoya yazar.
+        Dönüş: güncellenen fon sayısı.
+        """
+        if not TEFAS_CRAWLER_AVAILABLE:
+            print("⚠️ tefas-crawler kurulu değil, evren güncellemesi atlandı.")
+            return 0
+
+        crawler = Crawler()
+        frames = []
+        current = pd.to_datetime(start_date)
+        target_end = pd.to_datetime(end_date)
+
+        while current <= target_end:
+            chunk_end = min(current + timedelta(days=chunk_days), target_end)
+            try:
+                chunk = crawler.fetch(start=current.strftime("%Y-%m-%d"), end=chunk_end.strftime("%Y-%m-%d"),
+                                      columns=["code", "date", "price", "title"])
+                if chunk is not None and not chunk.empty: frames.append(chunk)
+            except Exception as e:
+                print(f"⚠️ TEFAS evren parçası alınamadı ({current.date()} - {chunk_end.date()}): {e}")
+            current = chunk_end + timedelta(days=1)
+
+        if not frames: return 0
+
+        universe = pd.concat(frames, ignore_index=True).rename(
+            columns={"code": "FundCode", "date": "Date", "price": "Price", "title": "FundName"}
+        )
+        universe['Date'] = pd.to_datetime(universe['Date'])
+        universe = universe.dropna(subset=['Date', 'Price'])
+        universe = universe[universe['Price'] > 0]
+
+        for code, sub in universe.groupby('FundCode'):
+            self.save(code, sub)
+        return universe['FundCode'].nunique()
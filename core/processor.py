@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 import numpy as np
-import scipy.optimize as sco
 from datetime import datetime, timedelta
 import warnings
+import threading
+from core.risk_model import CovarianceEngine, make_psd
+from core.backtester import PortfolioBacktester
+from core.optimizer import WalkForwardOptimizer, OBJECTIVE_LABELS, optimize_portfolio, solve_max_sharpe, solve_min_volatility, \
+    solve_target_return, feasible_bounds
+from core.bootstrap import BootstrapEngine
 
 # Gereksiz tarih formatı uyarılarını sustur
 warnings.simplefilter(action='ignore', category=UserWarning)
@@ -11,7 +16,11 @@ warnings.simplefilter(action='ignore', category=FutureWarning)
 
 class DataProcessor:
     def __init__(self):
-        pass
+        # Enflasyon verisi değişmedikçe günlük deflatör yeniden üretilmez
+        self._deflator_cache = {}
+        self._deflator_lock = threading.Lock()  # İşlemci tüm oturumlarca paylaşılır (cached.get_processor)
+        # Korelasyon ısı haritası, etkin sınır ve Monte Carlo aynı önbellekli tahmini kullanır
+        self.cov_engine = CovarianceEngine()
 
     def clean_data(self, df):
         if df.empty: return df
@@ -216,29 +225,21 @@ class DataProcessor:
 
         return results
 
-    def calculate_correlation_matrix(self, full_df):
+    def calculate_correlation_matrix(self, full_df, method="sample", window=None):
         if full_df.empty: return pd.DataFrame()
-        pivot_df = full_df.pivot_table(index="Date", columns="FundCode", values="Price")
-        returns_df = pivot_df.pct_change().dropna()
-        return returns_df.corr()
+        # Eksik günler çift bazında değerlendirilir (dropna ile tarih atılmaz)
+        est = self.cov_engine.estimate(full_df, window=window, method=method)
+        if est is None: return pd.DataFrame()
+        return est['corr']
 
     def normalize_for_comparison(self, df):
         if df.empty: return pd.DataFrame()
         
-        df = df.copy()
-        result_frames = []
-        
-        # Her fon için başlangıcı 0'a endeksle
-        for fund in df['FundCode'].unique():
-            sub = df[df['FundCode'] == fund].copy().sort_values("Date")
-            if not sub.empty:
-                start_price = sub.iloc[0]['Price']
-                sub['Cumulative_Return'] = (sub['Price'] / start_price) - 1
-                result_frames.append(sub)
-                
-        if result_frames:
-            return pd.concat(result_frames, ignore_index=True)
-        return df
+        # Tek sıralama + gruplu işlem: her fonun başlangıcını 0'a endeksle (fon başına kopya yok)
+        out = df.sort_values(['FundCode', 'Date'], kind='stable').reset_index(drop=True)
+        start_price = out.groupby('FundCode', sort=False)['Price'].transform('first')
+        out['Cumulative_Return'] = (out['Price'] / start_price) - 1
+        return out
 
     def calculate_drawdown_series(self, df):
         if df.empty: return pd.DataFrame()
@@ -247,7 +248,86 @@ class DataProcessor:
         rolling_max = df['Price'].cummax()
         df['Drawdown'] = (df['Price'] - rolling_max) / rolling_max
         return df[['Date', 'Drawdown']]
-        
+
+    def calculate_drawdown_panel(self, full_df):
+        """
+        Tüm fonların drawdown serisini tek gruplu kümülatif maksimum ile hesaplar.
+        Dönüş: FundCode, Date, Drawdown (fon ve tarihe göre sıralı).
+        """
+        if full_df.empty: return pd.DataFrame()
+
+        out = full_df[['FundCode', 'Date', 'Price']].sort_values(['FundCode', 'Date'], kind='stable').reset_index(drop=True)
+        rolling_max = out.groupby('FundCode', sort=False)['Price'].cummax()
+        out['Drawdown'] = (out['Price'] - rolling_max) / rolling_max
+        return out[['FundCode', 'Date', 'Drawdown']]
+
+    def calculate_drawdown_episodes(self, full_df):
+        """
+        Tüm fonlar için zirve → dip → toparlanma dönemlerini tek geçişte çıkarır.
+        Dönüş: {'episodes': dönem tablosu, 'summary': fon bazında Pain / Ulcer / Su Altı Süresi endeksleri}
+        Süreler takvim günüdür; toparlanmamış dönemler 'Devam Ediyor' olarak işaretlenir.
+        """
+        panel = self.calculate_drawdown_panel(full_df)
+        if panel.empty: return {'episodes': pd.DataFrame(), 'summary': pd.DataFrame()}
+
+        codes, funds = pd.factorize(panel['FundCode'], sort=False)
+        dates = panel['Date'].to_numpy()
+        dd = panel['Drawdown'].to_numpy(dtype=float)
+        n = len(dd)
+
+        underwater = dd < 0
+        new_fund = np.r_[True, codes[1:] != codes[:-1]]
+        starts = underwater & (new_fund | ~np.r_[False, underwater[:-1]])
+        ends = underwater & np.r_[(codes[1:] != codes[:-1]) | ~underwater[1:], True]
+
+        start_idx = np.flatnonzero(starts)
+        end_idx = np.flatnonzero(ends)
+
+        # Dönem içindeki dip noktası: dönem numarasına göre gruplu argmin
+        episode_id = np.cumsum(starts) - 1
+        uw_idx = np.flatnonzero(underwater)
+        order = np.lexsort((dd[uw_idx], episode_id[uw_idx]))
+        sorted_ids = episode_id[uw_idx][order]
+        trough_idx = uw_idx[order][np.r_[True, sorted_ids[1:] != sorted_ids[:-1]]]
+
+        # Zirve = dönemden önceki son satır (fonun ilk satırında drawdown her zaman 0'dır)
+        peak_idx = start_idx - 1
+        recovered = (end_idx + 1 < n) & ~new_fund[np.minimum(end_idx + 1, n - 1)]
+        recovery_idx = np.where(recovered, end_idx + 1, end_idx)
+
+        day = np.timedelta64(1, 'D')
+        peak_dates, trough_dates = dates[peak_idx], dates[trough_idx]
+        recovery_dates = np.where(recovered, dates[recovery_idx], np.datetime64('NaT'))
+        to_trough = (trough_dates - peak_dates) / day
+        to_recover = np.where(recovered, (dates[recovery_idx] - trough_dates) / day, np.nan)
+
+        episodes = pd.DataFrame({
+            'FundCode': funds[codes[start_idx]],
+            'Zirve Tarihi': peak_dates,
+            'Dip Tarihi': trough_dates,
+            'Toparlanma Tarihi': recovery_dates,
+            'Derinlik': dd[trough_idx],
+            'Dibe Kadar (Gün)': to_trough,
+            'Toparlanma (Gün)': to_recover,
+            'Toplam Süre (Gün)': (np.where(recovered, dates[recovery_idx], dates[end_idx]) - peak_dates) / day,
+            'Durum': np.where(recovered, 'Toparlandı', 'Devam Ediyor')
+        })
+
+        # Aynı geçişten fon bazında endeksler
+        n_funds = len(funds)
+        obs = np.bincount(codes, minlength=n_funds)
+        episode_funds = codes[start_idx]
+        summary = pd.DataFrame({
+            'Pain Endeksi': np.bincount(codes, weights=-dd, minlength=n_funds) / obs,
+            'Ulcer Endeksi': np.sqrt(np.bincount(codes, weights=dd ** 2, minlength=n_funds) / obs),
+            'Su Altı Süresi (%)': np.bincount(codes, weights=underwater, minlength=n_funds) / obs,
+            'Max Drawdown': np.minimum.reduceat(dd, np.flatnonzero(new_fund)),
+            'Dönem Sayısı': np.bincount(episode_funds, minlength=n_funds),
+            'En Uzun Dönem (Gün)': pd.Series(episodes['Toplam Süre (Gün)'].to_numpy()).groupby(episode_funds).max().reindex(range(n_funds)).to_numpy()
+        }, index=pd.Index(funds, name='FundCode'))
+
+        return {'episodes': episodes, 'summary': summary}
+
     def calculate_monthly_returns(self, df):
         if df.empty: return pd.DataFrame()
         
@@ -265,19 +345,104 @@ class DataProcessor:
         return pivot
 
     # ---------------------------------------------------------
-    # SİMÜLASYON FONKSİYONU
+    # TOPLU (TÜM FONLAR) DÖNEM VE TAKVİM GETİRİLERİ
     # ---------------------------------------------------------
-    def calculate_portfolio_simulation(self, full_df, weights_dict, initial_capital=100000):
-        if full_df.empty or not weights_dict: return pd.DataFrame()
+    def _pivot_prices(self, full_df):
+        """Uzun formatı (Date x FundCode) sıralı tarih indeksli fiyat matrisine çevirir."""
+        prices = full_df.pivot_table(index='Date', columns='FundCode', values='Price', aggfunc='last')
+        return prices.sort_index()
+
+    def calculate_period_returns_batch(self, full_df):
+        """
+        calculate_period_returns'ün tüm fonlar için tek geçişlik sürümü.
+        Ortak sıralı tarih indeksi üzerinde searchsorted ile her fonun hedef
+        tarihteki son fiyatı bulunur. Satır: FundCode, Sütun: dönem.
+        """
+        if full_df.empty: return pd.DataFrame()
+
+        prices = self._pivot_prices(full_df)
+        dates = prices.index.values
+        observed = prices.notna().to_numpy()
+        filled = prices.ffill().to_numpy(dtype=float)
+        cols = np.arange(filled.shape[1])
+
+        # Her fonun kendi son gözlemi (fonlar farklı günlerde bitebilir)
+        last_idx = len(dates) - 1 - np.argmax(observed[::-1], axis=0)
+        latest_dates = dates[last_idx]
+        latest_price = filled[last_idx, cols]
+
+        def returns_at(rows):
+            past_price = filled[np.clip(rows, 0, None), cols]
+            past_price = np.where((rows >= 0) & (past_price > 0), past_price, np.nan)
+            return latest_price / past_price - 1
+
+        periods = {"1 Ay": 30, "3 Ay": 90, "6 Ay": 180, "1 Yıl": 365}
+        results = {}
+        for name, days in periods.items():
+            targets = latest_dates - np.timedelta64(days, 'D')
+            results[name] = returns_at(np.searchsorted(dates, targets, side='right') - 1)
+
+        # YTD: son fiyatın yılından önceki son kapanış
+        year_starts = latest_dates.astype('datetime64[Y]').astype(dates.dtype)
+        results["YTD (Yılbaşı)"] = returns_at(np.searchsorted(dates, year_starts, side='left') - 1)
+
+        out = pd.DataFrame(results, index=prices.columns)
+        out.index.name = 'FundCode'
+        return out[observed.any(axis=0)]
+
+    def calculate_monthly_returns_batch(self, full_df):
+        """
+        calculate_monthly_returns'ün tüm fonlar için tek geçişlik sürümü (Yıl x Ay ısı haritası).
+        Ay sonu satırları searchsorted ile bulunur; fonun hiç gözlemi olmayan aylar boş kalır.
+        Satır: (FundCode, Year), Sütun: ay isimleri.
+        """
+        if full_df.empty: return pd.DataFrame()
 
-        selected_funds = list(weights_dict.keys())
-        df_filtered = full_df[full_df['FundCode'].isin(selected_funds)].copy()
+        prices = self._pivot_prices(full_df)
+        dates = prices.index.values
+        filled = prices.ffill().to_numpy(dtype=float)
+        obs_count = np.cumsum(prices.notna().to_numpy(), axis=0)
+
+        months = pd.period_range(prices.index[0], prices.index[-1], freq='M')
+        next_month_starts = (months + 1).start_time.values
+        rows = np.searchsorted(dates, next_month_starts, side='left') - 1
+
+        month_price = filled[rows]
+        has_obs = np.diff(obs_count[rows], axis=0, prepend=0) > 0
+        prev_price = np.vstack([np.full((1, filled.shape[1]), np.nan), month_price[:-1]])
+        monthly = np.where(has_obs, month_price / prev_price - 1, np.nan)
+
+        frame = pd.DataFrame(
+            monthly,
+            index=pd.MultiIndex.from_arrays([months.year, months.month], names=['Year', 'Month']),
+            columns=prices.columns
+        )
+        heatmap = frame.stack(future_stack=True).unstack('Month')
+        heatmap = heatmap.reorder_levels(['FundCode', 'Year']).sort_index().dropna(how='all')
+        heatmap = heatmap.reindex(columns=range(1, 13))
+        heatmap.columns = ['Ocak', 'Şubat', 'Mart', 'Nisan', 'Mayıs', 'Haziran', 'Temmuz', 'Ağustos', 'Eylül', 'Ekim', 'Kasım', 'Aralık']
+        return heatmap
+
+    # ---------------------------------------------------------
+    # SİMÜLASYON FONKSİYONU
+    # ---------------------------------------------------------
+    def portfolio_returns_matrix(self, full_df, selected_funds):
+        """Ortak tarihli günlük getiri matrisi (Date x FundCode); ağırlıktan bağımsız, bir kez hesaplanıp yeniden kullanılabilir."""
+        if full_df.empty: return pd.DataFrame()
+        df_filtered = full_df[full_df['FundCode'].isin(list(selected_funds))]
         
         # Pivot ve Temizlik
         pivot_returns = df_filtered.pivot_table(index='Date', columns='FundCode', values='Daily_Return')
-        pivot_returns = pivot_returns.replace([np.inf, -np.inf], np.nan).dropna()
+        return pivot_returns.replace([np.inf, -np.inf], np.nan).dropna()
+
+    def calculate_portfolio_simulation(self, full_df, weights_dict, initial_capital=100000):
+        if full_df.empty or not weights_dict: return pd.DataFrame()
+        pivot_returns = self.portfolio_returns_matrix(full_df, weights_dict.keys())
+        return self.simulate_portfolio(pivot_returns, weights_dict, initial_capital)
 
-        if pivot_returns.empty: return pd.DataFrame()
+    def simulate_portfolio(self, pivot_returns, weights_dict, initial_capital=100000):
+        """Hazır getiri matrisinden portföy değeri (ağırlık değişiminde yalnızca bu adım yeniden çalışır)."""
+        if pivot_returns.empty or not weights_dict: return pd.DataFrame()
 
         ordered_weights = []
         for code in pivot_returns.columns:
@@ -301,26 +466,36 @@ class DataProcessor:
         
         return portfolio_df
 
+    # ---------------------------------------------------------
+    # REBALANS GERİ TESTİ (ÇOKLU STRATEJİ)
+    # ---------------------------------------------------------
+    def run_rebalancing_backtest(self, full_df, strategies, initial_capital=100000):
+        """
+        Al-tut / aylık / çeyreklik / bant rebalans stratejilerini maliyet ve valörle birlikte tek seferde test eder.
+        Stratejiler PortfolioBacktester.strategy_grid ile üretilebilir.
+        """
+        if full_df.empty or not strategies: return None
+
+        funds = sorted({f for s in strategies for f in s['weights']})
+        returns = self.cov_engine.returns_matrix(full_df, funds).dropna().astype(float)
+        if returns.empty: return None
+
+        return PortfolioBacktester().run(returns, strategies, initial_capital)
+
     # ---------------------------------------------------------
     # MARKOWITZ ETKİN SINIR (EFFICIENCY FRONTIER)
     # ---------------------------------------------------------
-    def calculate_efficient_frontier(self, full_df, selected_funds, num_portfolios=2000):
+    def calculate_efficient_frontier(self, full_df, selected_funds, num_portfolios=2000, cov_method="sample", bounds=(0.02, 0.60)):
         if full_df.empty or len(selected_funds) < 2:
             return pd.DataFrame(), {}
 
-        df_filtered = full_df[full_df['FundCode'].isin(selected_funds)].copy()
-        
-        try:
-            pivot_returns = df_filtered.pivot_table(index='Date', columns='FundCode', values='Daily_Return')
-        except:
-            return pd.DataFrame(), {}
-
-        pivot_returns = pivot_returns.replace([np.inf, -np.inf], np.nan).dropna()
-        if pivot_returns.empty: return pd.DataFrame(), {}
+        est = self.cov_engine.estimate(full_df, funds=selected_funds, method=cov_method)
+        if est is None or est['cov'].isna().to_numpy().any(): return pd.DataFrame(), {}
 
-        mean_returns = pivot_returns.mean() * 252
-        cov_matrix = pivot_returns.cov() * 252
-        num_assets = len(pivot_returns.columns)
+        fund_codes = est['cov'].columns
+        mean_returns = est['mean'].to_numpy() * 252
+        cov_matrix = make_psd(est['cov'].to_numpy()) * 252
+        num_assets = len(fund_codes)
 
         # --- HELPER FUNCTIONS ---
         def get_ret_vol_sharpe(weights):
@@ -330,59 +505,52 @@ class DataProcessor:
             sr = ret / vol if vol > 0 else 0
             return np.array([ret, vol, sr])
 
-        def neg_sharpe(weights):
-            return -get_ret_vol_sharpe(weights)[2]
-
-        def minimize_volatility(weights):
-            return get_ret_vol_sharpe(weights)[1]
-
-        # Constraints & Bounds
-        constraints = ({'type': 'eq', 'fun': lambda x: np.sum(x) - 1})
         # MAX WEIGHT CONSTRAINTS (Diversification)
-        # Her fon en az %2, en çok %60 olabilir.
-        # Böylece %100 tek fona yığılmayı engelleriz.
-        bounds = tuple((0.02, 0.60) for _ in range(num_assets))
-        init_guess = [1./num_assets] * num_assets
-
-        # 1. MAX SHARPE PORTFOLIO
-        opt_sharpe = sco.minimize(neg_sharpe, init_guess, method='SLSQP', bounds=bounds, constraints=constraints)
-        max_sharpe_w = opt_sharpe.x
+        # Varsayılan: her fon en az %2, en çok %60 olabilir.
+        # Böylece %100 tek fona yığılmayı engelleriz. Fon sayısına göre uygulanabilir hale getirilir;
+        # eğri ve işaretli noktalar aynı sınırları kullanır.
+        weight_bounds = feasible_bounds(num_assets, bounds)
+
+        # 1. MAX SHARPE PORTFOLIO (analitik gradyanlı çözücü)
+        max_sharpe_w = solve_max_sharpe(mean_returns, cov_matrix, weight_bounds)
         max_sharpe_metrics = get_ret_vol_sharpe(max_sharpe_w)
         
         best_sharpe = {
             'Return': max_sharpe_metrics[0],
             'Volatility': max_sharpe_metrics[1],
             'Sharpe': max_sharpe_metrics[2],
-            'Weights': {col: round(w, 2) for col, w in zip(pivot_returns.columns, max_sharpe_w)}
+            'Weights': {col: round(w, 2) for col, w in zip(fund_codes, max_sharpe_w)}
         }
 
         # 2. MIN VOLATILITY PORTFOLIO
-        opt_vol = sco.minimize(minimize_volatility, init_guess, method='SLSQP', bounds=bounds, constraints=constraints)
-        min_vol_w = opt_vol.x
+        min_vol_w = solve_min_volatility(mean_returns, cov_matrix, weight_bounds)
         min_vol_metrics = get_ret_vol_sharpe(min_vol_w)
         
         min_vol = {
             'Return': min_vol_metrics[0],
             'Volatility': min_vol_metrics[1],
             'Sharpe': min_vol_metrics[2],
-            'Weights': {col: round(w, 2) for col, w in zip(pivot_returns.columns, min_vol_w)}
+            'Weights': {col: round(w, 2) for col, w in zip(fund_codes, min_vol_w)}
         }
 
         # 3. EFFICIENT FRONTIER CURVE
-        # Target returns range from Min Vol Return to Max Asset Return
-        target_rets = np.linspace(min_vol_metrics[0], mean_returns.max(), 30)
+        # Hedef getiriler: Min Vol getirisinden sınırlar altında ulaşılabilen en yüksek getiriye
+        # (en yüksek getirili fonlara üst sınır kadar ağırlık, kalanlara alt sınır)
+        low, high = weight_bounds
+        max_ret_w = np.full(num_assets, low)
+        for i in np.argsort(-mean_returns):
+            max_ret_w[i] = min(high, low + 1.0 - max_ret_w.sum())
+        target_rets = np.linspace(min_vol_metrics[0], max_ret_w @ mean_returns, 30)
         frontier_vol = []
         frontier_ret = []
 
+        w_prev = min_vol_w
         for tr in target_rets:
-            cons = (
-                {'type': 'eq', 'fun': lambda x: get_ret_vol_sharpe(x)[0] - tr},
-                {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}
-            )
-            res = sco.minimize(minimize_volatility, init_guess, method='SLSQP', bounds=bounds, constraints=cons)
-            if res.success:
-                frontier_ret.append(tr)
-                frontier_vol.append(res.fun)
+            w = solve_target_return(mean_returns, cov_matrix, tr, weight_bounds, x0=w_prev)
+            if w is None: continue
+            w_prev = w
+            frontier_ret.append(tr)
+            frontier_vol.append(get_ret_vol_sharpe(w)[1])
         
         frontier_df = pd.DataFrame({'Volatility': frontier_vol, 'Return': frontier_ret})
 
@@ -402,14 +570,102 @@ class DataProcessor:
             'min_vol': min_vol
         }
 
+    # ---------------------------------------------------------
+    # ALTERNATİF OPTİMİZASYON HEDEFLERİ
+    # ---------------------------------------------------------
+    def calculate_optimal_portfolios(self, full_df, selected_funds, objectives=("risk_parity", "min_cvar", "max_diversification", "hrp"),
+                                     bounds=(0.02, 0.60), cov_method="sample"):
+        """
+        Risk paritesi, Min CVaR, Max çeşitlendirme ve HRP gibi hedefleri etkin sınırla aynı
+        önbellekli kovaryans tahmini üzerinden çözer.
+        Dönüş: {'weights': FundCode x hedef, 'stats': hedef x (Getiri, Volatilite, Sharpe, CVaR %95),
+                'failed': çözülemeyen hedeflerin etiketleri}; hiçbir hedef çözülemezse None.
+        """
+        if full_df.empty or len(selected_funds) < 2: return None
+
+        est = self.cov_engine.estimate(full_df, funds=selected_funds, method=cov_method)
+        if est is None or est['cov'].isna().to_numpy().any(): return None
+
+        fund_codes = est['cov'].columns
+        mean_returns = est['mean'].to_numpy() * 252
+        cov_matrix = make_psd(est['cov'].to_numpy()) * 252
+        scenarios = self.cov_engine.returns_matrix(full_df, selected_funds).dropna()[fund_codes].to_numpy(dtype=float)
+
+        weights, stats, failed = {}, {}, []
+        for obj in objectives:
+            w = optimize_portfolio(obj, mean_returns, cov_matrix, bounds, scenarios=scenarios)
+            label = OBJECTIVE_LABELS.get(obj, obj)
+            if w is None:
+                failed.append(label)
+                continue
+            port = scenarios @ w
+            tail = np.sort(port)[:max(1, int(len(port) * 0.05))]
+            ret = float(w @ mean_returns)
+            vol = float(np.sqrt(w @ cov_matrix @ w))
+            weights[label] = w
+            stats[label] = {'Return': ret, 'Volatility': vol, 'Sharpe': ret / vol if vol > 0 else 0, 'CVaR_95': -tail.mean()}
+
+        if not weights: return None
+        return {
+            'weights': pd.DataFrame(weights, index=fund_codes),
+            'stats': pd.DataFrame(stats).T,
+            'failed': failed
+        }
+
+    # ---------------------------------------------------------
+    # WALK-FORWARD (ÖRNEKLEM DIŞI) OPTİMİZASYON
+    # ---------------------------------------------------------
+    def calculate_walk_forward(self, full_df, selected_funds, train_window=252, test_window=21, mode="rolling", initial_capital=100000):
+        """
+        Max Sharpe / Min Volatilite ağırlıklarını kayan veya genişleyen pencerede yeniden optimize eder,
+        sonraki döneme uygular ve örneklem dışı özsermaye eğrisini döndürür.
+        """
+        if full_df.empty or len(selected_funds) < 2: return None
+
+        returns = self.cov_engine.returns_matrix(full_df, selected_funds).dropna().astype(float)
+        if len(returns) <= train_window: return None
+
+        optimizer = WalkForwardOptimizer(train_window=train_window, test_window=test_window, mode=mode)
+        return optimizer.run(returns, initial_capital)
+
+    # ---------------------------------------------------------
+    # BOOTSTRAP GÜVEN ARALIKLARI
+    # ---------------------------------------------------------
+    def calculate_bootstrap_intervals(self, full_df, benchmark_df=None, n_resamples=5000, confidence=0.95, block_length=None):
+        """
+        Risk ve karşılaştırmalı metrikler için durağan bootstrap güven aralıkları (tüm fonlar birlikte).
+        Dönüş: (FundCode, Metrik) x (Tahmin, Alt, Üst, Std Hata)
+        """
+        if full_df.empty: return pd.DataFrame()
+
+        prices = self._pivot_prices(full_df)
+        bench = None
+        if benchmark_df is not None and not benchmark_df.empty:
+            b = self.add_financial_metrics(benchmark_df) if 'Daily_Return' not in benchmark_df.columns else benchmark_df
+            b_dates = pd.to_datetime(b['Date'])
+            if b_dates.dt.tz is not None: b_dates = b_dates.dt.tz_localize(None)
+            bench = pd.Series(b['Daily_Return'].to_numpy(dtype=float), index=b_dates).groupby(level=0).last()
+            prices = prices.reindex(prices.index.union(bench.index))
+
+        # Fonun kendi gözlem günlerine göre getiri; ilk gözlem 0 (add_financial_metrics ile aynı)
+        observed = prices.notna()
+        filled = prices.ffill()
+        returns = (filled / filled.shift(1) - 1).replace([np.inf, -np.inf], np.nan)
+        returns = returns.where(observed & filled.shift(1).notna(), np.nan).fillna(0).where(observed)
+
+        engine = BootstrapEngine(n_resamples=n_resamples, block_length=block_length, confidence=confidence)
+        return engine.run(returns, bench)
+
     # ---------------------------------------------------------
     # VAR (VALUE AT RISK)
     # ---------------------------------------------------------
     def calculate_value_at_risk(self, full_df, weights_dict, initial_capital=100000, confidence_level=0.95):
         sim_df = self.calculate_portfolio_simulation(full_df, weights_dict, initial_capital)
         if sim_df.empty: return None
+        return self.value_at_risk(sim_df['Daily_Return'], initial_capital, confidence_level)
 
-        returns = sim_df['Daily_Return']
+    def value_at_risk(self, returns, initial_capital=100000, confidence_level=0.95):
+        """Portföy günlük getiri serisinden parametrik VaR."""
         mean = returns.mean()
         std = returns.std()
 
@@ -422,15 +678,20 @@ class DataProcessor:
     # ---------------------------------------------------------
     # MONTE CARLO SİMÜLASYONU
     # ---------------------------------------------------------
-    def run_monte_carlo_simulation(self, full_df, weights_dict, initial_capital, days_forward=180, num_simulations=50):
-        sim_df = self.calculate_portfolio_simulation(full_df, weights_dict, initial_capital)
-        if sim_df.empty: return pd.DataFrame()
+    def run_monte_carlo_simulation(self, full_df, weights_dict, initial_capital, days_forward=180, num_simulations=50, cov_method="sample"):
+        if full_df.empty or not weights_dict: return pd.DataFrame()
+
+        # Portföy parametreleri ortak kovaryans tahmininden: mu = w.m, sigma = sqrt(w' S w)
+        est = self.cov_engine.estimate(full_df, funds=list(weights_dict.keys()), method=cov_method)
+        if est is None or est['cov'].isna().to_numpy().any(): return pd.DataFrame()
 
-        returns = sim_df['Daily_Return']
-        mu = returns.mean()
-        sigma = returns.std()
+        w = np.array([weights_dict.get(code, 0) for code in est['cov'].columns], dtype=float)
+        if w.sum() <= 0: return pd.DataFrame()
+        w = w / w.sum()
+        mu = float(w @ est['mean'].to_numpy())
+        sigma = float(np.sqrt(max(w @ est['cov'].to_numpy(dtype=float) @ w, 0.0)))
         
-        last_date = sim_df['Date'].max()
+        last_date = full_df[full_df['FundCode'].isin(est['cov'].columns)]['Date'].max()
         future_dates = [last_date + timedelta(days=i) for i in range(1, days_forward + 1)]
         
         results = pd.DataFrame({'Date': future_dates})
@@ -450,27 +711,84 @@ class DataProcessor:
     # ---------------------------------------------------------
     # REEL GETİRİ (ENFLASYONLU)
     # ---------------------------------------------------------
+    def build_inflation_deflator(self, inflation_df, start_date=None, end_date=None):
+        """
+        Aylık enflasyon oranlarından takvim günü indeksli kümülatif TÜFE deflatörü üretir.
+        Her gün için (1 + r_ay)^(1/30) faktörü uygulanır; eksik aylar son oranla doldurulur.
+        Seri, aralık başlangıcından bir gün önce 1.0 değeriyle başlar.
+        Aynı enflasyon verisi ve kapsanan aralık için önbellekten döner.
+        """
+        if inflation_df is None or inflation_df.empty: return pd.Series(dtype=float)
+
+        date_col = 'Tarih' if 'Tarih' in inflation_df.columns else 'Date'
+        target_col = 'Oran' if 'Oran' in inflation_df.columns else 'Aylık Enflasyon'
+        if date_col not in inflation_df.columns or target_col not in inflation_df.columns:
+            return pd.Series(dtype=float)
+
+        monthly = pd.Series(
+            inflation_df[target_col].to_numpy(dtype=float),
+            index=pd.to_datetime(inflation_df[date_col]).dt.to_period('M')
+        ).dropna()
+        monthly = monthly[~monthly.index.duplicated(keep='last')].sort_index()
+        if monthly.empty: return pd.Series(dtype=float)
+
+        range_start = monthly.index[0].start_time
+        range_end = monthly.index[-1].end_time.normalize()
+        if start_date is not None: range_start = min(range_start, pd.Timestamp(start_date).normalize())
+        if end_date is not None: range_end = max(range_end, pd.Timestamp(end_date).normalize())
+
+        key = tuple(zip(monthly.index.astype(str), monthly.to_numpy()))
+        with self._deflator_lock:
+            cached = self._deflator_cache.get(key)
+        if cached is not None and cached.index[0] < range_start and cached.index[-1] >= range_end:
+            return cached
+
+        days = pd.date_range(range_start - pd.Timedelta(days=1), range_end, freq='D')
+        last_val = monthly.iloc[-1]
+        rates = monthly.reindex(days.to_period('M')).fillna(last_val).to_numpy()
+        factors = (1 + rates / 100) ** (1 / 30)
+        factors[0] = 1.0
+        deflator = pd.Series(np.cumprod(factors), index=days, name='Cum_Inf_Index')
+
+        with self._deflator_lock:
+            if len(self._deflator_cache) >= 8: self._deflator_cache.clear()
+            self._deflator_cache[key] = deflator
+        return deflator
+
     def calculate_real_returns(self, df, inflation_df):
         if df.empty or 'Cumulative_Return' not in df.columns: return df
         if inflation_df is None or inflation_df.empty: return df 
         
-        df = df.copy()
-        df['YearMonth'] = df['Date'].dt.to_period('M')
-        
-        inf_copy = inflation_df.copy()
-        if 'Tarih' in inf_copy.columns:
-            inf_copy['Date'] = pd.to_datetime(inf_copy['Tarih'])
-        inf_copy['YearMonth'] = inf_copy['Date'].dt.to_period('M')
-        
-        target_col = 'Oran' if 'Oran' in inf_copy.columns else 'Aylık Enflasyon'
-        if target_col not in inf_copy.columns: return df
+        df = df.sort_values('Date').copy()
+        dates = df['Date'].dt.normalize()
+        deflator = self.build_inflation_deflator(inflation_df, dates.min(), dates.max())
+        if deflator.empty: return df
 
-        merged = pd.merge(df, inf_copy[['YearMonth', target_col]], on='YearMonth', how='left')
-        last_val = inf_copy[target_col].iloc[-1] if not inf_copy.empty else 3.0
-        merged[target_col] = merged[target_col].fillna(last_val)
+        # Fonun ilk gününden bir önceki güne göre endekslenir (ilk gün de enflasyona dahil)
+        base = deflator.loc[dates.min() - pd.Timedelta(days=1)]
+        df['Cum_Inf_Index'] = deflator.reindex(dates).to_numpy() / base
+        df['Real_Return'] = ((1 + df['Cumulative_Return']) / df['Cum_Inf_Index']) - 1
         
-        merged['Daily_Inf_Factor'] = (1 + (merged[target_col]/100))**(1/30)
-        merged['Cum_Inf_Index'] = merged['Daily_Inf_Factor'].cumprod()
-        merged['Real_Return'] = ((1 + merged['Cumulative_Return']) / merged['Cum_Inf_Index']) - 1
-        
-        return merged
\ No newline at end of file
+        return df
+
+    def calculate_real_returns_matrix(self, full_df, inflation_df):
+        """
+        Tüm fonların reel getirisini tek seferde hesaplar.
+        Nominal kümülatif getiri matrisi (Date x FundCode), ortak deflatöre tek bir yayınlı bölme ile oranlanır.
+        """
+        if full_df.empty or 'Cumulative_Return' not in full_df.columns: return pd.DataFrame()
+        if inflation_df is None or inflation_df.empty: return pd.DataFrame()
+
+        nominal = full_df.assign(Date=full_df['Date'].dt.normalize()).pivot_table(
+            index='Date', columns='FundCode', values='Cumulative_Return', aggfunc='last'
+        ).sort_index()
+        deflator = self.build_inflation_deflator(inflation_df, nominal.index.min(), nominal.index.max())
+        if deflator.empty: return pd.DataFrame()
+
+        values = nominal.to_numpy(dtype=float)
+        first_idx = np.argmax(~np.isnan(values), axis=0)
+        base = deflator.reindex(nominal.index[first_idx] - pd.Timedelta(days=1)).to_numpy()
+        index_t = deflator.reindex(nominal.index).to_numpy()
+
+        real = (1 + values) / (index_t[:, None] / base[None, :]) - 1
+        return pd.DataFrame(real, index=nominal.index, columns=nominal.columns)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+
+def pairwise_moments(values, weights=None, block_size=256, ddof=1):
+    """
+    Eksik veriyi çift bazında (pairwise) ele alan kovaryans hesabı.
+    values: (T, N) getiri matrisi, NaN = eksik gözlem.
+    weights: (T,) gözlem ağırlıkları (EWMA için), None ise eşit ağırlık.
+    Hesap, sütun blokları halinde float32 matris çarpımlarıyla yapılır.
+    Döner: cov, corr (float32, N x N) ve ortak gözlem sayıları (int32, N x N).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = ~np.isnan(values)
+    # Kaydırma kovaryansı değiştirmez; ortalamayı çıkarmak float32 hassasiyet kaybını önler
+    col_mean = np.nanmean(np.where(mask.any(axis=0), values, 0.0), axis=0)
+    centered = np.where(mask, values - col_mean, 0.0).astype(np.float32)
+    m = mask.astype(np.float32)
+
+    w = np.ones(len(values), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    wm = m * w[:, None]
+    wx = centered * w[:, None]
+    wxx = centered * wx
+    xx = centered * centered
+
+    n_assets = values.shape[1]
+    cov = np.empty((n_assets, n_assets), dtype=np.float32)
+    corr = np.empty((n_assets, n_assets), dtype=np.float32)
+    n_obs = np.empty((n_assets, n_assets), dtype=np.int32)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, n_assets, block_size):
+            b = slice(start, min(start + block_size, n_assets))
+            n = wm[:, b].T @ m
+            sx = wx[:, b].T @ m
+            sy = wm[:, b].T @ centered
+            sxy = wx[:, b].T @ centered
+            sxx = wxx[:, b].T @ m
+            syy = wm[:, b].T @ xx
+
+            denom = n - ddof
+            c = (sxy - sx * sy / n) / denom
+            var_i = (sxx - sx * sx / n) / denom
+            var_j = (syy - sy * sy / n) / denom
+
+            cov[b] = c
+            corr[b] = c / np.sqrt(var_i * var_j)
+            n_obs[b] = np.rint(m[:, b].T @ m).astype(np.int32)
+
+    idx = np.arange(n_assets)
+    corr[idx, idx] = np.where(np.diag(cov) > 0, 1.0, np.nan)
+    return cov, np.clip(corr, -1.0, 1.0), n_obs
+
+
+def ledoit_wolf_shrinkage(values, block_size=256):
+    """
+    Ledoit-Wolf (ölçekli birim matris hedefi) daralma katsayısı.
+    Eksik gözlemler sütun ortalamasıyla doldurulur; toplamlar bloklar halinde alınır.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n_samples, n_features = values.shape
+    if n_samples < 2 or n_features == 0: return 0.0
+
+    x = np.nan_to_num(values - np.nanmean(values, axis=0), nan=0.0).astype(np.float32)
+    x2 = x * x
+    emp_cov_trace = x2.sum(axis=0, dtype=np.float64) / n_samples
+    mu = emp_cov_trace.sum() / n_features
+
+    beta_, delta_ = 0.0, 0.0
+    for start in range(0, n_features, block_size):
+        b = slice(start, min(start + block_size, n_features))
+        beta_ += float(np.sum(x2[:, b].T @ x2, dtype=np.float64))
+        delta_ += float(np.sum(np.square(x[:, b].T @ x, dtype=np.float64)))
+
+    delta_ /= n_samples ** 2
+    beta = (beta_ / n_samples - delta_) / (n_features * n_samples)
+    delta = (delta_ - 2.0 * mu * emp_cov_trace.sum() + n_features * mu ** 2) / n_features
+    beta = min(beta, delta)
+    return 0.0 if beta <= 0 else float(beta / delta)
+
+
+def ewma_weights(n_obs, lam=0.94):
+    """RiskMetrics tipi üstel ağırlıklar (en yeni gözlem en ağır), toplamı 1."""
+    w = lam ** np.arange(n_obs - 1, -1, -1, dtype=np.float64)
+    return w / w.sum()
+
+
+def make_psd(cov, floor=1e-10):
+    """Çift bazlı kovaryansı negatif özdeğerleri kırparak pozitif yarı-tanımlı yapar (optimizasyon için)."""
+    cov = np.asarray(cov, dtype=np.float64)
+    cov = (cov + cov.T) / 2
+    eigval, eigvec = np.linalg.eigh(np.nan_to_num(cov))
+    if eigval.min() >= floor: return cov
+    return (eigvec * np.maximum(eigval, floor)) @ eigvec.T
+
+
+class CovarianceEngine:
+    """
+    Büyük fon evrenleri için kovaryans / korelasyon motoru.
+    Yöntemler: 'sample' (çift bazlı örneklem), 'ledoit_wolf' (daralmalı), 'ewma' (üstel ağırlıklı).
+    Sonuçlar float32 saklanır ve (fon seti, pencere, yöntem, veri damgası) anahtarıyla önbelleklenir;
+    korelasyon ısı haritası, etkin sınır ve Monte Carlo aynı tahmini paylaşır.
+    Önbellek iş parçacıkları arasında paylaşılabilir (kilitli); tahmin kilit dışında hesaplanır.
+    """
+
+    METHODS = ("sample", "ledoit_wolf", "ewma")
+
+    def __init__(self, block_size=256, min_periods=20, ewma_lambda=0.94, cache_size=32):
+        self.block_size = block_size
+        self.min_periods = min_periods
+        self.ewma_lambda = ewma_lambda
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def returns_matrix(self, full_df, funds=None, window=None):
+        """Date x FundCode günlük getiri matrisi (float32). Eksik günler NaN olarak kalır."""
+        if funds is not None:
+            full_df = full_df[full_df['FundCode'].isin(funds)]
+        prices = full_df.pivot_table(index='Date', columns='FundCode', values='Price', aggfunc='last').sort_index()
+        returns = prices.pct_change(fill_method=None).iloc[1:]
+        returns = returns.replace([np.inf, -np.inf], np.nan)
+        if window: returns = returns.iloc[-window:]
+        return returns.astype(np.float32)
+
+    @staticmethod
+    def data_stamp(full_df, funds=None):
+        """
+        Seçili fonların (Date, FundCode, Price) içerik özeti (önbellek anahtarı). Satır sayısı ve son tarih aynı
+        kalsa da düzeltilen fiyatlar ya da farklı bir veri kümesi önbellekten eski tahmini döndürmez.
+        """
+        data = full_df[['Date', 'FundCode', 'Price']]
+        if funds is not None: data = data[data['FundCode'].isin(funds)]
+        return hashlib.sha1(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+    def estimate(self, full_df, funds=None, window=None, method="sample"):
+        """
+        Önbellekli tahmin. Dönüş sözlüğü: cov, corr (DataFrame), mean (günlük ortalama getiri),
+        n_obs (ortak gözlem sayıları), shrinkage, method.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Bilinmeyen kovaryans yöntemi: {method}")
+        if full_df.empty: return None
+
+        fund_key = tuple(sorted(funds)) if funds is not None else tuple(sorted(full_df['FundCode'].unique()))
+        key = (fund_key, window, method, self.data_stamp(full_df, funds))
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        returns = self.returns_matrix(full_df, funds, window)
+        if returns.empty or returns.shape[1] == 0: return None
+
+        result = self.estimate_from_returns(returns, method)
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def estimate_from_returns(self, returns, method="sample"):
+        """Hazır getiri matrisi (Date x FundCode) üzerinden önbelleksiz tahmin."""
+        values = returns.to_numpy(dtype=np.float64)
+        columns = returns.columns
+
+        if method == "ewma":
+            weights = ewma_weights(len(values), self.ewma_lambda)
+            cov, corr, n_obs = pairwise_moments(values, weights=weights, block_size=self.block_size, ddof=0)
+        else:
+            cov, corr, n_obs = pairwise_moments(values, block_size=self.block_size)
+
+        # Yetersiz ortak gözlemli çiftler güvenilmez
+        sparse = n_obs < self.min_periods
+        cov[sparse] = np.nan
+        corr[sparse] = np.nan
+
+        shrinkage = 0.0
+        if method == "ledoit_wolf":
+            shrinkage = ledoit_wolf_shrinkage(values, block_size=self.block_size)
+            diag = np.diag(cov).copy()
+            mu = np.nanmean(diag)
+            cov = (1 - shrinkage) * cov
+            cov[np.diag_indices_from(cov)] += shrinkage * mu
+            std = np.sqrt(np.diag(cov))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = np.clip(cov / np.outer(std, std), -1.0, 1.0).astype(np.float32)
+
+        return {
+            "cov": pd.DataFrame(cov.astype(np.float32), index=columns, columns=columns),
+            "corr": pd.DataFrame(corr, index=columns, columns=columns),
+            "mean": pd.Series(np.nanmean(values, axis=0), index=columns),
+            "n_obs": pd.DataFrame(n_obs, index=columns, columns=columns),
+            "shrinkage": shrinkage,
+            "method": method
+        }
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
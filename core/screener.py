@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+
+from core.price_store import PriceStore, DATA_DIR
+
+
+class FundScreener:
+    """
+    Yerel depodaki tüm TEFAS fonları için tarayıcı / liderlik tablosu.
+
+    Metrikler bir kez hesaplanıp sütun bazlı (columnar) tablolar olarak data/screener altına yazılır;
+    her sıralama anahtarı için önceden hesaplanmış argsort indeksi tutulur. Sorgu yalnızca
+    maske + hazır sıralama indeksinden oluştuğu için binlerce fonda milisaniyeler içinde döner.
+    Referansa bağlı metrikler (Beta, Korelasyon) ilk istendiğinde tek vektörel geçişte hesaplanıp önbelleklenir.
+    Oturumlar arasında paylaşılır: tablolar kilit altında değiştirilir, sorgu tutarlı bir anlık görüntü üzerinde çalışır.
+
+    Kullanım:
+        screener = FundScreener()
+        screener.query(filters={"Sharpe Oranı": (1.0, None)}, sort_by="1 Yıl", reference="TTE", top_n=20)
+    """
+
+    METRIC_COLUMNS = ["Toplam Getiri", "1 Ay", "3 Ay", "6 Ay", "1 Yıl", "YTD (Yılbaşı)",
+                      "Yıllık Volatilite", "Sharpe Oranı", "Max Drawdown", "Gözlem"]
+    REFERENCE_COLUMNS = ["Beta", "Korelasyon"]
+
+    def __init__(self, store=None, processor=None, root=None, trading_days=252, min_overlap=20):
+        self.store = store or PriceStore()
+        if processor is None:
+            from core.processor import DataProcessor
+            processor = DataProcessor()
+        self.processor = processor
+        self.root = root or os.path.join(DATA_DIR, "screener")
+        self.trading_days = trading_days
+        self.min_overlap = min_overlap
+
+        self.table = pd.DataFrame()
+        self.returns = None
+        self._stamp = None
+        self._columns = {}
+        self._orders = {}
+        self._reference_cache = {}
+        self._lock = threading.RLock()
+
+    # ---------------------------------------------------------
+    # METRİK TABLOLARI (hesap + disk)
+    # ---------------------------------------------------------
+    def _paths(self):
+        return (os.path.join(self.root, "metrics.parquet"),
+                os.path.join(self.root, "returns.parquet"),
+                os.path.join(self.root, "meta.json"))
+
+    def build(self, full_df=None, force=False):
+        """
+        Metrik tablolarını hazırlar. full_df verilmezse fiyat deposundaki tüm fonlar kullanılır;
+        depo değişmediyse diskteki tablolar yeniden hesaplanmadan yüklenir.
+        """
+        with self._lock:
+            return self._build(full_df, force)
+
+    def _build(self, full_df, force):
+        stamp = list(self.store.version()) if full_df is None else [len(full_df), str(full_df['Date'].max())]
+        if not force and self._stamp == stamp and not self.table.empty:
+            return self.table
+        if not force and full_df is None and self._load(stamp):
+            return self.table
+
+        from_store = full_df is None
+        if from_store: full_df = self.store.load_all()
+        if full_df.empty:
+            print("⚠️ Tarayıcı için depoda fon verisi yok.")
+            self._set(pd.DataFrame(), None, stamp)
+            return self.table
+
+        table, returns = self._compute(full_df)
+        self._set(table, returns, stamp)
+        # Yalnızca depodan üretilen tablolar diske yazılır (oturum verisi depoyu temsil etmez)
+        if from_store: self._save()
+        return self.table
+
+    def _compute(self, full_df):
+        prices = self.processor._pivot_prices(full_df)
+        values = prices.to_numpy(dtype=np.float64)
+        observed = ~np.isnan(values)
+        filled = prices.ffill().to_numpy(dtype=np.float64)
+
+        # Fonun kendi gözlem günlerine göre getiri (arada eksik gün varsa son gözleme göre)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.full_like(values, np.nan)
+            returns[1:] = filled[1:] / filled[:-1] - 1
+        returns[~observed] = np.nan
+        returns[~np.isfinite(returns)] = np.nan
+
+        cols = np.arange(values.shape[1])
+        first_idx = np.argmax(observed, axis=0)
+        last_idx = len(values) - 1 - np.argmax(observed[::-1], axis=0)
+        n_obs = observed.sum(axis=0)
+
+        # calculate_risk_metrics ile aynı tanımlar (ilk gün getirisi 0 sayılır)
+        ret_count = np.maximum(n_obs, 1)
+        ret_sum = np.nansum(returns, axis=0)
+        mean_ret = ret_sum / ret_count
+        sq_dev = np.nansum((returns - mean_ret) ** 2, axis=0) + (n_obs - np.sum(~np.isnan(returns), axis=0)) * mean_ret ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vol = np.sqrt(sq_dev / (n_obs - 1)) * np.sqrt(self.trading_days)
+            annual = mean_ret * self.trading_days
+            sharpe = np.where((vol > 0) & np.isfinite(vol), annual / vol, 0.0)
+            total = filled[last_idx, cols] / filled[first_idx, cols] - 1
+            drawdown = np.nanmin(filled / np.fmax.accumulate(filled, axis=0) - 1, axis=0)
+
+        table = pd.DataFrame({
+            "Toplam Getiri": total,
+            "Yıllık Volatilite": vol,
+            "Sharpe Oranı": sharpe,
+            "Max Drawdown": drawdown,
+            "Gözlem": n_obs,
+            "Son Tarih": prices.index.values[last_idx]
+        }, index=prices.columns)
+
+        periods = self.processor.calculate_period_returns_batch(full_df)
+        table = table.join(periods)
+
+        if 'FundName' in full_df.columns:
+            names = full_df.dropna(subset=['FundName']).groupby('FundCode')['FundName'].last()
+            table.insert(0, "Fon Adı", names.reindex(table.index))
+        else:
+            table.insert(0, "Fon Adı", None)
+
+        table.index.name = 'FundCode'
+        table = table[table["Gözlem"] >= 2]
+        return table, pd.DataFrame(returns, index=prices.index, columns=prices.columns)[table.index].astype(np.float32)
+
+    def _set(self, table, returns, stamp):
+        self.table = table
+        self.returns = returns
+        self._stamp = stamp
+        self._reference_cache = {}
+        self._columns = {c: table[c].to_numpy(dtype=np.float64) for c in self.METRIC_COLUMNS if c in table.columns}
+        self._orders = {c: self._sort_index(v) for c, v in self._columns.items()}
+
+    @staticmethod
+    def _sort_index(values):
+        """Artan sıralama indeksi (NaN'lar sonda) ve geçerli değer sayısı."""
+        order = np.argsort(values, kind='stable')
+        return order, int(np.count_nonzero(~np.isnan(values)))
+
+    def _save(self):
+        if self.table.empty: return
+        os.makedirs(self.root, exist_ok=True)
+        metrics_path, returns_path, meta_path = self._paths()
+        self.table.to_parquet(metrics_path)
+        self.returns.to_parquet(returns_path)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"stamp": self._stamp}, f)
+
+    def _load(self, stamp):
+        metrics_path, returns_path, meta_path = self._paths()
+        if not all(os.path.exists(p) for p in self._paths()): return False
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                if json.load(f).get("stamp") != stamp: return False
+            self._set(pd.read_parquet(metrics_path), pd.read_parquet(returns_path), stamp)
+            return True
+        except Exception as e:
+            print(f"⚠️ Tarayıcı tabloları okunamadı, yeniden hesaplanacak: {e}")
+            return False
+
+    # ---------------------------------------------------------
+    # REFERANSA GÖRE BETA / KORELASYON
+    # ---------------------------------------------------------
+    def reference_metrics(self, reference):
+        """
+        Tüm fonların referans fona göre Beta ve Korelasyonu (ortak gözlem günleri üzerinden).
+        Beta, calculate_comparative_metrics ile aynı tanımı kullanır: cov(ddof=1) / var(ddof=0).
+        """
+        with self._lock:
+            return self._reference_metrics(reference)
+
+    def _reference_metrics(self, reference):
+        if reference in self._reference_cache: return self._reference_cache[reference]
+        if self.returns is None or reference not in self.returns.columns: return None
+
+        Y = self.returns.to_numpy(dtype=np.float64)
+        x = Y[:, self.returns.columns.get_loc(reference)]
+        both = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+        n = both.sum(axis=0)
+
+        X = np.where(both, x[:, None], 0.0)
+        Yz = np.where(both, Y, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mx, my = X.sum(axis=0) / n, Yz.sum(axis=0) / n
+            dx = np.where(both, X - mx, 0.0)
+            dy = np.where(both, Yz - my, 0.0)
+            sxy, sxx, syy = (dx * dy).sum(axis=0), (dx * dx).sum(axis=0), (dy * dy).sum(axis=0)
+            beta = np.where(sxx > 0, (sxy / (n - 1)) / (sxx / n), np.nan)
+            corr = sxy / np.sqrt(sxx * syy)
+
+        valid = n >= self.min_overlap
+        columns = {"Beta": np.where(valid, beta, np.nan), "Korelasyon": np.where(valid, corr, np.nan)}
+        result = {"columns": columns, "orders": {c: self._sort_index(v) for c, v in columns.items()}}
+        self._reference_cache[reference] = result
+        return result
+
+    # ---------------------------------------------------------
+    # SORGU
+    # ---------------------------------------------------------
+    def query(self, filters=None, sort_by="Sharpe Oranı", ascending=False, top_n=50, reference=None, search=None):
+        """
+        filters: {metrik: (alt, üst)} — sınırlardan biri None olabilir (açık aralık).
+        reference: Beta / Korelasyon için referans fon kodu.
+        search: Fon kodu veya adında aranacak metin.
+        Dönüş: sıralanmış ilk top_n fon (DataFrame). Sorgu süresi df.attrs['query_ms'] içindedir.
+        """
+        t0 = time.perf_counter()
+        # Eşzamanlı build(force=True) tabloları değiştirebilir: tablo, sütunlar ve sıralamalar birlikte alınır
+        with self._lock:
+            if self.table.empty: self.build()
+            table, columns, orders = self.table, dict(self._columns), dict(self._orders)
+            ref = self.reference_metrics(reference) if reference else None
+        if table.empty: return pd.DataFrame()
+
+        if ref is not None:
+            columns.update(ref["columns"])
+            orders.update(ref["orders"])
+
+        mask = np.ones(len(table), dtype=bool)
+        for col, (lo, hi) in (filters or {}).items():
+            if col not in columns: continue
+            v = columns[col]
+            if lo is not None: mask &= v >= lo
+            if hi is not None: mask &= v <= hi
+
+        if search:
+            text = search.strip().upper()
+            codes = table.index.str.upper().str.contains(text, regex=False)
+            names = table["Fon Adı"].fillna("").str.upper().str.contains(text, regex=False).to_numpy()
+            mask &= np.asarray(codes) | names
+
+        if sort_by not in orders: sort_by = "Sharpe Oranı"
+        order, n_valid = orders[sort_by]
+        ranked = order[:n_valid] if ascending else order[:n_valid][::-1]
+        ranked = np.concatenate([ranked, order[n_valid:]])
+        picked = ranked[mask[ranked]][:top_n]
+
+        result = table.iloc[picked].copy()
+        if ref is not None:
+            for col, v in ref["columns"].items(): result[col] = v[picked]
+        result.insert(0, "Sıra", np.arange(1, len(result) + 1))
+        result.attrs['query_ms'] = (time.perf_counter() - t0) * 1000
+        result.attrs['matched'] = int(mask.sum())
+        return result
+
+    def funds(self):
+        table = self.table
+        return list(table.index) if not table.empty else []
@@ -5,9 +5,15 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from core.processor import DataProcessor
+from core.backtester import PortfolioBacktester
+from core.optimizer import OBJECTIVE_LABELS
+from core.batch_forecaster import BatchForecaster
+import core.cached as cached
 
-# Initialize processor for usage in views if needed essentially
-processor = DataProcessor()
+ALT_OBJECTIVES = {k: OBJECTIVE_LABELS[k] for k in ("risk_parity", "min_cvar", "max_diversification", "hrp")}
+
+# Süreç genelinde tek işlemci (cache_resource); ağır tablolar core.cached üzerinden önbelleklenir
+processor = cached.get_processor()
 
 # -----------------------------------------------------------------------------
 # VIEW 1: DETAYLI ANALİZ def: definition (tanımlama) pd: pandas 
@@ -54,7 +60,7 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
             st.caption("Farklı fiyatlı fonları aynı eksende kıyaslamak için normalizasyon önerilir.")
             
         with col_chart:
-            plot_df = processor.normalize_for_comparison(df) if norm_active else df
+            plot_df = cached.normalized_panel(df) if norm_active else df
             y_col = "Cumulative_Return" if norm_active else "Price"
             title_txt = "Kümülatif Getiri Karşılaştırması" if norm_active else "Fiyat Grafiği"
             
@@ -65,24 +71,10 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
         
     # TAB 2: Table
     with tab2:
-        metrics_list = []
-        for f in df['FundCode'].unique():
-            if f == benchmark_id: continue # Skip benchmark row itself if needed, or keep it.
-            
-            sub = df[df['FundCode']==f]
-            m = processor.calculate_risk_metrics(sub)
-            
-            if m:
-                # Add Comparative Metrics if Benchmark exists
-                if not benchmark_df.empty:
-                    comp_m = processor.calculate_comparative_metrics(sub, benchmark_df)
-                    m.update(comp_m)
-                
-                m['Fon'] = f
-                metrics_list.append(m)
+        # Fon bazında risk + karşılaştırmalı metrikler (veri ve benchmark değişmedikçe yeniden hesaplanmaz)
+        m_df = cached.metrics_table(df, benchmark_df if not benchmark_df.empty else None, skip=benchmark_id)
         
-        if metrics_list:
-            m_df = pd.DataFrame(metrics_list).set_index("Fon")
+        if not m_df.empty:
             
             # Column Order
             base_cols = ["Toplam Getiri", "Yıllık Volatilite", "Sharpe Oranı", "Sortino Oranı", "Calmar Oranı", "Max Drawdown"]
@@ -133,6 +125,31 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
             else:
                 st.info("💡 Beta, Alpha, Treynor gibi metrikleri görmek için Sol Menüden bir Benchmark (Kıyas) seçiniz.")
 
+            # Bootstrap güven aralıkları (örnekleme hatası)
+            with st.expander("🎯 Metrik Güven Aralıkları (Durağan Bootstrap)"):
+                b1, b2 = st.columns(2)
+                n_boot = b1.select_slider("Yeniden Örnekleme Sayısı", [500, 1000, 2000, 5000], value=2000, key="boot_n")
+                conf = b2.select_slider("Güven Düzeyi", [0.90, 0.95, 0.99], value=0.95, format_func=lambda v: f"%{v * 100:.0f}", key="boot_conf")
+
+                # Sonuç girdileriyle (fonlar, benchmark, tarih aralığı, ayarlar) saklanır; girdiler değişince silinir
+                funds_df = df[df['FundCode'].isin(m_df.index)]
+                boot_key = (tuple(sorted(m_df.index)), benchmark_id, funds_df['Date'].min(), funds_df['Date'].max(), n_boot, conf)
+                if st.session_state.get('boot_res', {}).get('key') != boot_key:
+                    st.session_state.pop('boot_res', None)
+
+                if st.button("Güven Aralıklarını Hesapla", key="btn_boot"):
+                    with st.spinner(f"{n_boot} bootstrap örneklemi hesaplanıyor..."):
+                        st.session_state['boot_res'] = {'key': boot_key, 'result': processor.calculate_bootstrap_intervals(
+                            funds_df, benchmark_df if not benchmark_df.empty else None, n_resamples=n_boot, confidence=conf
+                        )}
+
+                boot = st.session_state.get('boot_res', {}).get('result')
+                if boot is not None and not boot.empty:
+                    ci = boot.apply(lambda r: f"{r['Tahmin']:.2f} [{r['Alt']:.2f}, {r['Üst']:.2f}]", axis=1).unstack('Metrik')
+                    ci = ci[[c for c in final_cols if c in ci.columns]]
+                    st.dataframe(ci, use_container_width=True)
+                    st.caption("Değerler: Tahmin [Alt, Üst]. Bloklu yeniden örnekleme günlük getirilerdeki otokorelasyonu korur.")
+
     # TAB 3: Correlation & Risk
     with tab3:
         c1, c2 = st.columns(2)
@@ -140,7 +157,9 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
             st.markdown("#### 🔥 Korelasyon Matrisi")
             corr_funds = [f for f in selected_funds if f in df['FundCode'].unique()]
             if len(corr_funds) > 1:
-                corr = processor.calculate_correlation_matrix(df[df['FundCode'].isin(corr_funds)])
+                method_labels = {"sample": "Örneklem (Çift Bazlı)", "ledoit_wolf": "Ledoit-Wolf Daraltma", "ewma": "EWMA (λ=0.94)"}
+                corr_method = st.selectbox("Tahmin Yöntemi", list(method_labels), format_func=method_labels.get, key="corr_method")
+                corr = cached.correlation_matrix(df[df['FundCode'].isin(corr_funds)], method=corr_method)
                 fig_corr = px.imshow(
                     corr, text_auto=".2f", color_continuous_scale="RdBu", 
                     zmin=-1, zmax=1, template="plotly_dark"
@@ -163,13 +182,30 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
         with c2:
             st.markdown("#### 📉 Maksimum Kayıp (Drawdown)")
             fig_dd = go.Figure()
-            for f in df['FundCode'].unique():
-                sub = df[df['FundCode']==f]
-                dd = processor.calculate_drawdown_series(sub)
+            dd_panel = cached.drawdown_panel(df)
+            for f, dd in dd_panel.groupby('FundCode', sort=False):
                 fig_dd.add_trace(go.Scatter(x=dd['Date'], y=dd['Drawdown'], name=f, fill='tozeroy'))
             fig_dd.update_layout(yaxis_tickformat='.1%', template="plotly_dark", title="Zirveden Düşüş Oranları")
             st.plotly_chart(fig_dd, use_container_width=True)
 
+        # Drawdown dönemleri (zirve → dip → toparlanma) ve türetilmiş endeksler
+        dd_res = cached.drawdown_episodes(df)
+        if not dd_res['summary'].empty:
+            st.markdown("#### 🕳️ Drawdown Dönemleri & Endeksler")
+            st.dataframe(dd_res['summary'].style.format({
+                "Pain Endeksi": "{:.2%}", "Ulcer Endeksi": "{:.2%}", "Su Altı Süresi (%)": "{:.1%}",
+                "Max Drawdown": "{:.2%}", "En Uzun Dönem (Gün)": "{:.0f}"
+            }, na_rep="-"), use_container_width=True)
+
+            min_depth = st.slider("Gösterilecek Minimum Derinlik (%)", 0.0, 30.0, 5.0, step=0.5, key="dd_min_depth")
+            episodes = dd_res['episodes']
+            episodes = episodes[episodes['Derinlik'] <= -min_depth / 100].sort_values('Derinlik')
+            show_ep = episodes.copy()
+            for col in ['Zirve Tarihi', 'Dip Tarihi', 'Toparlanma Tarihi']: show_ep[col] = show_ep[col].dt.date
+            st.dataframe(show_ep.style.format({
+                "Derinlik": "{:.2%}", "Dibe Kadar (Gün)": "{:.0f}", "Toparlanma (Gün)": "{:.0f}", "Toplam Süre (Gün)": "{:.0f}"
+            }, na_rep="-"), use_container_width=True, hide_index=True)
+
     # TAB 4: Real Return
     with tab4:
         if not inf_df.empty:
@@ -245,208 +281,476 @@ def render_analysis_view(df: pd.DataFrame, selected_funds: list, inf_df: pd.Data
 # -----------------------------------------------------------------------------
 # VIEW 2: PORTFÖY SİMÜLASYONU
 # -----------------------------------------------------------------------------
-def render_simulation_view(df: pd.DataFrame, selected_funds: list, sim_weights: dict, budget: float, processor: DataProcessor):
+def _sync_weight(src, dst):
+    st.session_state[dst] = st.session_state[src]
+
+
+def _default_weights(user_funds):
+    """Eşit ağırlık (%); toplam %100 olsun diye bölme kalanı son fona eklenir (ör. 33/33/34)."""
+    if not user_funds: return {}
+    eq = 100 // len(user_funds)
+    weights = {f: eq for f in user_funds}
+    weights[user_funds[-1]] += 100 - eq * len(user_funds)
+    return weights
+
+
+def _weights_valid(weights):
+    return abs(sum(weights.values()) - 1.0) <= 0.01
+
+
+def _weight_inputs(user_funds):
+    """Fon ağırlıkları (kaydırıcı + sayı kutusu senkron). Dönüş: {FundCode: oran}."""
+    defaults = _default_weights(user_funds)
+    weights = {}
+    cols = st.columns(min(len(user_funds), 4))
+    for i, f in enumerate(user_funds):
+        slider_key, num_key = f"slider_{f}", f"num_{f}"
+        if slider_key not in st.session_state: st.session_state[slider_key] = defaults[f]
+        if num_key not in st.session_state: st.session_state[num_key] = defaults[f]
+        with cols[i % len(cols)]:
+            st.slider(f"{f}", min_value=0, max_value=100, key=slider_key, on_change=_sync_weight, args=(slider_key, num_key))
+            st.number_input("%", min_value=0, max_value=100, step=1, key=num_key, label_visibility="collapsed",
+                            on_change=_sync_weight, args=(num_key, slider_key))
+        weights[f] = st.session_state[slider_key] / 100
+    return weights
+
+
+def current_weights(user_funds):
+    """Oturumdaki ağırlıklar (simülasyon parçası dışındaki bölümler için; ayarlanmamışsa varsayılan ağırlık)."""
+    defaults = _default_weights(user_funds)
+    return {f: st.session_state.get(f"slider_{f}", defaults[f]) / 100 for f in user_funds}
+
+
+def _portfolio_fragment(returns, user_funds, processor):
+    """
+    Ağırlık / bütçe girişi, özsermaye eğrisi ve VaR. Fragment olarak çalışır: ağırlık değişimi yalnızca bu bölümü
+    yeniden çalıştırır; hesap önbellekteki getiri matrisi üzerinde tek matris çarpımıdır.
+    """
+    st.markdown("### ⚖️ Fon Ağırlıkları")
+    budget = st.number_input("Bütçe (TL)", min_value=1000, value=100000, step=1000, key="sim_budget")
+    sim_weights = _weight_inputs(user_funds)
+
+    total_w = sum(sim_weights.values())
+    if not _weights_valid(sim_weights):
+        st.error(f"Ağırlıklar toplamı %100 olmalıdır. (Şu an: %{total_w*100:.0f})")
+        return
+    st.success("Dağılım Tamam")
+
+    sim_res = processor.simulate_portfolio(returns, sim_weights, budget)
+    if sim_res.empty:
+        st.warning("Seçilen fonlar için ortak tarihli getiri verisi yok.")
+        return
+
+    # 1. SUMMARY CARDS
+    curr_val = sim_res.iloc[-1]['Price']
+    profit = curr_val - budget
+    ret_rate = profit / budget
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Başlangıç Bütçesi", f"{budget:,.0f} ₺")
+    col2.metric("Portföy Değeri", f"{curr_val:,.0f} ₺", f"{ret_rate:+.2%}")
+    col3.metric("Net Kar/Zarar", f"{profit:,.0f} ₺", delta_color="normal")
+    
+    # 2. CHART
+    st.markdown("### 📈 Portföy Büyüme Simülasyonu")
+    fig_sim = px.line(sim_res, x="Date", y="Price", title="Zaman İçindeki Portföy Değeri", template="plotly_dark")
+    fig_sim.update_traces(line_color="#48c9b0", line_width=3)
+    st.plotly_chart(fig_sim, use_container_width=True)
+
+    # 3. VaR
+    st.markdown("### 🛡️ Riske Maruz Değer (VaR)")
+    var_95 = processor.value_at_risk(sim_res['Daily_Return'], budget, 0.95)
+    var_99 = processor.value_at_risk(sim_res['Daily_Return'], budget, 0.99)
+    st.info("VaR (Value at Risk), normal piyasa koşullarında belirli bir güven aralığında 'yarın' kaybedebileceğiniz maksimum tahmini tutarı gösterir.")
+    c_v1, c_v2 = st.columns(2)
+    with c_v1:
+        st.error(f"**%95 Güvenle VaR**\n\n### -{var_95['VaR_Amount']:,.2f} ₺")
+        st.caption("20 günde 1 bu miktardan fazla kayıp beklenebilir.")
+    with c_v2:
+        st.error(f"**%99 Güvenle VaR (Kriz)**\n\n### -{var_99['VaR_Amount']:,.2f} ₺")
+        st.caption("100 günde 1 bu miktardan fazla kayıp beklenebilir.")
+
+
+def render_simulation_view(df: pd.DataFrame, selected_funds: list, processor: DataProcessor):
     """
     Renders the Portfolio Simulation view.
+    Ağırlıklar bu sekmededir; özsermaye eğrisi ve VaR ayrı bir fragment'ta yeniden hesaplanır (sayfanın geri kalanı çalışmaz).
     """
     st.subheader("💼 Portföy Simülasyonu & Optimizasyon")
     
     # Filter only available funds
     user_funds = [f for f in selected_funds if f in df['FundCode'].unique()]
-    
-    # Check weights
-    total_w = sum(sim_weights.values())
     if len(user_funds) == 0:
         st.warning("Analiz edilecek fon verisi bulunamadı.")
         return
-        
-    if abs(total_w - 1.0) > 0.01:
-        st.error(f"Filtrelenen ağırlıklar toplamı %100 olmalıdır. (Şu an: %{total_w*100:.0f})")
-        return
 
-    # Run Simulation
-    sim_res = processor.calculate_portfolio_simulation(df, sim_weights, budget)
+    returns = cached.returns_matrix(df, tuple(user_funds))
+    st.fragment(_portfolio_fragment)(returns, user_funds, processor)
+
+    # Aşağıdaki sekmeler her zaman çizilir ve düğmeyle çalışır; ağırlık ve bütçe tıklama anında oturumdaki son
+    # değerlerden okunur (fragment yalnızca kendini yenilediği için burada erken dönülmez)
+    sim_weights = current_weights(user_funds)
+    budget = st.session_state.get("sim_budget", 100000)
+    weights_ok = _weights_valid(sim_weights)
+    weights_msg = "Ağırlıklar toplamı %100 olmalıdır; yukarıdaki fon ağırlıklarını düzeltin."
+
+    # 3. ADVANCED TABS
+    t_mc, t_eff, t_bt = st.tabs(["🎲 Monte Carlo", "⚡ Etkin Sınır (Markowitz)", "🔁 Rebalans Backtest"])
     
-    if not sim_res.empty:
-        # 1. SUMMARY CARDS
-        curr_val = sim_res.iloc[-1]['Price']
-        profit = curr_val - budget
-        ret_rate = profit / budget
-        
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Başlangıç Bütçesi", f"{budget:,.0f} ₺")
-        col2.metric("Portföy Değeri", f"{curr_val:,.0f} ₺", f"{ret_rate:+.2%}")
-        col3.metric("Net Kar/Zarar", f"{profit:,.0f} ₺", delta_color="normal")
+    with t_mc:
+        # User Input: Forecast Horizon
+        forecast_days = st.slider("Simülasyon Süresi (Gün)", min_value=30, max_value=365, value=180, step=30)
         
-        # 2. CHART
-        st.markdown("### 📈 Portföy Büyüme Simülasyonu")
-        fig_sim = px.line(sim_res, x="Date", y="Price", title="Zaman İçindeki Portföy Değeri", template="plotly_dark")
-        fig_sim.update_traces(line_color="#48c9b0", line_width=3)
-        st.plotly_chart(fig_sim, use_container_width=True)
+        st.markdown(f"##### 🎲 Gelecek {forecast_days} Gün İçin Olasılıklar")
         
-        # 3. ADVANCED TABS
-        t_risk, t_mc, t_eff = st.tabs(["🛡️ Riske Maruz Değer (VaR)", "🎲 Monte Carlo", "⚡ Etkin Sınır (Markowitz)"])
-        
-        with t_risk:
-            var_95 = processor.calculate_value_at_risk(df, sim_weights, budget, 0.95)
-            var_99 = processor.calculate_value_at_risk(df, sim_weights, budget, 0.99)
-            
-            if var_95:
-                # Better UI for VaR
-                st.info("VaR (Value at Risk), normal piyasa koşullarında belirli bir güven aralığında 'yarın' kaybedebileceğiniz maksimum tahmini tutarı gösterir.")
-                c_v1, c_v2 = st.columns(2)
-                with c_v1:
-                    st.error(f"**%95 Güvenle VaR**\n\n### -{var_95['VaR_Amount']:,.2f} ₺")
-                    st.caption("20 günde 1 bu miktardan fazla kayıp beklenebilir.")
-                with c_v2:
-                    st.error(f"**%99 Güvenle VaR (Kriz)**\n\n### -{var_99['VaR_Amount']:,.2f} ₺")
-                    st.caption("100 günde 1 bu miktardan fazla kayıp beklenebilir.")
-
-        with t_mc:
-            # User Input: Forecast Horizon
-            forecast_days = st.slider("Simülasyon Süresi (Gün)", min_value=30, max_value=365, value=180, step=30)
-            
-            st.markdown(f"##### 🎲 Gelecek {forecast_days} Gün İçin Olasılıklar")
-            
-            col_mc_btn, col_mc_info = st.columns([1, 4])
-            with col_mc_btn:
-                run_mc = st.button("🎲 Simülasyonu Başlat", key="btn_mc")
-            
-            if run_mc:
-                with st.spinner("Monte Carlo Simülasyonu Çalışıyor..."):
-                    mc_data = processor.run_monte_carlo_simulation(df, sim_weights, curr_val, forecast_days, 50)
-                    
-                    fig_mc = px.line(mc_data, x="Date", y=mc_data.columns[1:], title="50 Farklı Senaryo", template="plotly_dark")
-                    fig_mc.update_traces(line=dict(width=1), opacity=0.3, showlegend=False)
-                    st.plotly_chart(fig_mc, use_container_width=True)
-                    
-                    # Stats
-                    end_vals = mc_data.iloc[-1, 1:]
-                    worst = end_vals.quantile(0.05)
-                    avg = end_vals.mean()
-                    best = end_vals.quantile(0.95)
-                    
-                    m_c1, m_c2, m_c3 = st.columns(3)
-                    m_c1.metric("Kötü Senaryo (%5)", f"{worst:,.0f} ₺", delta=f"{(worst-curr_val)/curr_val:.1%}")
-                    m_c2.metric("Ortalama Beklenti", f"{avg:,.0f} ₺", delta=f"{(avg-curr_val)/curr_val:.1%}")
-                    m_c3.metric("İyi Senaryo (%95)", f"{best:,.0f} ₺", delta=f"{(best-curr_val)/curr_val:.1%}")
+        col_mc_btn, col_mc_info = st.columns([1, 4])
+        with col_mc_btn:
+            run_mc = st.button("🎲 Simülasyonu Başlat", key="btn_mc")
         
-        with t_eff:
-             st.markdown("##### ⚡ Markowitz Portfolio Optimization")
-             st.caption("Bu portföy sepeti için Matematiksel olarak en iyi Risk/Getiri oranına sahip ağırlıkları hesaplar.")
-             if st.button("⚡ Optimize Et", key="btn_opt"):
-                 with st.spinner("Matematiksel Optimizasyon Hesaplanıyor... (SLSQP Solver)"):
-                      opt_results = processor.calculate_efficient_frontier(df, user_funds)
+        if run_mc and not weights_ok:
+            st.error(weights_msg)
+        elif run_mc:
+            with st.spinner("Monte Carlo Simülasyonu Çalışıyor..."):
+                sim_res = processor.simulate_portfolio(returns, sim_weights, budget)
+                curr_val = sim_res.iloc[-1]['Price'] if not sim_res.empty else budget
+                mc_data = processor.run_monte_carlo_simulation(df, sim_weights, curr_val, forecast_days, 50)
+                
+                fig_mc = px.line(mc_data, x="Date", y=mc_data.columns[1:], title="50 Farklı Senaryo", template="plotly_dark")
+                fig_mc.update_traces(line=dict(width=1), opacity=0.3, showlegend=False)
+                st.plotly_chart(fig_mc, use_container_width=True)
+                
+                # Stats
+                end_vals = mc_data.iloc[-1, 1:]
+                worst = end_vals.quantile(0.05)
+                avg = end_vals.mean()
+                best = end_vals.quantile(0.95)
+                
+                m_c1, m_c2, m_c3 = st.columns(3)
+                m_c1.metric("Kötü Senaryo (%5)", f"{worst:,.0f} ₺", delta=f"{(worst-curr_val)/curr_val:.1%}")
+                m_c2.metric("Ortalama Beklenti", f"{avg:,.0f} ₺", delta=f"{(avg-curr_val)/curr_val:.1%}")
+                m_c3.metric("İyi Senaryo (%95)", f"{best:,.0f} ₺", delta=f"{(best-curr_val)/curr_val:.1%}")
+    
+    with t_eff:
+         st.markdown("##### ⚡ Markowitz Portfolio Optimization")
+         st.caption("Bu portföy sepeti için Matematiksel olarak en iyi Risk/Getiri oranına sahip ağırlıkları hesaplar.")
+         w_min, w_max = st.slider("Fon Ağırlık Sınırları (%)", 0, 100, (2, 60), key="opt_bounds")
+         opt_bounds = (w_min / 100, w_max / 100)
+         if st.button("⚡ Optimize Et", key="btn_opt"):
+             with st.spinner("Matematiksel Optimizasyon Hesaplanıyor... (SLSQP Solver)"):
+                  opt_results = cached.efficient_frontier(df, tuple(user_funds), opt_bounds)
+                  
+                  if opt_results:
+                      sim_df = opt_results['sim_df']
+                      frontier_df = opt_results['frontier_df']
+                      max_sharpe = opt_results['max_sharpe']
+                      min_vol = opt_results['min_vol']
                       
-                      if opt_results:
-                          sim_df = opt_results['sim_df']
-                          frontier_df = opt_results['frontier_df']
-                          max_sharpe = opt_results['max_sharpe']
-                          min_vol = opt_results['min_vol']
-                          
-                          # Plot
-                          fig_ef = px.scatter(sim_df, x="Volatility", y="Return", color="Sharpe", title="Etkin Sınır (Efficient Frontier)", template="plotly_dark", opacity=0.3)
-                          
-                          # Add Frontier Line
-                          fig_ef.add_trace(go.Scatter(x=frontier_df['Volatility'], y=frontier_df['Return'], mode='lines', name='Sınır Çizgisi', line=dict(color='white', width=2, dash='dot')))
-                          
-                          # Add Points
-                          fig_ef.add_trace(go.Scatter(
-                              x=[max_sharpe['Volatility']], y=[max_sharpe['Return']], 
-                              mode='markers', marker=dict(color='red', size=15, symbol='star'),
-                              name='Max Sharpe'
-                          ))
+                      # Plot
+                      fig_ef = px.scatter(sim_df, x="Volatility", y="Return", color="Sharpe", title="Etkin Sınır (Efficient Frontier)", template="plotly_dark", opacity=0.3)
+                      
+                      # Add Frontier Line
+                      fig_ef.add_trace(go.Scatter(x=frontier_df['Volatility'], y=frontier_df['Return'], mode='lines', name='Sınır Çizgisi', line=dict(color='white', width=2, dash='dot')))
+                      
+                      # Add Points
+                      fig_ef.add_trace(go.Scatter(
+                          x=[max_sharpe['Volatility']], y=[max_sharpe['Return']], 
+                          mode='markers', marker=dict(color='red', size=15, symbol='star'),
+                          name='Max Sharpe'
+                      ))
+                      
+                      fig_ef.add_trace(go.Scatter(
+                          x=[min_vol['Volatility']], y=[min_vol['Return']], 
+                          mode='markers', marker=dict(color='yellow', size=15, symbol='square'),
+                          name='Min Risk'
+                      ))
+                      
+                      st.plotly_chart(fig_ef, use_container_width=True)
+                      
+                      # Display Stats
+                      c_ef1, c_ef2 = st.columns(2)
+                      
+                      with c_ef1:
+                          st.success("🚀 Max Sharpe (Agresif)")
+                          st.metric("Beklenen Getiri", f"%{max_sharpe['Return']*100:.1f}")
+                          st.metric("Sharpe Oranı", f"{max_sharpe['Sharpe']:.2f}")
+                          # Create Pie Chart for Max Sharpe
+                          df_sharpe = pd.DataFrame.from_dict(max_sharpe['Weights'], orient='index', columns=['Oran'])
+                          df_sharpe = df_sharpe[df_sharpe['Oran'] > 0.01].reset_index().rename(columns={'index':'Fon'})
                           
-                          fig_ef.add_trace(go.Scatter(
-                              x=[min_vol['Volatility']], y=[min_vol['Return']], 
-                              mode='markers', marker=dict(color='yellow', size=15, symbol='square'),
-                              name='Min Risk'
-                          ))
+                          fig_sharpe = px.pie(df_sharpe, values='Oran', names='Fon', title='Varlık Dağılımı', template="plotly_dark", hole=0.4)
+                          fig_sharpe.update_traces(textinfo='percent+label')
+                          st.plotly_chart(fig_sharpe, use_container_width=True)
                           
-                          st.plotly_chart(fig_ef, use_container_width=True)
+                      with c_ef2:
+                          st.warning("🛡️ Min Volatilite (Defansif)")
+                          st.metric("Beklenen Getiri", f"%{min_vol['Return']*100:.1f}")
+                          st.metric("Yıllık Risk", f"%{min_vol['Volatility']*100:.1f}")
                           
-                          # Display Stats
-                          c_ef1, c_ef2 = st.columns(2)
+                          # Create Pie Chart for Min Volatility
+                          df_vol = pd.DataFrame.from_dict(min_vol['Weights'], orient='index', columns=['Oran'])
+                          df_vol = df_vol[df_vol['Oran'] > 0.01].reset_index().rename(columns={'index':'Fon'})
                           
-                          with c_ef1:
-                              st.success("🚀 Max Sharpe (Agresif)")
-                              st.metric("Beklenen Getiri", f"%{max_sharpe['Return']*100:.1f}")
-                              st.metric("Sharpe Oranı", f"{max_sharpe['Sharpe']:.2f}")
-                              # Create Pie Chart for Max Sharpe
-                              df_sharpe = pd.DataFrame.from_dict(max_sharpe['Weights'], orient='index', columns=['Oran'])
-                              df_sharpe = df_sharpe[df_sharpe['Oran'] > 0.01].reset_index().rename(columns={'index':'Fon'})
-                              
-                              fig_sharpe = px.pie(df_sharpe, values='Oran', names='Fon', title='Varlık Dağılımı', template="plotly_dark", hole=0.4)
-                              fig_sharpe.update_traces(textinfo='percent+label')
-                              st.plotly_chart(fig_sharpe, use_container_width=True)
-                              
-                          with c_ef2:
-                              st.warning("🛡️ Min Volatilite (Defansif)")
-                              st.metric("Beklenen Getiri", f"%{min_vol['Return']*100:.1f}")
-                              st.metric("Yıllık Risk", f"%{min_vol['Volatility']*100:.1f}")
-                              
-                              # Create Pie Chart for Min Volatility
-                              df_vol = pd.DataFrame.from_dict(min_vol['Weights'], orient='index', columns=['Oran'])
-                              df_vol = df_vol[df_vol['Oran'] > 0.01].reset_index().rename(columns={'index':'Fon'})
-                              
-                              fig_vol = px.pie(df_vol, values='Oran', names='Fon', title='Varlık Dağılımı', template="plotly_dark", hole=0.4)
-                              fig_vol.update_traces(textinfo='percent+label')
-                              st.plotly_chart(fig_vol, use_container_width=True)
-                      else:
-                          st.error("Optimizasyon başarısız oldu (Yetersiz veri).")
+                          fig_vol = px.pie(df_vol, values='Oran', names='Fon', title='Varlık Dağılımı', template="plotly_dark", hole=0.4)
+                          fig_vol.update_traces(textinfo='percent+label')
+                          st.plotly_chart(fig_vol, use_container_width=True)
+                  else:
+                      st.error("Optimizasyon başarısız oldu (Yetersiz veri).")
+
+         st.divider()
+         st.markdown("##### 🔁 Walk-Forward (Örneklem Dışı) Test")
+         st.caption("Ağırlıklar her dönem yalnızca geçmiş veriyle yeniden optimize edilir ve bir sonraki döneme uygulanır.")
+         c_w1, c_w2, c_w3 = st.columns(3)
+         wf_train = c_w1.selectbox("Eğitim Penceresi (Gün)", [63, 126, 252, 504], index=1, key="wf_train")
+         wf_test = c_w2.selectbox("Yeniden Optimizasyon (Gün)", [5, 21, 63], index=1, key="wf_test")
+         wf_mode = c_w3.radio("Pencere Tipi", ["rolling", "expanding"], format_func={"rolling": "Kayan", "expanding": "Genişleyen"}.get, horizontal=True, key="wf_mode")
+
+         if st.button("🔁 Walk-Forward Çalıştır", key="btn_wf"):
+             with st.spinner("Pencereler paralel optimize ediliyor..."):
+                 wf_res = processor.calculate_walk_forward(df, user_funds, wf_train, wf_test, wf_mode, budget)
+
+             if wf_res:
+                 fig_wf = px.line(wf_res['equity'], title="Örneklem Dışı Portföy Değeri", template="plotly_dark")
+                 st.plotly_chart(fig_wf, use_container_width=True)
+                 st.dataframe(wf_res['summary'].style.format({
+                     "Toplam Getiri": "{:.2%}", "Yıllık Volatilite": "{:.2%}", "Sharpe Oranı": "{:.2f}", "Max Drawdown": "{:.2%}"
+                 }), use_container_width=True)
+             else:
+                 st.warning("Seçilen eğitim penceresi için yeterli ortak geçmiş veri yok.")
+
+         st.divider()
+         st.markdown("##### 🧭 Alternatif Optimizasyon Hedefleri")
+         st.caption("Risk Paritesi ve HRP kapalı formda çözülüp ağırlık sınırlarına izdüşürülür; Min CVaR geçmiş günlük getirileri senaryo olarak kullanır.")
+         alt_objectives = st.multiselect(
+             "Hedefler", list(ALT_OBJECTIVES), default=list(ALT_OBJECTIVES),
+             format_func=ALT_OBJECTIVES.get, key="alt_objectives"
+         )
+         if st.button("🧭 Hesapla", key="btn_alt_opt") and alt_objectives:
+             alt_res = cached.optimal_portfolios(df, tuple(user_funds), tuple(alt_objectives), opt_bounds)
+             if alt_res:
+                 if alt_res['failed']:
+                     st.warning(f"Çözülemeyen hedefler (tabloda yok): {', '.join(alt_res['failed'])}")
+                 c_a1, c_a2 = st.columns([3, 2])
+                 with c_a1:
+                     fig_alt = px.bar(alt_res['weights'], barmode="group", title="Hedeflere Göre Ağırlıklar", template="plotly_dark")
+                     fig_alt.layout.yaxis.tickformat = ',.0%'
+                     st.plotly_chart(fig_alt, use_container_width=True)
+                 with c_a2:
+                     st.dataframe(alt_res['stats'].style.format({
+                         "Return": "{:.2%}", "Volatility": "{:.2%}", "Sharpe": "{:.2f}", "CVaR_95": "{:.2%}"
+                     }), use_container_width=True)
+             else:
+                 st.error("Optimizasyon başarısız oldu (yetersiz veri ya da hiçbir hedef çözülemedi).")
+
+    with t_bt:
+         st.markdown("##### 🔁 Rebalans Stratejileri Karşılaştırması")
+         st.caption("Al-tut, takvim ve bant rebalansı; işlem maliyeti ve TEFAS valörü ile birlikte tüm kombinasyonlar tek seferde test edilir.")
+
+         c_b1, c_b2, c_b3, c_b4 = st.columns(4)
+         bt_modes = c_b1.multiselect("Rebalans", list(PortfolioBacktester.MODE_LABELS), default=["none", "M", "Q", "band"], format_func=PortfolioBacktester.MODE_LABELS.get, key="bt_modes")
+         bt_fees = c_b2.multiselect("Maliyet (bp)", [0, 5, 10, 25, 50], default=[0, 10], key="bt_fees")
+         bt_lags = c_b3.multiselect("Valör (T+n)", [0, 1, 2, 3], default=[1], key="bt_lags")
+         bt_bands = c_b4.multiselect("Bant (%)", [2, 5, 10, 20], default=[5], key="bt_bands")
+
+         run_bt = st.button("🔁 Backtest'i Çalıştır", key="btn_bt")
+         if run_bt and not weights_ok:
+             st.error(weights_msg)
+         elif run_bt:
+             strategies = PortfolioBacktester.strategy_grid(
+                 sim_weights, modes=bt_modes, fees_bps=bt_fees or [0], lags=bt_lags or [0],
+                 bands=[b / 100 for b in bt_bands] or [0.05]
+             )
+             bt_res = processor.run_rebalancing_backtest(df, strategies, budget)
+
+             if bt_res:
+                 summary = bt_res['summary'].sort_values("Sharpe Oranı", ascending=False)
+                 fig_bt = px.line(bt_res['equity'], title=f"{len(strategies)} Strateji - Portföy Değeri", template="plotly_dark")
+                 fig_bt.update_traces(line=dict(width=1))
+                 st.plotly_chart(fig_bt, use_container_width=True)
+
+                 st.dataframe(summary.style.format({
+                     "Toplam Getiri": "{:.2%}", "Yıllık Volatilite": "{:.2%}", "Sharpe Oranı": "{:.2f}",
+                     "Max Drawdown": "{:.2%}", "Yıllık Devir (Turnover)": "{:.2f}", "Toplam Maliyet": "{:,.0f} ₺"
+                 }), use_container_width=True)
+             else:
+                 st.error("Backtest için ortak tarihli yeterli veri bulunamadı.")
 
 # -----------------------------------------------------------------------------
 # VIEW 3: AI TAHMİN
 # -----------------------------------------------------------------------------
-def render_ai_view(df: pd.DataFrame, ai_forecaster):
+def _forecast_job(ai_forecaster, sub, horizon, mode, latency_budget, use_macro=False, progress_cb=None):
+    """Arka plan işi: tek fon eğitimi + tahmin (JobExecutor iş parçacığında çalışır)."""
+    if use_macro and ai_forecaster.macro_store is not None:
+        # Makro matris günde en fazla bir kez yenilenir; sonraki eğitimler diskteki matrisi kullanır
+        if progress_cb: progress_cb(0.0, "Makro veriler kontrol ediliyor...")
+        ai_forecaster.macro_store.refresh()
+    result = ai_forecaster.forecast(sub, days_forward=horizon, mode=mode, latency_budget=latency_budget,
+                                    progress_cb=progress_cb, use_macro=use_macro)
+    tier = result["tier"]
+    return {"preds": result["preds"], "r2": result["r2"], "tier": tier, "fast": bool(tier and tier.startswith("Hızlı"))}
+
+
+def _background_fit_job(ai_forecaster, sub, horizon, use_macro=False, progress_cb=None):
+    """Hızlı katmanla yanıtlanan fon için gradyan artırma modelini eğitip kaydeder (sonraki istekler katman 2)."""
+    ai_forecaster.train_and_predict(sub, days_forward=horizon, mode="recursive", progress_cb=progress_cb,
+                                    use_macro=use_macro)
+
+
+def _job_panel(executor, job_key, result_key):
+    """
+    Arka plandaki işin ilerleme çubuğu ve iptal düğmesi. Fragment olarak her saniye yalnızca bu bölüm yenilenir;
+    iş bitince sonuç oturuma alınır ve sayfa bir kez yeniden çizilir.
+    """
+    job_id = st.session_state.get(job_key)
+    job = executor.get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pop(job_key, None)
+        return
+    if job.done:
+        executor.pop_result(job_id)
+        st.session_state.pop(job_key, None)
+        st.session_state[result_key] = {"status": job.status, "result": job.result, "error": job.error,
+                                        "name": job.name, "elapsed": job.elapsed, **st.session_state.pop(f"{job_key}_meta", {})}
+        st.rerun()
+    c_bar, c_btn = st.columns([5, 1])
+    c_bar.progress(job.progress, text=f"⏳ {job.name}: {job.message or job.status} ({job.elapsed:.0f} sn)")
+    if c_btn.button("⏹️ İptal", key=f"cancel_{job_key}"):
+        executor.cancel(job_id)
+
+
+def _job_outcome(result_key):
+    """Tamamlanan işin sonucu; hata / iptal durumunda mesaj gösterip None döner."""
+    outcome = st.session_state.get(result_key)
+    if not outcome: return None
+    if outcome["status"] == "İptal":
+        st.warning(f"{outcome['name']} iptal edildi.")
+        return None
+    if outcome["status"] == "Hata":
+        st.error(f"{outcome['name']} başarısız oldu: {outcome['error']}")
+        return None
+    return outcome
+
+
+def render_ai_view(df: pd.DataFrame, ai_forecaster, executor):
     """
     Renders the AI Forecasting view.
+    Eğitimler JobExecutor'da arka planda çalışır; widget etkileşimleri (yeniden çalıştırma) işi kesmez.
     """
     st.subheader("🤖 Yapay Zeka ile Fiyat Tahmini")
-    st.info("Makine Öğrenimi (Gradient Boosting) kullanarak seçilen fonun 30 günlük gelecekteki olası hareketini modeller.")
+    st.info("Makine Öğrenimi (Gradient Boosting) kullanarak seçilen fonun gelecekteki olası hareketini modeller.")
     
-    target_f = st.selectbox("Analiz Edilecek Fonu Seçiniz:", df['FundCode'].unique())
+    c_fund, c_h, c_mode = st.columns([2, 1, 1])
+    target_f = c_fund.selectbox("Analiz Edilecek Fonu Seçiniz:", df['FundCode'].unique())
+    horizon = c_h.slider("Tahmin Ufku (Gün)", 7, 365, 30, key="ai_horizon")
+    ai_mode = c_mode.radio("Tahmin Yöntemi", ["recursive", "direct", "tiered"], key="ai_mode",
+                           format_func=lambda m: {"recursive": "Özyinelemeli", "direct": "Doğrudan (Çok Ufuklu)",
+                                                  "tiered": "Katmanlı (Gecikme Hedefli)"}[m],
+                           help="Doğrudan yöntem tüm ufukları tek modelle, tek seferde tahmin eder; hata adım adım birikmez. "
+                                "Katmanlı yöntem, süre hedefine sığmayan eğitimlerde hızlı istatistiksel modellere geçer.")
+    latency_budget = None
+    if ai_mode == "tiered":
+        latency_budget = st.slider("Gecikme Hedefi (sn)", 0.5, 60.0, 2.0, 0.5, key="ai_latency",
+                                   help=f"Tahmini eğitim süresi: {ai_forecaster.estimated_fit_seconds(target_f):.1f} sn")
+    use_macro = st.checkbox("Makro göstergeleri ekle", key="ai_macro",
+                            help="Politika faizi, rezerv, güven endeksi, ABD 10Y, DXY ve VIX; her gün için yalnızca "
+                                 "o gün açıklanmış değerler kullanılır (yayın gecikmeleri dikkate alınır).")
     
-    if st.button("🔮 Tahmini Başlat", type="primary"):
-        with st.spinner(f"{target_f} için geçmiş veriler işleniyor ve model eğitiliyor..."):
-            sub = df[df['FundCode'] == target_f]
-            preds, r2 = ai_forecaster.train_and_predict(sub, days_forward=30)
+    running = st.session_state.get('ai_job') is not None
+    if st.button("🔮 Tahmini Başlat", type="primary", disabled=running):
+        sub = df[df['FundCode'] == target_f]
+        st.session_state['ai_job'] = executor.submit(f"{target_f} · {horizon} gün", _forecast_job, ai_forecaster, sub,
+                                                     horizon, ai_mode, latency_budget, use_macro)
+        st.session_state['ai_job_meta'] = {"fund": target_f, "horizon": horizon, "use_macro": use_macro}
+        st.session_state.pop('ai_result', None)
+        running = True
+
+    if running:
+        st.fragment(run_every=1.0)(_job_panel)(executor, 'ai_job', 'ai_result')
+
+    outcome = _job_outcome('ai_result')
+    if outcome:
+        preds, r2 = outcome["result"]["preds"], outcome["result"]["r2"]
+        fund, fund_horizon = outcome["fund"], outcome["horizon"]
+        if preds is not None:
+            st.success(f"Model Eğitimi Tamamlandı! (Doğruluk Skoru R²: %{r2*100:.1f} | Model: {outcome['result']['tier']} | "
+                       f"{outcome['elapsed']:.1f} sn)")
+            if outcome["result"].get("fast"):
+                # Hızlı katman yanıtı: tam model bir kez arka planda eğitilir (sonuç kayıt deposuna yazılır)
+                if not outcome.get("bg_job"):
+                    outcome["bg_job"] = executor.submit(f"{fund} · arka plan eğitimi", _background_fit_job, ai_forecaster,
+                                                        df[df['FundCode'] == fund], fund_horizon, outcome.get("use_macro", False))
+                st.caption("⏳ Gradyan artırma modeli arka planda eğitiliyor; bu fon için sonraki tahminler kayıtlı modeli kullanır.")
+            if len(preds) < fund_horizon:
+                st.warning(f"Fonun geçmişi yalnızca {len(preds)} günlük ufku test edilebilir şekilde destekliyor; "
+                           f"tahmin ve güven aralığı bu ufukla sınırlandı.")
             
-            if preds is not None:
-                st.success(f"Model Eğitimi Tamamlandı! (Doğruluk Skoru R²: %{r2*100:.1f})")
-                
-                fig_ai = go.Figure()
-                past = sub.iloc[-90:] # Show last 90 days context
-                
-                # History
-                fig_ai.add_trace(go.Scatter(
-                    x=past['Date'], y=past['Price'], 
-                    name="Geçmiş Veri", 
-                    line=dict(color='#cfd8dc', width=2)
-                ))
-                
-                # Forecast
-                fig_ai.add_trace(go.Scatter(
-                    x=preds['Date'], y=preds['Predicted_Price'], 
-                    name="AI Tahmin", 
-                    line=dict(color='#00bfff', width=3, dash='dot')
-                ))
-                
-                # Confidence Interval
-                fig_ai.add_trace(go.Scatter(
-                     x=pd.concat([preds['Date'], preds['Date'][::-1]]),
-                     y=pd.concat([preds['Upper_Bound'], preds['Lower_Bound'][::-1]]),
-                     fill='toself', 
-                     fillcolor='rgba(0, 191, 255, 0.15)', 
-                     line=dict(color='rgba(0,0,0,0)'), 
-                     name='Güven Aralığı'
-                ))
-                
-                fig_ai.update_layout(title=f"{target_f} - 30 Günlük Fiyat Projeksiyonu", template="plotly_dark", hovermode="x unified")
-                st.plotly_chart(fig_ai, use_container_width=True)
+            sub = df[df['FundCode'] == fund]
+            fig_ai = go.Figure()
+            past = sub.iloc[-90:] # Show last 90 days context
+            
+            # History
+            fig_ai.add_trace(go.Scatter(
+                x=past['Date'], y=past['Price'], 
+                name="Geçmiş Veri", 
+                line=dict(color='#cfd8dc', width=2)
+            ))
+            
+            # Forecast
+            fig_ai.add_trace(go.Scatter(
+                x=preds['Date'], y=preds['Predicted_Price'], 
+                name="AI Tahmin", 
+                line=dict(color='#00bfff', width=3, dash='dot')
+            ))
+            
+            # Confidence Interval
+            fig_ai.add_trace(go.Scatter(
+                 x=pd.concat([preds['Date'], preds['Date'][::-1]]),
+                 y=pd.concat([preds['Upper_Bound'], preds['Lower_Bound'][::-1]]),
+                 fill='toself', 
+                 fillcolor='rgba(0, 191, 255, 0.15)', 
+                 line=dict(color='rgba(0,0,0,0)'), 
+                 name='Güven Aralığı'
+            ))
+            
+            fig_ai.update_layout(title=f"{fund} - {fund_horizon} Günlük Fiyat Projeksiyonu", template="plotly_dark", hovermode="x unified")
+            st.plotly_chart(fig_ai, use_container_width=True)
 
-            else:
-                st.error("Model eğitimi için yeterli veri sağlanamadı.")
+        else:
+            st.error("Model eğitimi için yeterli veri sağlanamadı.")
+
+    # --- TOPLU TAHMİN (Tüm fonlar, paralel süreçler) ---
+    st.divider()
+    st.markdown("##### 📦 Toplu Tahmin (Tüm Fonlar)")
+    st.caption("Portföydeki tüm fonlar ayrı süreçlerde eğitilir; kayıtlı modeli olan fonlar anında tahmin edilir.")
+    batch_running = st.session_state.get('batch_job') is not None
+    if st.button("Tüm Fonlar İçin Tahmin Üret", key="btn_batch_ai", disabled=batch_running):
+        st.session_state['batch_job'] = executor.submit(f"Toplu tahmin ({df['FundCode'].nunique()} fon)",
+                                                        BatchForecaster().run, df, days_forward=horizon, mode=ai_mode)
+        st.session_state.pop('batch_ai', None)
+        batch_running = True
+
+    if batch_running:
+        st.fragment(run_every=1.0)(_job_panel)(executor, 'batch_job', 'batch_ai')
+
+    outcome = _job_outcome('batch_ai')
+    batch = outcome["result"] if outcome else None
+    if batch and not batch['forecasts'].empty:
+        fc = batch['forecasts']
+        last_prices = df.sort_values('Date').groupby('FundCode')['Price'].last()
+        final = fc.groupby('FundCode').last()
+        summary = pd.DataFrame({
+            "Son Fiyat": last_prices.reindex(final.index),
+            "Tahmin": final['Predicted_Price'],
+            "Alt Sınır": final['Lower_Bound'],
+            "Üst Sınır": final['Upper_Bound']
+        })
+        summary["Beklenen Getiri"] = summary["Tahmin"] / summary["Son Fiyat"] - 1
+        summary = summary.join(batch['timing'])
+        st.dataframe(summary.style.format({
+            "Son Fiyat": "{:.4f}", "Tahmin": "{:.4f}", "Alt Sınır": "{:.4f}", "Üst Sınır": "{:.4f}",
+            "Beklenen Getiri": "{:.2%}", "Süre (sn)": "{:.1f}", "Test R²": "{:.3f}"
+        }, na_rep="-"), use_container_width=True)
+        st.download_button("⬇️ Tahmin Tablosunu İndir (CSV)", fc.to_csv(index=False).encode("utf-8"),
+                           file_name="toplu_tahmin.csv", mime="text/csv", key="dl_batch_ai")
 
 # -----------------------------------------------------------------------------
 # VIEW 4: PIYASA EKRANI (MARKET DASHBOARD)
@@ -678,7 +982,16 @@ def render_real_return_view(df: pd.DataFrame, inf_df: pd.DataFrame):
             fig_real.add_trace(go.Scatter(x=res['Date'], y=res['Real_Return'], name="Reel (Net)", line=dict(color='#66bb6a', dash='dash'), fill='tonexty'))
             fig_real.update_layout(title=f"{f_sel} - Reel Getiri Analizi", template="plotly_dark", yaxis_tickformat='.1%')
             st.plotly_chart(fig_real, use_container_width=True, key="chart_real_return_main")
-            
+
+            # Tüm fonlar için reel getiri özeti (ortak deflatör ile tek seferde)
+            real_matrix = processor.calculate_real_returns_matrix(df, inf_df)
+            if not real_matrix.empty:
+                nominal_last = df.sort_values('Date').groupby('FundCode')['Cumulative_Return'].last()
+                real_last = real_matrix.ffill().iloc[-1]
+                summary = pd.DataFrame({"Nominal Getiri": nominal_last, "Reel Getiri": real_last}).dropna()
+                st.markdown("##### 📋 Tüm Fonlar: Nominal vs Reel")
+                st.dataframe(summary.style.format("{:.2%}"), use_container_width=True)
+
             # 2. Monthly Inflation Chart
             if 'Aylık Enflasyon' in inf_df.columns:
                 st.markdown("##### 📉 Aylık Enflasyon Seyri")
@@ -686,3 +999,83 @@ def render_real_return_view(df: pd.DataFrame, inf_df: pd.DataFrame):
                 fig_inf.update_traces(marker_color='#bfa15f')
                 st.plotly_chart(fig_inf, use_container_width=True, key="chart_real_return_inflation")
 
+
+# -----------------------------------------------------------------------------
+# VIEW: FON TARAYICI (TÜM TEFAS EVRENİ)
+# -----------------------------------------------------------------------------
+def render_screener_view(screener, start_date=None, end_date=None):
+    """
+    Renders the full-universe Fund Screener: filters, ranking and reference Beta/Correlation.
+    """
+    st.subheader("🔎 Fon Tarayıcı & Liderlik Tablosu")
+    st.caption("Yerel fiyat deposundaki tüm fonlar önceden hesaplanmış metrik tabloları üzerinden süzülür ve sıralanır.")
+
+    c_sync, c_build, c_info = st.columns([1, 1, 2])
+    if c_sync.button("🌐 TEFAS Evrenini Güncelle", key="btn_scr_sync", help="Seçili tarih aralığındaki tüm TEFAS fonlarını yerel depoya yazar."):
+        with st.spinner("TEFAS evreni çekiliyor..."):
+            n_updated = screener.store.sync_universe(start_date or (pd.Timestamp.today() - pd.Timedelta(days=365)),
+                                                     end_date or pd.Timestamp.today())
+        if n_updated: st.success(f"{n_updated} fon depoya yazıldı.")
+        else: st.warning("Evren güncellenemedi (tefas-crawler kurulu değil veya veri dönmedi).")
+    force = c_build.button("♻️ Metrikleri Yeniden Hesapla", key="btn_scr_build")
+
+    with st.spinner("Metrik tabloları hazırlanıyor..."):
+        table = screener.build(force=force)
+
+    if table.empty:
+        st.info("Depoda fon verisi yok. 'Analizi Çalıştır' ile fon çekin veya TEFAS evrenini güncelleyin.")
+        return
+    c_info.metric("Depodaki Fon Sayısı", len(table))
+
+    # --- FİLTRELER ---
+    with st.expander("🎛️ Filtreler", expanded=True):
+        f1, f2, f3, f4 = st.columns(4)
+        min_ret = f1.number_input("Min 1 Yıl Getiri (%)", value=-100.0, step=5.0, key="scr_min_ret")
+        max_vol = f2.number_input("Max Volatilite (%)", value=200.0, step=5.0, key="scr_max_vol")
+        min_sharpe = f3.number_input("Min Sharpe", value=-10.0, step=0.25, key="scr_min_sharpe")
+        max_dd = f4.number_input("Max Drawdown Sınırı (%)", value=-100.0, step=5.0, key="scr_max_dd",
+                                 help="Örn: -20 → en fazla %20 düşüş yaşamış fonlar")
+
+        r1, r2, r3, r4 = st.columns(4)
+        funds = screener.funds()
+        reference = r1.selectbox("Referans Fon (Beta/Korelasyon)", ["Yok"] + funds, key="scr_reference")
+        reference = None if reference == "Yok" else reference
+        sort_options = screener.METRIC_COLUMNS + (screener.REFERENCE_COLUMNS if reference else [])
+        sort_by = r2.selectbox("Sıralama", sort_options, index=sort_options.index("Sharpe Oranı"), key="scr_sort")
+        ascending = r3.toggle("Artan Sıralama", value=False, key="scr_asc")
+        top_n = r4.slider("Gösterilecek Fon", 10, 500, 50, step=10, key="scr_top_n")
+
+        search = st.text_input("Fon Kodu / Adı Ara", key="scr_search")
+
+        # Yalnızca varsayılandan değiştirilen sınırlar gönderilir: metriği NaN olan fonlar (örn: 1 yıllık geçmişi
+        # olmayanlar) kullanıcı o metriğe sınır koymadıkça elenmez
+        filters = {}
+        if min_ret != -100.0: filters["1 Yıl"] = (min_ret / 100, None)
+        if max_vol != 200.0: filters["Yıllık Volatilite"] = (None, max_vol / 100)
+        if min_sharpe != -10.0: filters["Sharpe Oranı"] = (min_sharpe, None)
+        if max_dd != -100.0: filters["Max Drawdown"] = (max_dd / 100, None)
+        if reference:
+            c_lo, c_hi = st.slider("Korelasyon Aralığı", -1.0, 1.0, (-1.0, 1.0), step=0.05, key="scr_corr_range")
+            if (c_lo, c_hi) != (-1.0, 1.0): filters["Korelasyon"] = (c_lo, c_hi)
+
+    result = screener.query(filters=filters, sort_by=sort_by, ascending=ascending, top_n=top_n,
+                            reference=reference, search=search or None)
+
+    st.caption(f"{result.attrs.get('matched', 0)} fon kriterlere uyuyor • sorgu süresi {result.attrs.get('query_ms', 0):.1f} ms")
+    if result.empty:
+        st.warning("Kriterlere uyan fon bulunamadı.")
+        return
+
+    pct_cols = [c for c in ["Toplam Getiri", "1 Ay", "3 Ay", "6 Ay", "1 Yıl", "YTD (Yılbaşı)", "Yıllık Volatilite", "Max Drawdown"] if c in result.columns]
+    fmt = {c: "{:.2%}" for c in pct_cols}
+    fmt.update({c: "{:.2f}" for c in ["Sharpe Oranı", "Beta", "Korelasyon"] if c in result.columns})
+    show = result.copy()
+    if 'Son Tarih' in show.columns: show['Son Tarih'] = pd.to_datetime(show['Son Tarih']).dt.date
+    st.dataframe(show.style.format(fmt, na_rep="-"), use_container_width=True, height=500)
+
+    # Risk / Getiri dağılımı
+    fig = px.scatter(result.reset_index(), x="Yıllık Volatilite", y="1 Yıl", color="Sharpe Oranı", hover_name="FundCode",
+                     hover_data=["Fon Adı"], template="plotly_dark", color_continuous_scale="Viridis",
+                     title="Seçili Fonlar: Risk / 1 Yıllık Getiri")
+    fig.update_layout(xaxis_tickformat='.0%', yaxis_tickformat='.0%')
+    st.plotly_chart(fig, use_container_width=True, key="chart_screener_scatter")
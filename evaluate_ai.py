@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+AI Tahmin Değerlendirmesi (walk-forward)
+Yerel fiyat deposundaki fonlar (veya sentetik veri) üzerinde AIForecaster'ı genişleyen pencereyle
+geçmişe dönük çalıştırır; naif ve sürüklenme kıyaslarına göre ufuk bazında hata ve gecikme raporlar.
+
+Örnek:
+    python evaluate_ai.py --funds TCD MAC --retrain-every 21 --horizons 1 5 21
+    python evaluate_ai.py --all --workers 8 --out degerlendirme   (tüm evren, gece çalıştırması)
+    FADES_MAX_THREADS=16 FADES_MAX_PROCESSES=8 python evaluate_ai.py --all   (bütçe ortam değişkenleriyle)
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from core.price_store import PriceStore
+from core.forecast_evaluation import ForecastEvaluator
+from core.concurrency import ConcurrencyBudget
+
+
+def synthetic_data(n_funds=2, n_days=600):
+    """diagnose_ai.py ile aynı sentetik fiyat süreci (günlük %0.02 sürüklenme, %1 oynaklık)."""
+    np.random.seed(42)
+    dates = pd.date_range(end=datetime.now(), periods=n_days, freq='D')
+    frames = []
+    for i in range(n_funds):
+        prices = 100 * np.cumprod(1 + np.random.normal(0.0002, 0.01, n_days))
+        frames.append(pd.DataFrame({'Date': dates, 'Price': prices, 'FundCode': f"SYN{i + 1}"}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIForecaster walk-forward değerlendirmesi")
+    parser.add_argument("--funds", nargs="*", help="Fon kodları (varsayılan: sentetik veri)")
+    parser.add_argument("--all", action="store_true", help="Fiyat deposundaki tüm fonlar")
+    parser.add_argument("--years", type=float, default=3, help="Kullanılacak geçmiş (yıl)")
+    parser.add_argument("--horizons", nargs="+", type=int, default=[1, 5, 10, 21])
+    parser.add_argument("--retrain-every", type=int, default=21, help="Yeniden eğitim aralığı (gün)")
+    parser.add_argument("--eval-every", type=int, default=1, help="Tahmin başlangıçları arası (gün)")
+    parser.add_argument("--min-train", type=int, default=250)
+    parser.add_argument("--modes", nargs="+", default=["recursive"], choices=["recursive", "direct"])
+    parser.add_argument("--search-budget", type=float, default=10.0, help="Eğitim başına arama bütçesi (sn)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="Sonuç CSV dosyalarının öneki")
+    args = parser.parse_args()
+
+    if args.funds or args.all:
+        store = PriceStore()
+        full_df = store.load_all(None if args.all else [f.upper() for f in args.funds])
+        full_df = full_df[full_df['Date'] >= datetime.now() - timedelta(days=int(365 * args.years))]
+        if full_df.empty:
+            print("❌ Fiyat deposunda veri bulunamadı (önce uygulamadan veri çekin).")
+            return
+    else:
+        full_df = synthetic_data()
+
+    evaluator = ForecastEvaluator(horizons=args.horizons, retrain_every=args.retrain_every, eval_every=args.eval_every,
+                                  min_train=args.min_train, modes=args.modes, search_budget=args.search_budget,
+                                  max_workers=args.workers, budget=ConcurrencyBudget(max_requests=1))
+    print(f"📊 {full_df['FundCode'].nunique()} fon değerlendiriliyor ({evaluator.max_workers} süreç x "
+          f"{evaluator.threads_per_worker} iş parçacığı)...")
+    result = evaluator.run(full_df, progress_cb=lambda done, total: print(f"  {done}/{total} blok", end="\r"))
+    if result is None: return
+
+    pd.set_option("display.width", 160)
+    print("\n" + "=" * 60)
+    print(f"ÖZET ({result['elapsed']:.0f} sn)")
+    print("=" * 60)
+    print(result['summary'].round(3).to_string())
+    print("\nGECİKME (model bazında ortalama)")
+    print(result['latency'].groupby('Model')[['Eğitim (sn)', 'Tahmin (ms)']].mean().round(2).to_string())
+
+    if args.out:
+        result['errors'].to_csv(f"{args.out}_errors.csv", index=False)
+        result['summary'].to_csv(f"{args.out}_summary.csv")
+        result['latency'].to_csv(f"{args.out}_latency.csv", index=False)
+        print(f"\n✅ Sonuçlar kaydedildi: {os.path.abspath(args.out)}_*.csv")
+
+
+if __name__ == "__main__":
+    main()